@@ -7,15 +7,41 @@ feature flags.
 """
 
 import logging
+import multiprocessing
 import threading
-from collections import OrderedDict
 from datetime import time
 from typing import Any
 
 from cloud_manager import CloudManager
 from config_manager import ConfigManager
+from downloader.checkpoint import load_checkpoint, save_checkpoint
+from downloader.disk_ledger import MIB, configure_disk_ledger
+from downloader.engines.aria2 import (
+    Aria2Settings,
+    configure_aria2,
+    shutdown_aria2_daemon,
+)
+from downloader.engines.extractor_index import (
+    get_extractor_index,
+    warm_extractor_index,
+)
+from downloader.engines.ydl_pool import get_ydl_pool
+from downloader.info import shutdown_extraction_pool
+from downloader.metadata_cache import configure_metadata_cache, get_metadata_cache
+from downloader.playlist import close_all_enumerators
+from downloader.postprocess import (
+    configure_postprocess_stage,
+    shutdown_postprocess_stage,
+)
+from downloader.process_pool import (
+    configure_process_backend,
+    shutdown_process_backend,
+)
+from downloader.staging import configure_staging
+from feed_poller import FeedPoller
 from history_manager import HistoryManager
 from queue_manager import QueueManager
+from rss_manager import RSSManager
 from social_manager import SocialManager
 from sync_manager import SyncManager
 from ui_utils import is_ffmpeg_available
@@ -104,6 +130,15 @@ class AppState:
         self.cloud_manager = CloudManager()
         self.social_manager = SocialManager()
 
+        # Feeds are polled in the background; the RSS view reads their store
+        self.rss_manager = RSSManager(self.config)
+        self.feed_poller = FeedPoller(
+            self.rss_manager,
+            enqueue=self.queue_manager.add_item,
+            history_manager=self.history_manager,
+            config=self.config,
+        )
+
         # Instantiate SyncManager with dependencies to avoid circular imports
         self.sync_manager = SyncManager(
             self.cloud_manager, self.config, history_manager=self.history_manager
@@ -125,9 +160,47 @@ class AppState:
         self.config["high_contrast"] = self.high_contrast
         self.compact_mode = self.config.get("compact_mode", False)
 
-        # Use OrderedDict for proper LRU cache implementation
-        self._video_info_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
-        self._video_info_max_size = self.config.get("metadata_cache_size", 50)
+        # Persistent metadata cache; metadata_cache_size bounds its memory tier
+        configure_metadata_cache(
+            memory_entries=self.config.get("metadata_cache_size", 50),
+            max_entries=self.config.get("metadata_cache_max_entries"),
+        )
+
+        # Process-backend workers re-import the main module (and so this
+        # singleton); they must not start the app's background services
+        self.is_worker_process = multiprocessing.current_process().name != (
+            "MainProcess"
+        )
+
+        # Optional worker processes for yt-dlp jobs (workers spawn on demand)
+        configure_process_backend(
+            bool(self.config.get("process_backend", False))
+            and not self.is_worker_process,
+            max_workers=self.config.get("process_workers") or None,
+            max_jobs_per_worker=self.config.get("process_worker_max_jobs", 25),
+        )
+
+        # Limits of the shared aria2c daemon (started on first aria2 download)
+        configure_aria2(Aria2Settings.from_config(self.config))
+
+        # Concurrency of the ffmpeg post-processing stage (0: by CPU count)
+        configure_postprocess_stage(self.config.get("postprocess_workers") or None)
+
+        # Per-volume disk-space reservations for queue admission
+        configure_disk_ledger(
+            min_free_bytes=self.config.get("disk_min_free_mb", 100) * MIB,
+            unknown_size_bytes=self.config.get("disk_unknown_size_mb", 1024) * MIB,
+        )
+
+        # Optional local working directory (fast disk) for downloads
+        configure_staging(
+            self.config.get("staging_dir") or None,
+            self.config.get("staging_max_mb", 0),
+        )
+
+        # Downloads suspended at the last shutdown continue where they stopped
+        if not self.is_worker_process:
+            self._restore_checkpoint()
 
         # Background Initialization of heavy components
         def _background_init():
@@ -139,10 +212,19 @@ class AppState:
             try:
                 HistoryManager.init_db()
                 logger.info("History database initialized.")
+                self.history_manager.start_retention_worker(self.config)
             except Exception as e:  # pylint: disable=broad-exception-caught
                 logger.error("Failed to initialize history database: %s", e)
 
-            # 3. Social Manager
+            # 3. Extractor routing index (first URL classification is then cheap)
+            warm_extractor_index()
+
+            # 4. Feed polling (after the history DB: new items are checked
+            # against the download archive)
+            if self.config.get("rss_poll_enabled", True):
+                self.feed_poller.start()
+
+            # 5. Social Manager
             try:
                 # Wait briefly for main loop to be ready if needed,
                 # but we are in init so it's fine.
@@ -151,9 +233,10 @@ class AppState:
             except Exception as e:  # pylint: disable=broad-exception-caught
                 logger.debug("Social manager connection failed (non-critical): %s", e)
 
-        threading.Thread(
-            target=_background_init, daemon=True, name="AppStateInit"
-        ).start()
+        if not self.is_worker_process:
+            threading.Thread(
+                target=_background_init, daemon=True, name="AppStateInit"
+            ).start()
 
         self._initialized = True
         self._init_complete.set()
@@ -176,13 +259,63 @@ class AppState:
         except Exception as e:  # pylint: disable=broad-exception-caught
             logger.debug("Sync manager cleanup error: %s", e)
 
+        try:
+            self.feed_poller.stop()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Feed poller cleanup error: %s", e)
+
+        try:
+            if self.history_manager:
+                self.history_manager.stop_retention_worker()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("History retention cleanup error: %s", e)
+
         try:
             logger.debug("Cleaning up queue manager...")
             if self.queue_manager:
+                # Unfinished downloads keep their partial files and resume
+                # on the next start; only scheduled ones are cancelled
+                if not self.is_worker_process:
+                    save_checkpoint(self.queue_manager.suspend_all())
                 self.queue_manager.cancel_all()
         except Exception as e:  # pylint: disable=broad-exception-caught
             logger.debug("Queue manager cleanup error: %s", e)
 
+        try:
+            shutdown_extraction_pool()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Extraction pool cleanup error: %s", e)
+
+        try:
+            shutdown_postprocess_stage()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Post-processing stage cleanup error: %s", e)
+
+        try:
+            shutdown_aria2_daemon()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("aria2c daemon cleanup error: %s", e)
+
+        try:
+            shutdown_process_backend()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Process backend cleanup error: %s", e)
+
+        try:
+            close_all_enumerators()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Playlist enumerator cleanup error: %s", e)
+
+        try:
+            get_ydl_pool().clear()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("YoutubeDL pool cleanup error: %s", e)
+
+        try:
+            get_extractor_index().save()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Extractor host cache save error: %s", e)
+
         try:
             logger.debug("Saving configuration...")
             ConfigManager.save_config(self.config)
@@ -191,39 +324,30 @@ class AppState:
 
         logger.info("AppState cleanup complete")
 
+    def _restore_checkpoint(self) -> None:
+        """Re-queue the downloads checkpointed by the last cleanup."""
+        restored = 0
+        for item in load_checkpoint():
+            try:
+                self.queue_manager.add_item(item)
+                restored += 1
+            except ValueError as e:
+                logger.warning("Could not resume %s: %s", item.get("url"), e)
+        if restored:
+            logger.info("Resuming %d download(s) from the last session", restored)
+
     def get_video_info(self, url: str) -> dict[str, Any] | None:
-        """Get cached video info for URL with LRU tracking."""
-        info = self._video_info_cache.get(url)
-        if info:
-            logger.debug("Cache hit for video info: %s", url)
-            # Move to end to mark as recently used (LRU)
-            self._video_info_cache.move_to_end(url)
-        else:
-            logger.debug("Cache miss for video info: %s", url)
-        return info
+        """Get cached video info for URL (canonicalised, no network access)."""
+        return get_metadata_cache().get(url)
 
     def set_video_info(self, url: str, info: dict[str, Any]) -> None:
-        """Cache video info for URL with proper LRU eviction."""
-        # If URL already exists, remove it first so it goes to the end
-        if url in self._video_info_cache:
-            del self._video_info_cache[url]
-
-        # Evict least recently used entry if cache is full
-        if len(self._video_info_cache) >= self._video_info_max_size:
-            # Remove oldest (least recently used) entry from the beginning
-            oldest_key = next(iter(self._video_info_cache))
-            logger.debug(
-                "Evicting least recently used video info cache entry: %s", oldest_key
-            )
-            del self._video_info_cache[oldest_key]
-
-        logger.debug("Caching video info for: %s", url)
-        self._video_info_cache[url] = info
+        """Cache video info for URL in the persistent metadata cache."""
+        get_metadata_cache().put(url, info)
 
     def clear_video_info_cache(self) -> None:
-        """Clear video info cache to free memory."""
+        """Clear the metadata cache (memory and disk)."""
         logger.debug("Clearing all video info cache")
-        self._video_info_cache.clear()
+        get_metadata_cache().clear()
 
 
 state = AppState()
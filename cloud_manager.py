@@ -1,9 +1,21 @@
 """
 Cloud Manager module.
+
+Files are stored through a pluggable backend per provider: Google Drive,
+or a local folder standing in for it (offline tests and benchmarks; set
+``STREAMCATCH_CLOUD_DIR`` to use it by default). The manager remembers the
+content hash and remote file id of each upload, so unchanged files are not
+uploaded again and known files are addressed by id instead of a title query.
 """
 
+import abc
+import hashlib
+import json
 import logging
 import os
+import shutil
+import tempfile
+import threading
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -57,13 +69,97 @@ except Exception as exc:  # pylint: disable=broad-exception-caught
     _google_drive_cls = None
 
 
+UPLOAD_STATE_FILE = os.path.expanduser("~/.streamcatch/cloud_uploads.json")
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(file_path: str) -> str | None:
+    """SHA-256 of a file's content, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class CloudBackend(abc.ABC):
+    """
+    Storage for CloudManager: files addressed by name, or by the remote id
+    an earlier upload or download returned.
+    """
+
+    @abc.abstractmethod
+    def upload(self, file_path: str, name: str, file_id: str | None = None) -> str:
+        """Store file_path as name (replacing it); returns the remote id."""
+
+    @abc.abstractmethod
+    def download(
+        self, name: str, destination_path: str, file_id: str | None = None
+    ) -> str | None:
+        """Fetch name into destination_path; returns its id, None if missing."""
+
+
+class LocalFolderBackend(CloudBackend):
+    """Stores files in a local directory, in place of a cloud provider."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, os.path.basename(name))
+
+    def upload(self, file_path: str, name: str, file_id: str | None = None) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".upload_")
+        os.close(fd)
+        try:
+            shutil.copyfile(file_path, temp_path)
+            os.replace(temp_path, self._path(name))
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return os.path.basename(name)
+
+    def download(
+        self, name: str, destination_path: str, file_id: str | None = None
+    ) -> str | None:
+        source = self._path(file_id or name)
+        if not os.path.exists(source):
+            return None
+        dest_dir = os.path.dirname(destination_path)
+        if dest_dir:
+            os.makedirs(dest_dir, exist_ok=True)
+        shutil.copyfile(source, destination_path)
+        return os.path.basename(source)
+
+
+class _GoogleDriveBackend(CloudBackend):
+    """Google Drive (via PyDrive2), using the manager's authenticated client."""
+
+    def __init__(self, manager: "CloudManager"):
+        self.manager = manager
+
+    def upload(self, file_path: str, name: str, file_id: str | None = None) -> str:
+        # pylint: disable=protected-access
+        return self.manager._upload_to_google_drive(file_path, file_id)
+
+    def download(
+        self, name: str, destination_path: str, file_id: str | None = None
+    ) -> str | None:
+        # pylint: disable=protected-access
+        return self.manager._download_from_google_drive(name, destination_path, file_id)
+
+
 class CloudManager:
     """
     Manages cloud uploads and downloads.
-    Currently supports: Google Drive (via PyDrive2).
+    Currently supports: Google Drive (via PyDrive2), and a local folder.
     """
 
-    def __init__(self):
+    def __init__(self, state_file: str | None = None):
         logger.debug("Initializing CloudManager...")
         self.enabled = False
         # Use environment variable or secure path in user directory
@@ -75,14 +171,84 @@ class CloudManager:
             "GOOGLE_DRIVE_SETTINGS_PATH",
             os.path.expanduser("~/.streamcatch/settings.yaml"),
         )
+        self.backends: dict[str, CloudBackend] = {
+            "google_drive": _GoogleDriveBackend(self)
+        }
+        self.default_provider = "google_drive"
+        local_dir = os.environ.get("STREAMCATCH_CLOUD_DIR")
+        if local_dir:
+            self.register_backend("local", LocalFolderBackend(local_dir))
+            self.default_provider = "local"
+        self.state_file = state_file or UPLOAD_STATE_FILE
+        self._state_lock = threading.Lock()
+        self._state: dict[str, dict[str, str]] | None = None
+
+    def register_backend(self, provider: str, backend: CloudBackend) -> None:
+        """Make backend available as provider."""
+        self.backends[provider] = backend
+
+    def _backend(self, provider: str) -> CloudBackend | None:
+        backend = self.backends.get(provider)
+        if backend is None:
+            logger.error("Provider %s not supported.", provider)
+        return backend
+
+    # --- Upload state (content hash and remote id per file) ---
 
-    def upload_file(self, file_path: str, provider: str = "google_drive"):
+    def _loaded_state(self) -> dict[str, dict[str, str]]:
+        """The upload state, read on first use; call with _state_lock held."""
+        if self._state is None:
+            try:
+                with open(self.state_file, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            self._state = data if isinstance(data, dict) else {}
+        return self._state
+
+    def _remembered(self, provider: str, name: str) -> dict[str, str]:
+        with self._state_lock:
+            entry = self._loaded_state().get(f"{provider}:{name}")
+        return dict(entry) if isinstance(entry, dict) else {}
+
+    def _remember(self, provider: str, name: str, **values: str | None) -> None:
+        """Record an upload's id and content hash (non-str values are skipped)."""
+        with self._state_lock:
+            state = self._loaded_state()
+            entry = dict(state.get(f"{provider}:{name}") or {})
+            entry.update({k: v for k, v in values.items() if isinstance(v, str)})
+            state[f"{provider}:{name}"] = entry
+            snapshot = dict(state)
+        try:
+            directory = os.path.dirname(self.state_file) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                dir=directory, prefix=".cloud_uploads_", suffix=".json"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.state_file)
+        except OSError as e:
+            logger.warning("Failed to save cloud upload state: %s", e)
+
+    def upload_file(
+        self,
+        file_path: str,
+        provider: str | None = None,
+        name: str | None = None,
+    ) -> bool:
         """
-        Uploads a file to the specified cloud provider.
+        Uploads a file to the specified cloud provider, unless the same
+        content was the last upload of that name.
 
         Args:
             file_path: Path to the file to upload.
-            provider: Cloud provider ('google_drive').
+            provider: Cloud provider ('google_drive', 'local'); the default
+                provider if None.
+            name: Name in cloud storage (default: the file's name).
+
+        Returns:
+            True if uploaded, False if skipped as unchanged.
 
         Raises:
             FileNotFoundError: If file does not exist.
@@ -93,16 +259,28 @@ class CloudManager:
             logger.error(error_msg)
             raise FileNotFoundError(error_msg)
 
-        logger.info("Initiating upload for %s to %s", file_path, provider)
-
-        if provider == "google_drive":
-            self._upload_to_google_drive(file_path)
-        else:
-            logger.error("Provider %s not supported.", provider)
+        provider = provider or self.default_provider
+        backend = self._backend(provider)
+        if backend is None:
             raise NotImplementedError(f"Provider {provider} not supported yet.")
 
+        name = name or os.path.basename(file_path)
+        digest = file_digest(file_path)
+        remembered = self._remembered(provider, name)
+        if digest and remembered.get("sha256") == digest:
+            logger.info("Skipping upload of unchanged %s", name)
+            return False
+
+        logger.info("Initiating upload for %s to %s", file_path, provider)
+        file_id = backend.upload(file_path, name, remembered.get("id"))
+        self._remember(provider, name, id=file_id, sha256=digest)
+        return True
+
     def download_file(
-        self, filename: str, destination_path: str, provider: str = "google_drive"
+        self,
+        filename: str,
+        destination_path: str,
+        provider: str | None = None,
     ) -> bool:
         """
         Downloads a file from the cloud provider by filename (exact match).
@@ -110,17 +288,28 @@ class CloudManager:
         Args:
             filename: Name of the file in cloud storage.
             destination_path: Local path to save the file.
-            provider: Cloud provider ('google_drive').
+            provider: Cloud provider; the default provider if None.
 
         Returns:
             True if successful, False otherwise.
         """
+        provider = provider or self.default_provider
         logger.info("Initiating download for %s from %s", filename, provider)
 
-        if provider == "google_drive":
-            return self._download_from_google_drive(filename, destination_path)
-        logger.error("Provider %s not supported.", provider)
-        return False
+        backend = self._backend(provider)
+        if backend is None:
+            return False
+        remembered = self._remembered(provider, filename)
+        try:
+            file_id = backend.download(filename, destination_path, remembered.get("id"))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.error("Download of %s failed: %s", filename, e)
+            return False
+        if file_id is None:
+            return False
+        if file_id != remembered.get("id"):
+            self._remember(provider, filename, id=file_id)
+        return True
 
     def _get_google_drive_client(self):
         """Helper to authenticate and return a GoogleDrive client."""
@@ -210,13 +399,34 @@ class CloudManager:
             logger.error("Google Drive auth failed: %s", e, exc_info=True)
             raise
 
-    def _upload_to_google_drive(self, file_path: str):
-        """Upload logic for Google Drive."""
+    @staticmethod
+    def _file_id(file_drive) -> str | None:
+        try:
+            file_id = file_drive["id"]
+        except Exception:  # pylint: disable=broad-exception-caught
+            return None
+        return file_id if isinstance(file_id, str) else None
+
+    def _upload_to_google_drive(
+        self, file_path: str, file_id: str | None = None
+    ) -> str:
+        """Upload logic for Google Drive; returns the file's id."""
         try:
             drive = self._get_google_drive_client()
 
             file_name = os.path.basename(file_path)
 
+            if file_id:
+                # Known from an earlier upload: no title query needed
+                try:
+                    file_drive = drive.CreateFile({"id": file_id})  # type: ignore
+                    file_drive.SetContentFile(file_path)  # type: ignore
+                    file_drive.Upload()  # type: ignore
+                    logger.info("Successfully uploaded %s to Google Drive.", file_name)
+                    return file_id
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.info("Cached Drive id for %s is stale: %s", file_name, e)
+
             # Escape single quotes in filename to prevent query injection
             # Google Drive API uses single quotes for string literals
             escaped_name = file_name.replace("'", "\\'")
@@ -233,16 +443,36 @@ class CloudManager:
             file_drive.SetContentFile(file_path)  # type: ignore
             file_drive.Upload()  # type: ignore
             logger.info("Successfully uploaded %s to Google Drive.", file_name)
+            uploaded_id = self._file_id(file_drive)
+            if uploaded_id is None:
+                raise RuntimeError(f"Google Drive returned no id for {file_name}")
+            return uploaded_id
 
         except Exception as e:
             logger.error("Google Drive upload failed: %s", e)
             raise
 
-    def _download_from_google_drive(self, filename: str, destination_path: str) -> bool:
-        """Download logic for Google Drive."""
+    def _download_from_google_drive(
+        self, filename: str, destination_path: str, file_id: str | None = None
+    ) -> str | None:
+        """Download logic for Google Drive; returns the file's id if found."""
         try:
             drive = self._get_google_drive_client()
 
+            # Ensure destination directory exists
+            dest_dir = os.path.dirname(destination_path)
+            if dest_dir and not os.path.exists(dest_dir):
+                os.makedirs(dest_dir, exist_ok=True)
+
+            if file_id:
+                try:
+                    drive.CreateFile({"id": file_id}).GetContentFile(  # type: ignore
+                        destination_path
+                    )
+                    return file_id
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.info("Cached Drive id for %s is stale: %s", filename, e)
+
             # Search for file - escape single quotes to prevent query injection
             escaped_filename = filename.replace("'", "\\'")
             query = f"title = '{escaped_filename}' and trashed = false"
@@ -250,21 +480,16 @@ class CloudManager:
 
             if not file_list:
                 logger.warning("File '%s' not found in Google Drive.", filename)
-                return False
+                return None
 
             # Take the first match
             file_drive = file_list[0]
             logger.info("Downloading %s (ID: %s)", filename, file_drive["id"])
 
-            # Ensure destination directory exists
-            dest_dir = os.path.dirname(destination_path)
-            if dest_dir and not os.path.exists(dest_dir):
-                os.makedirs(dest_dir, exist_ok=True)
-
             file_drive.GetContentFile(destination_path)  # type: ignore
-            return True
+            return self._file_id(file_drive) or filename
 
         # pylint: disable=broad-exception-caught
         except Exception as e:
             logger.error("Google Drive download failed: %s", e)
-            return False
+            return None
@@ -9,6 +9,7 @@ Now uses keyring for secure cookie storage.
 import json
 import logging
 import os
+import re
 import tempfile
 from pathlib import Path
 from typing import Any, cast
@@ -46,6 +47,10 @@ class ConfigManager:
         "use_aria2c": False,
         "gpu_accel": "None",
         "rss_feeds": [],
+        "rss_poll_enabled": True,
+        "rss_poll_workers": 4,
+        "rss_poll_min_minutes": 10,
+        "rss_poll_max_minutes": 720,
         "proxy": "",
         "rate_limit": "",
         "max_concurrent_downloads": 3,
@@ -55,7 +60,29 @@ class ConfigManager:
         "high_contrast": False,
         "compact_mode": False,
         "metadata_cache_size": 50,
+        "metadata_cache_max_entries": 5000,
         "clipboard_monitor_enabled": False,
+        "history_retention_days": 0,
+        "history_max_entries": 0,
+        "history_prune_statuses": [],
+        "history_prune_status_days": 7,
+        # Run yt-dlp jobs in worker processes (0 workers = one per CPU core)
+        "process_backend": False,
+        "process_workers": 0,
+        "process_worker_max_jobs": 25,
+        # Concurrent ffmpeg post-processing jobs (0 = half the CPU cores)
+        "postprocess_workers": 0,
+        # Shared aria2c daemon: connections per server, total bandwidth ("10M")
+        "aria2_max_connections": 16,
+        "aria2_max_overall_limit": "",
+        # Identical finished files: "hardlink" to the first copy, "skip", "off"
+        "dedup_mode": "hardlink",
+        # Disk-space admission: free space to keep, reservation for unknown sizes
+        "disk_min_free_mb": 100,
+        "disk_unknown_size_mb": 1024,
+        # Local working directory for downloads ("" = work in download_path)
+        "staging_dir": "",
+        "staging_max_mb": 0,
     }
 
     @staticmethod
@@ -83,6 +110,7 @@ class ConfigManager:
         type_map: dict[str, type | tuple[type, ...]] = {
             "use_aria2c": bool,
             "rss_feeds": list,
+            "rss_poll_enabled": bool,
             "language": str,
             "proxy": (str, type(None)),  # Allow None but will convert/check
             "rate_limit": (str, type(None)),
@@ -91,8 +119,12 @@ class ConfigManager:
             "high_contrast": bool,
             "compact_mode": bool,
             "clipboard_monitor_enabled": bool,
+            "process_backend": bool,
+            "aria2_max_overall_limit": str,
+            "staging_dir": str,
             "output_template": str,
             "theme_mode": str,
+            "history_prune_statuses": list,
         }
 
         for key, expected_type in type_map.items():
@@ -114,10 +146,36 @@ class ConfigManager:
                     f"gpu_accel must be one of: None, auto, cuda, vulkan. Got: {val}"
                 )
 
-        if "metadata_cache_size" in config:
-            val = config["metadata_cache_size"]
-            if not isinstance(val, int) or val < 1:
-                raise ValueError("metadata_cache_size must be a positive integer")
+        for key in (
+            "metadata_cache_size",
+            "metadata_cache_max_entries",
+            "process_worker_max_jobs",
+            "disk_unknown_size_mb",
+            "rss_poll_workers",
+            "rss_poll_min_minutes",
+            "rss_poll_max_minutes",
+        ):
+            if key in config:
+                val = config[key]
+                if not isinstance(val, int) or val < 1:
+                    raise ValueError(f"{key} must be a positive integer")
+
+        if "aria2_max_connections" in config:
+            val = config["aria2_max_connections"]
+            # aria2 accepts at most 16 connections per server
+            if not isinstance(val, int) or isinstance(val, bool) or not 1 <= val <= 16:
+                raise ValueError("aria2_max_connections must be between 1 and 16")
+
+        if config.get("aria2_max_overall_limit"):
+            if not re.fullmatch(r"\d+[KM]?", config["aria2_max_overall_limit"]):
+                raise ValueError(
+                    "aria2_max_overall_limit must be a number of bytes/s, "
+                    "optionally with a K or M suffix"
+                )
+
+        if "dedup_mode" in config:
+            if config["dedup_mode"] not in ["hardlink", "skip", "off"]:
+                raise ValueError("dedup_mode must be one of: hardlink, skip, off")
 
         if "theme_mode" in config:
             val = cast(str, config["theme_mode"]).lower()
@@ -138,6 +196,20 @@ class ConfigManager:
             if not isinstance(val, int) or val < 1:
                 raise ValueError("max_concurrent_downloads must be a positive integer")
 
+        for key in (
+            "history_retention_days",
+            "history_max_entries",
+            "history_prune_status_days",
+            "process_workers",
+            "postprocess_workers",
+            "disk_min_free_mb",
+            "staging_max_mb",
+        ):
+            if key in config:
+                val = config[key]
+                if not isinstance(val, int) or isinstance(val, bool) or val < 0:
+                    raise ValueError(f"{key} must be a non-negative integer")
+
         if "auto_sync_interval" in config:
             val = config["auto_sync_interval"]
             if not isinstance(val, int | float) or val <= 0:
@@ -0,0 +1,145 @@
+"""
+Parallel chapter splitting and clip extraction.
+
+yt-dlp's chapter splitter runs one ffmpeg after another; a long video with
+dozens of chapters then takes minutes on a single core. Every cut here is a
+stream copy of the finished file (no re-encode), so cuts are cheap and
+independent and run concurrently, up to one ffmpeg per core across the
+whole process (however many files are being split at once). As with any
+stream copy, a cut starts at the keyframe at or before its start time.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Keep every stream; drop data streams ffmpeg cannot copy into most containers
+_STREAM_COPY_ARGS = ("-map", "0", "-dn", "-ignore_unknown", "-c", "copy")
+
+# Shared by every run_cuts call, so parallel post-processing jobs don't each
+# start one ffmpeg per core
+_CUT_SLOTS = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class Cut:
+    """One section of a source file to write to destination."""
+
+    start: float
+    end: float | None
+    destination: str
+
+
+def cut_command(ffmpeg: str, source: str, cut: Cut) -> list[str]:
+    """ffmpeg arguments for a stream-copied cut (input seeking, no re-encode)."""
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", "-y"]
+    if cut.start > 0:
+        cmd += ["-ss", f"{cut.start:.3f}"]
+    if cut.end is not None:
+        cmd += ["-t", f"{max(cut.end - cut.start, 0):.3f}"]
+    return [*cmd, "-i", source, *_STREAM_COPY_ARGS, cut.destination]
+
+
+def chapter_cuts(
+    chapters: list[dict[str, Any]],
+    naming: Callable[[int, dict[str, Any]], str],
+) -> list[Cut]:
+    """
+    One cut per chapter (numbered from 1). naming(number, chapter) gives the
+    destination; each chapter's "filepath" is set to it, as yt-dlp does.
+    """
+    cuts: list[Cut] = []
+    for number, chapter in enumerate(chapters, start=1):
+        start = chapter.get("start_time")
+        if not isinstance(start, int | float):
+            continue
+        end = chapter.get("end_time")
+        destination = naming(number, chapter)
+        chapter["filepath"] = destination
+        cuts.append(
+            Cut(
+                float(start),
+                float(end) if isinstance(end, int | float) else None,
+                destination,
+            )
+        )
+    return cuts
+
+
+def run_cuts(
+    source: str,
+    cuts: list[Cut],
+    max_workers: int | None = None,
+    cancel_token: Any | None = None,
+    ffmpeg: str | None = None,
+) -> list[str]:
+    """
+    Write all cuts from source concurrently (at most max_workers ffmpeg
+    processes, default one per core, and never more than one per core across
+    all callers). Returns the destinations in order.
+
+    Raises:
+        RuntimeError: If ffmpeg is missing or a cut fails.
+        InterruptedError: If cancel_token is cancelled before all cuts start.
+    """
+    if not cuts:
+        return []
+    ffmpeg = ffmpeg or shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("FFmpeg is required to cut media")
+
+    def _cut(cut: Cut) -> str:
+        with _CUT_SLOTS:
+            return _write(cut)
+
+    def _write(cut: Cut) -> str:
+        if cancel_token is not None:
+            cancel_token.check()
+        parent = os.path.dirname(cut.destination)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        proc = subprocess.run(
+            cut_command(ffmpeg, source, cut),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            detail = (proc.stderr or "").strip().splitlines()[-1:] or ["no output"]
+            raise RuntimeError(
+                f"ffmpeg failed to cut {os.path.basename(cut.destination)}: "
+                f"{detail[0]}"
+            )
+        return cut.destination
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(cuts)))
+    logger.info("Cutting %d sections from %s (%d at once)", len(cuts), source, workers)
+    # Threads inherit the caller's (post-processing) CPU and I/O priority
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Cut") as pool:
+        return list(pool.map(_cut, cuts))
+
+
+def extract_clip(
+    filepath: str,
+    start: float,
+    end: float | None,
+    cancel_token: Any | None = None,
+) -> str:
+    """Trim filepath in place to [start, end) with a stream copy."""
+    stem, ext = os.path.splitext(filepath)
+    partial = f"{stem}.clip{ext}"
+    try:
+        run_cuts(filepath, [Cut(start, end, partial)], cancel_token=cancel_token)
+        os.replace(partial, filepath)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return filepath
@@ -0,0 +1,104 @@
+"""
+Download checkpoints across restarts.
+
+On a graceful shutdown the queue suspends its unfinished items instead of
+cancelling them: running jobs stop without deleting their partial files
+(yt-dlp ``.part``/``.ytdl`` files and fragments, aria2 control files, the
+generic engine's partial file, a job's staging directory). The items are
+written here together with each job's last progress checkpoint (engine,
+resolved URL, bytes or fragments done, output paths) and re-queued on the
+next start, where every engine continues from the files it finds.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = os.path.expanduser("~/.streamcatch/checkpoint.json")
+CHECKPOINT_VERSION = 1
+
+# Progress-hook fields worth keeping to report (and check) a resume
+_PROGRESS_KEYS = (
+    "filename",
+    "tmpfilename",
+    "downloaded_bytes",
+    "total_bytes",
+    "fragment_index",
+    "fragment_count",
+)
+
+
+def progress_checkpoint(d: dict[str, Any]) -> dict[str, Any]:
+    """A job's resume state from one "downloading" progress-hook dict."""
+    info = d.get("info_dict")
+    info = info if isinstance(info, dict) else {}
+    checkpoint: dict[str, Any] = {
+        # Only yt-dlp passes its info dict along
+        "engine": d.get("engine") or ("yt-dlp" if info else "generic"),
+        "url": d.get("url") or info.get("url"),
+    }
+    total = d.get("total_bytes") or d.get("total_bytes_estimate")
+    for key in _PROGRESS_KEYS:
+        value = total if key == "total_bytes" else d.get(key)
+        if isinstance(value, str | int | float) and not isinstance(value, bool):
+            checkpoint[key] = value
+    return checkpoint
+
+
+def save_checkpoint(items: list[dict[str, Any]], path: str | None = None) -> bool:
+    """Atomically write the suspended items; True if any were written."""
+    path = path or CHECKPOINT_FILE
+    if not items:
+        clear_checkpoint(path)
+        return False
+    try:
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(
+            dir=directory, prefix=".checkpoint_", suffix=".json"
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": CHECKPOINT_VERSION, "items": items}, f, default=str)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning("Failed to save download checkpoint: %s", e)
+        return False
+    logger.info("Checkpointed %d unfinished download(s)", len(items))
+    return True
+
+
+def load_checkpoint(path: str | None = None) -> list[dict[str, Any]]:
+    """
+    Items suspended at the last shutdown. The file is removed, so a crash
+    while they run again does not queue them twice.
+    """
+    path = path or CHECKPOINT_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable download checkpoint: %s", e)
+        data = None
+    clear_checkpoint(path)
+    if not isinstance(data, dict) or data.get("version") != CHECKPOINT_VERSION:
+        return []
+    items = data.get("items")
+    if not isinstance(items, list):
+        return []
+    return [i for i in items if isinstance(i, dict) and i.get("url")]
+
+
+def clear_checkpoint(path: str | None = None) -> None:
+    """Remove the checkpoint file if there is one."""
+    try:
+        os.remove(path or CHECKPOINT_FILE)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("Could not remove download checkpoint: %s", e)
@@ -0,0 +1,164 @@
+"""
+Session-level browser cookie cache.
+
+yt-dlp re-opens and decrypts the browser cookie database for every
+YoutubeDL instance created with ``cookiesfrombrowser``. This module extracts
+cookies once per (browser, profile) into a shared in-memory jar and only
+re-extracts when the browser's cookie store changes on disk (or, when its
+location cannot be determined, after a TTL). Refreshes update the shared jar
+in place so instances already holding it see the new cookies.
+"""
+
+import glob
+import logging
+import os
+import threading
+import time
+from typing import Any
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+COOKIE_TTL_SECONDS = 1800
+
+
+class _Entry:
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("jar", "mtime", "loaded_at", "paths")
+
+    def __init__(self, jar: Any, mtime: float | None, paths: list[str]):
+        self.jar = jar
+        self.mtime = mtime
+        self.loaded_at = time.monotonic()
+        self.paths = paths
+
+
+def _cookie_store_paths(browser: str, profile: str | None) -> list[str]:
+    """Best-effort location of the browser's cookie database files."""
+    # pylint: disable=protected-access
+    cookies_module = yt_dlp.cookies
+    try:
+        if profile and os.path.isdir(os.path.expanduser(profile)):
+            roots = [os.path.expanduser(profile)]
+        elif browser == "firefox":
+            roots = list(cookies_module._firefox_browser_dirs())
+        elif browser == "safari":
+            return [
+                path
+                for path in (
+                    os.path.expanduser("~/Library/Cookies/Cookies.binarycookies"),
+                    os.path.expanduser(
+                        "~/Library/Containers/com.apple.Safari/Data/Library/"
+                        "Cookies/Cookies.binarycookies"
+                    ),
+                )
+                if os.path.exists(path)
+            ]
+        else:
+            settings = cookies_module._get_chromium_based_browser_settings(browser)
+            roots = [settings["browser_dir"]]
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.debug("Cannot locate %s cookie store: %s", browser, e)
+        return []
+
+    patterns = ("cookies.sqlite", "Cookies", os.path.join("Network", "Cookies"))
+    paths: list[str] = []
+    for root in roots:
+        for pattern in patterns:
+            paths.extend(glob.glob(os.path.join(glob.escape(root), pattern)))
+            paths.extend(glob.glob(os.path.join(glob.escape(root), "*", pattern)))
+    return sorted(set(paths))
+
+
+def _store_mtime(paths: list[str]) -> float | None:
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except OSError:
+            continue
+    return max(mtimes) if mtimes else None
+
+
+class BrowserCookieCache:
+    """Shared cookie jars keyed by (browser, profile)."""
+
+    def __init__(self, ttl: float = COOKIE_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str | None], _Entry] = {}
+        self._key_locks: dict[tuple[str, str | None], threading.Lock] = {}
+        self._stats = {"hits": 0, "extractions": 0, "failures": 0}
+
+    def _stale(self, entry: _Entry) -> bool:
+        mtime = _store_mtime(entry.paths)
+        if mtime is not None and entry.mtime is not None:
+            return mtime != entry.mtime
+        return time.monotonic() - entry.loaded_at > self.ttl
+
+    def get_jar(self, browser: str, profile: str | None = None) -> Any | None:
+        """
+        Return the shared cookie jar for browser/profile, extracting it on
+        first use or when the store changed. Returns None if extraction fails.
+        """
+        key = (browser, profile)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # One extraction per browser at a time; other jobs wait and share it
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and not self._stale(entry):
+                with self._lock:
+                    self._stats["hits"] += 1
+                return entry.jar
+
+            paths = entry.paths if entry else _cookie_store_paths(browser, profile)
+            mtime = _store_mtime(paths)
+            started = time.perf_counter()
+            try:
+                fresh = yt_dlp.cookies.extract_cookies_from_browser(browser, profile)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.warning("Failed to extract %s cookies: %s", browser, e)
+                with self._lock:
+                    self._stats["failures"] += 1
+                return entry.jar if entry else None
+
+            logger.info(
+                "Extracted %s cookies in %.2fs", browser, time.perf_counter() - started
+            )
+            with self._lock:
+                self._stats["extractions"] += 1
+                if entry is None:
+                    self._entries[key] = _Entry(fresh, mtime, paths)
+                    return fresh
+                # Refresh in place so YoutubeDL instances holding the jar see it
+                entry.jar.clear()
+                for cookie in fresh:
+                    entry.jar.set_cookie(cookie)
+                entry.mtime = mtime
+                entry.loaded_at = time.monotonic()
+                return entry.jar
+
+    def invalidate(self, browser: str | None = None) -> None:
+        """Force re-extraction for one browser (or all) on next use."""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if browser is None or key[0] == browser:
+                    entry.mtime = None
+                    entry.loaded_at = float("-inf")
+
+    def stats(self) -> dict[str, int]:
+        """Hit/extraction counters."""
+        with self._lock:
+            return {**self._stats, "browsers": len(self._entries)}
+
+
+_CACHE = BrowserCookieCache()
+
+
+def get_cookie_cache() -> BrowserCookieCache:
+    """Return the process-wide browser cookie cache."""
+    return _CACHE
@@ -5,19 +5,32 @@ Wraps yt-dlp to provide high-level download operations,
 including format selection, cancellation, and progress reporting.
 """
 
+import dataclasses
 import logging
 import os
 import re
 import shutil
 import tempfile
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
 import yt_dlp
 
+from downloader.chapters import extract_clip
+from downloader.dedup import hash_file
+from downloader.disk_ledger import get_disk_ledger
+from downloader.engines.aria2 import (
+    Aria2Downloader,
+    Aria2Error,
+    aria2_settings,
+    get_aria2_daemon,
+)
 from downloader.engines.generic import GenericDownloader
 from downloader.engines.ytdlp import YTDLPWrapper
 from downloader.extractors.telegram import TelegramExtractor
+from downloader.process_pool import get_process_backend
+from downloader.staging import get_staging_area
 from downloader.types import DownloadOptions
 
 logger = logging.getLogger(__name__)
@@ -55,19 +68,13 @@ def _sanitize_output_path(output_path: str) -> str:
         return tempfile.gettempdir()
 
 
-def _check_disk_space(output_path: str, min_mb: int = 100) -> bool:
-    """Check if there is sufficient disk space."""
-    try:
-        usage = shutil.disk_usage(output_path)
-        free_mb = usage.free / (1024 * 1024)
-        if free_mb < min_mb:
-            logger.warning("Low disk space: %.2f MB free", free_mb)
-            # We don't block, but we log loud
-            return False
-        return True
-    except (OSError, ValueError) as e:
-        logger.error("Failed to check disk space: %s", e)
-        return True  # Assume ok if check fails
+def _check_disk_space(output_path: str, reservation: str | None = None) -> bool:
+    """
+    Check that the volume keeps its minimum free space after the space other
+    jobs have reserved (the queue reserves this job's own share, if any,
+    under the reservation key before it starts).
+    """
+    return get_disk_ledger().has_room(output_path, exclude=reservation)
 
 
 def _resolve_output_template(output_path: str, output_template: str) -> str:
@@ -260,11 +267,23 @@ def _configure_advanced_options(
             [], [(start_sec, end_sec)]  # type: ignore[arg-type,list-item]
         )
 
-    # Aria2c
+    # Aria2c: yt-dlp runs its own aria2c per download (fragments and merging
+    # are its job), outside the shared daemon; it gets the configured
+    # per-server limits, and the overall limit caps each download on its own
     if options.use_aria2c:
         if shutil.which("aria2c"):
+            settings = aria2_settings()
             ydl_opts["external_downloader"] = "aria2c"
-            ydl_opts["external_downloader_args"] = ["-x", "16", "-k", "1M", "-s", "16"]
+            ydl_opts["external_downloader_args"] = [
+                "-x",
+                str(settings.max_connections_per_server),
+                "-k",
+                settings.min_split_size,
+                "-s",
+                str(settings.split),
+                "--max-overall-download-limit",
+                settings.max_overall_download_limit or "0",
+            ]
         else:
             logger.warning("Aria2c enabled but not found.")
 
@@ -282,6 +301,76 @@ def _configure_advanced_options(
         ydl_opts["cookiesfrombrowser"] = (options.cookies_from_browser, None)
 
 
+def _is_head_result(info: dict[str, Any] | None) -> bool:
+    """True for a GenericExtractor HEAD result (as opposed to a yt-dlp info dict)."""
+    return (
+        isinstance(info, dict) and "final_url" in info and "extractor_key" not in info
+    )
+
+
+def _reusable_ytdlp_info(
+    info: dict[str, Any] | None, options: DownloadOptions
+) -> dict[str, Any] | None:
+    """Return a prefetched single-video yt-dlp info dict if it fits this job."""
+    if not info or _is_head_result(info) or options.playlist:
+        return None
+    if info.get("_type", "video") != "video":
+        return None
+    if not info.get("formats") and not info.get("url"):
+        return None
+    return info
+
+
+def _apply_time_range(
+    result: dict[str, Any], options: DownloadOptions
+) -> dict[str, Any]:
+    """
+    Trim a directly downloaded file to start_time/end_time. yt-dlp fetches
+    only the requested range itself; the direct and Telegram paths download
+    the whole file, which is then cut with a stream copy (no re-encode).
+    """
+    filepath = result.get("filepath")
+    if not (options.start_time or options.end_time) or not filepath:
+        return result
+    if not shutil.which("ffmpeg"):
+        logger.warning("FFmpeg not available - keeping the full file %s", filepath)
+        return result
+
+    start = options.get_seconds(options.start_time) if options.start_time else 0.0
+    end = options.get_seconds(options.end_time) if options.end_time else None
+    extract_clip(filepath, start, end, cancel_token=options.cancel_token)
+    try:
+        result["size"] = os.path.getsize(filepath)
+    except OSError:
+        pass
+    result["content_hash"] = hash_file(filepath)
+    return result
+
+
+def _download_direct(
+    options: DownloadOptions, output_path: str, head: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Direct file download: the shared aria2c daemon if enabled, else requests."""
+    if options.use_aria2c and get_aria2_daemon() is not None:
+        try:
+            logger.info("Using aria2c daemon for: %s", options.url)
+            return dict(Aria2Downloader.download(options, output_path))
+        except Aria2Error as e:
+            if getattr(options.cancel_token, "cancelled", False):
+                raise
+            logger.warning("aria2c download failed (%s), retrying without it", e)
+    return dict(
+        GenericDownloader.download(
+            options.url,
+            output_path,
+            options.progress_hook,
+            options.cancel_token,
+            filename=options.filename,
+            head=head,
+        )
+    )
+
+
 def download_video(options: DownloadOptions) -> dict[str, Any]:
     """
     Downloads a video/audio from the given URL using yt-dlp or generic fallback.
@@ -290,7 +379,9 @@ def download_video(options: DownloadOptions) -> dict[str, Any]:
         options: A DownloadOptions object containing all parameters.
 
     Returns:
-        Dict containing download status and metadata.
+        Dict containing download status and metadata. A result handed to the
+        post-processing stage carries its staging directory (StagedJob) under
+        "staging"; its files are published once post-processing is done.
 
     Raises:
         ValueError: If validation fails.
@@ -316,29 +407,101 @@ def download_video(options: DownloadOptions) -> dict[str, Any]:
             logger.error("Failed to create output directory: %s", e)
             raise ValueError(f"Invalid output directory: {e}") from e
 
-    if not _check_disk_space(output_path):
+    item_id = (options.download_item or {}).get("id")
+    if not _check_disk_space(output_path, str(item_id) if item_id else None):
         raise OSError("Not enough disk space on the target device.")
 
+    prefetched = (
+        options.prefetched_info if isinstance(options.prefetched_info, dict) else None
+    )
+
+    # 3. Work in the local staging area when one is configured and has room
+    staging = get_staging_area()
+    staged = (
+        staging.acquire(output_path, prefetched, str(item_id) if item_id else None)
+        if staging
+        else None
+    )
+    if staged is None:
+        return _run_engine(options, output_path, prefetched)
+    logger.info("Staging download in %s", staged.directory)
+    try:
+        result = _run_engine(options, staged.directory, prefetched)
+        if "postprocess" in result:
+            # Published by the caller once the post-processing stage is done
+            result["staging"] = staged
+            return result
+        return staged.publish(result)
+    except BaseException:
+        staged.abandon(options.cancel_token)
+        raise
+
+
+def _run_engine(
+    options: DownloadOptions, output_path: str, prefetched: dict[str, Any] | None
+) -> dict[str, Any]:
+    """
+    _download_to, in a worker process when the process backend is enabled.
+    Disk reservations and staging stay with this process.
+    """
+    backend = get_process_backend()
+    if backend is None:
+        return _download_to(options, output_path, prefetched)
+    # Hooks, tokens and UI references stay here; the worker gets a pipe
+    logger.info("Running download in worker process: %s", options.url)
+    return backend.run(
+        _download_in_worker,
+        (
+            dataclasses.replace(
+                options,
+                progress_hook=None,
+                cancel_token=None,
+                download_item=None,
+                # Post-processing stays in the worker (the job is not picklable)
+                defer_postprocessing=False,
+            ),
+            output_path,
+            prefetched,
+        ),
+        progress_hook=options.progress_hook,
+        cancel_token=options.cancel_token,
+    )
+
+
+def _download_in_worker(
+    payload: tuple[DownloadOptions, str, dict[str, Any] | None],
+    progress_hook: Callable[[dict[str, Any]], None],
+    cancel_token: Any,
+) -> dict[str, Any]:
+    """Process-backend job: _download_to with the worker's pipe-backed hooks."""
+    options, output_path, prefetched = payload
+    options = dataclasses.replace(
+        options, progress_hook=progress_hook, cancel_token=cancel_token
+    )
+    return _download_to(options, output_path, prefetched)
+
+
+def _download_to(
+    options: DownloadOptions, output_path: str, prefetched: dict[str, Any] | None
+) -> dict[str, Any]:
+    """Run the matching engine with output_path as the working directory."""
     # 3a. Check for Telegram
     if TelegramExtractor.is_telegram_url(options.url):
         logger.info("Using TelegramExtractor for: %s", options.url)
-        return TelegramExtractor.extract(
-            options.url, output_path, options.progress_hook, options.cancel_token
+        return _apply_time_range(
+            TelegramExtractor.extract(
+                options.url, output_path, options.progress_hook, options.cancel_token
+            ),
+            options,
         )
 
     # 3b. Check for Generic Fallback
     if options.force_generic or not YTDLPWrapper.supports(options.url):
         logger.info("Using GenericDownloader (force=%s)", options.force_generic)
-        # Explicit cast to dict to satisfy return type check if needed
-        return dict(
-            GenericDownloader.download(
-                options.url,
-                output_path,
-                options.progress_hook,
-                options.cancel_token,
-                filename=options.filename,
-            )
+        result = _download_direct(
+            options, output_path, prefetched if _is_head_result(prefetched) else None
         )
+        return _apply_time_range(result, options)
 
     # 4. Configure yt-dlp options
     outtmpl_path = _resolve_output_template(output_path, options.output_template)
@@ -382,6 +545,8 @@ def download_video(options: DownloadOptions) -> dict[str, Any]:
             options.cancel_token,
             download_item=options.download_item,
             output_path=output_path,
+            info=_reusable_ytdlp_info(prefetched, options),
+            defer_postprocessing=options.defer_postprocessing,
         )
     except Exception as e:
         logger.error("yt-dlp download failed: %s", e)
@@ -0,0 +1,132 @@
+"""
+Content hashing and duplicate files.
+
+The generic engine hashes bytes as it writes them; yt-dlp downloads are
+hashed once their final file exists (merging and postprocessors rewrite it
+anyway). The digest is stored with the history entry, so a new file whose
+digest matches one already on disk is replaced by a hardlink to it or
+dropped, depending on the dedup mode.
+"""
+
+import errno
+import hashlib
+import logging
+import os
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+HASH_ALGORITHM = "sha256"
+DEDUP_MODES = ("hardlink", "skip", "off")
+_READ_SIZE = 1024 * 1024
+
+
+class ContentHasher:
+    """Running digest of the bytes written to a file."""
+
+    def __init__(self) -> None:
+        self._digest = hashlib.new(HASH_ALGORITHM)
+        self.size = 0
+
+    @classmethod
+    def from_file(cls, path: str, limit: int | None = None) -> "ContentHasher":
+        """Digest of the first limit bytes of path (all of it by default)."""
+        hasher = cls()
+        remaining = limit
+        with open(path, "rb") as f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(
+                    _READ_SIZE if remaining is None else min(_READ_SIZE, remaining)
+                )
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+        return hasher
+
+    def update(self, chunk: bytes) -> None:
+        """Add the next chunk of the file."""
+        self._digest.update(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self) -> str:
+        """Hex digest of everything added so far."""
+        return self._digest.hexdigest()
+
+
+def hash_file(path: str | None) -> str | None:
+    """Content digest of an existing file, or None if it cannot be read."""
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        return ContentHasher.from_file(path).hexdigest()
+    except OSError as e:
+        logger.warning("Could not hash %s: %s", path, e)
+        return None
+
+
+def link_duplicate(path: str, existing: str) -> bool:
+    """
+    Replace path with a hardlink to existing (same content). Returns False,
+    leaving path alone, where hardlinks are impossible (e.g. across volumes).
+    """
+    staged = f"{path}.dedup"
+    try:
+        os.link(existing, staged)
+        os.replace(staged, path)
+        return True
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            logger.warning("Could not hardlink %s to %s: %s", path, existing, e)
+        else:
+            logger.debug("Hardlinks unavailable for %s: %s", path, e)
+        if os.path.lexists(staged):
+            os.remove(staged)
+        return False
+
+
+def deduplicate(
+    result: dict[str, Any],
+    find_existing: Callable[[str, str], str | None],
+    mode: str = "hardlink",
+) -> dict[str, Any]:
+    """
+    Apply mode to a finished download result carrying a "content_hash".
+
+    find_existing(digest, filepath) returns another file on disk with that
+    digest, if any. With "hardlink" the new file becomes a link to it; with
+    "skip" the new file is deleted and the result points at the existing
+    one. Either way the result gains "duplicate_of".
+    """
+    digest = result.get("content_hash")
+    filepath = result.get("filepath")
+    if mode not in ("hardlink", "skip") or not digest or not filepath:
+        return result
+    try:
+        existing = find_existing(digest, filepath)
+        if (
+            not existing
+            or os.path.samefile(existing, filepath)
+            or os.path.getsize(existing) != os.path.getsize(filepath)
+        ):
+            return result
+    except OSError:
+        return result
+
+    if mode == "skip":
+        try:
+            os.remove(filepath)
+        except OSError as e:
+            logger.warning("Could not remove duplicate %s: %s", filepath, e)
+            return result
+        logger.info("Duplicate of %s skipped: %s", existing, filepath)
+        result["filepath"] = existing
+        result["filename"] = os.path.basename(existing)
+    elif link_duplicate(filepath, existing):
+        logger.info("Duplicate of %s hardlinked: %s", existing, filepath)
+    else:
+        return result
+    result["duplicate_of"] = existing
+    return result
@@ -0,0 +1,217 @@
+"""
+Disk-space reservations per output volume.
+
+A queued download reserves its expected size on the volume it writes to
+before it may start: the metadata filesize (or HEAD content-length), plus
+room for separately downloaded streams that sit next to the merged file,
+or a configurable estimate when the size is unknown. Jobs are admitted
+only while the volume's free space covers every outstanding reservation,
+so concurrent downloads cannot together run the disk full halfway through.
+Bytes a running job has already written count against its reservation
+(they are no longer free), and the reservation is released when the job,
+including its post-processing, is done.
+"""
+
+import errno
+import logging
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+from ui_utils import format_file_size
+
+logger = logging.getLogger(__name__)
+
+MIB = 1024 * 1024
+DEFAULT_MIN_FREE_BYTES = 100 * MIB
+DEFAULT_UNKNOWN_SIZE_BYTES = 1024 * MIB
+# Separately downloaded video and audio stay on disk until the merge is done
+MERGE_OVERHEAD = 1.0
+
+
+def _existing_ancestor(path: str) -> str:
+    current = os.path.abspath(path)
+    while not os.path.exists(current):
+        parent = os.path.dirname(current)
+        if parent == current:
+            break
+        current = parent
+    return current
+
+
+def volume_of(path: str) -> int | None:
+    """Device id of the volume path is (or would be) on."""
+    try:
+        return os.stat(_existing_ancestor(path)).st_dev
+    except OSError:
+        return None
+
+
+def _free_bytes(path: str) -> int | None:
+    try:
+        return shutil.disk_usage(_existing_ancestor(path)).free
+    except (OSError, ValueError) as e:
+        logger.error("Failed to check disk space: %s", e)
+        return None
+
+
+def _size_of(entry: dict[str, Any]) -> int | None:
+    for key in ("filesize", "filesize_approx"):
+        try:
+            size = int(entry.get(key) or 0)  # content-length arrives as text
+        except (TypeError, ValueError):
+            continue
+        if size > 0:
+            return size
+    return None
+
+
+def expected_size(info: dict[str, Any] | None) -> tuple[int | None, bool]:
+    """
+    Expected download size from a yt-dlp info dict or a HEAD result, and
+    whether it is several streams that get merged.
+    """
+    if not isinstance(info, dict):
+        return None, False
+    requested = info.get("requested_formats")
+    if isinstance(requested, list) and requested:
+        sizes = [_size_of(f) for f in requested if isinstance(f, dict)]
+        if sizes and None not in sizes:
+            return sum(s for s in sizes if s), len(sizes) > 1
+    return _size_of(info), False
+
+
+@dataclass
+class Reservation:
+    """Space held on one volume for one job."""
+
+    volume: int | None
+    nbytes: int
+    # Bytes written so far, per file (yt-dlp reports each stream separately)
+    written: dict[str, int] = field(default_factory=dict)
+
+    def outstanding(self) -> int:
+        """Reserved bytes not yet on disk."""
+        return max(0, self.nbytes - sum(self.written.values()))
+
+
+class DiskLedger:
+    """Thread-safe ledger of outstanding reservations, keyed by job."""
+
+    def __init__(
+        self,
+        min_free_bytes: int = DEFAULT_MIN_FREE_BYTES,
+        unknown_size_bytes: int = DEFAULT_UNKNOWN_SIZE_BYTES,
+    ):
+        self.min_free_bytes = min_free_bytes
+        self.unknown_size_bytes = unknown_size_bytes
+        self._lock = threading.Lock()
+        self._reservations: dict[str, Reservation] = {}
+
+    def estimate(self, info: dict[str, Any] | None) -> tuple[int, bool]:
+        """Bytes to reserve for a job, and whether the size is known."""
+        size, merged = expected_size(info)
+        if size is None:
+            return self.unknown_size_bytes, False
+        return (int(size * (1 + MERGE_OVERHEAD)) if merged else size), True
+
+    def _outstanding(self, volume: int | None, exclude: str | None = None) -> int:
+        return sum(
+            r.outstanding()
+            for key, r in self._reservations.items()
+            if r.volume == volume and key != exclude
+        )
+
+    def reserve(self, key: str, path: str, info: dict[str, Any] | None = None) -> bool:
+        """
+        Reserve space for job key writing below path. Returns False if the
+        job has to wait for other jobs on the volume to finish.
+
+        Raises:
+            OSError: If the job cannot fit even with the volume otherwise idle.
+        """
+        nbytes, known = self.estimate(info)
+        volume = volume_of(path)
+        free = _free_bytes(path)
+        with self._lock:
+            if key in self._reservations:
+                return True
+            if volume is not None and free is not None:
+                others = self._outstanding(volume)
+                available = free - self.min_free_bytes - others
+                if nbytes > available:
+                    if others:
+                        return False
+                    # An estimate only needs the minimum free space to start
+                    if known or available < 0:
+                        raise OSError(
+                            errno.ENOSPC,
+                            "Not enough disk space on the target device: "
+                            f"{format_file_size(nbytes)} needed, "
+                            f"{format_file_size(max(0, available))} available",
+                        )
+            self._reservations[key] = Reservation(volume, nbytes)
+        logger.debug("Reserved %s for %s", format_file_size(nbytes), key)
+        return True
+
+    def record_progress(self, key: str, name: str | None, nbytes: Any) -> None:
+        """Note how much of a job's file name has been written so far."""
+        if not isinstance(nbytes, int | float):
+            return
+        with self._lock:
+            reservation = self._reservations.get(key)
+            if reservation is not None:
+                reservation.written[name or ""] = int(nbytes)
+
+    def release(self, key: str) -> bool:
+        """Drop a job's reservation; True if it held one."""
+        with self._lock:
+            return self._reservations.pop(key, None) is not None
+
+    def has_room(self, path: str, exclude: str | None = None) -> bool:
+        """
+        Whether the volume still has its minimum free space once the other
+        jobs' outstanding reservations are counted.
+        """
+        free = _free_bytes(path)
+        if free is None:
+            return True  # assume ok if the check fails
+        volume = volume_of(path)
+        with self._lock:
+            others = self._outstanding(volume, exclude=exclude)
+        if free - others < self.min_free_bytes:
+            logger.warning(
+                "Low disk space: %s free, %s reserved",
+                format_file_size(free),
+                format_file_size(others),
+            )
+            return False
+        return True
+
+    def reserved(self, path: str) -> int:
+        """Outstanding reserved bytes on path's volume."""
+        volume = volume_of(path)
+        with self._lock:
+            return self._outstanding(volume)
+
+
+_LEDGER = DiskLedger()
+
+
+def get_disk_ledger() -> DiskLedger:
+    """The process-wide reservation ledger."""
+    return _LEDGER
+
+
+def configure_disk_ledger(
+    min_free_bytes: int | None = None, unknown_size_bytes: int | None = None
+) -> DiskLedger:
+    """Apply the free-space floor and the estimate used for unknown sizes."""
+    ledger = get_disk_ledger()
+    if min_free_bytes is not None:
+        ledger.min_free_bytes = min_free_bytes
+    if unknown_size_bytes is not None:
+        ledger.unknown_size_bytes = unknown_size_bytes
+    return ledger
@@ -0,0 +1,287 @@
+"""
+Extractor routing index for yt-dlp URL support checks.
+
+Instead of instantiating every extractor for each unknown URL, extractor
+classes are loaded once and indexed by the domain labels found in their
+``_VALID_URL`` patterns. A URL is first checked against extractors that have
+matched its host before (persisted across restarts), then against the
+domain-narrowed candidates. Only a host seen for the first time is also
+checked against the remaining extractors; the host cache records the
+outcome, including that no extractor matched, so later URLs on a known
+host (e.g. direct files on an unknown site) skip that full scan.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlparse
+
+import yt_dlp
+
+logger = logging.getLogger(__name__)
+
+HOST_CACHE_FILE = os.path.expanduser("~/.streamcatch/extractor_hosts.json")
+MAX_HOSTS = 2000
+MAX_EXTRACTORS_PER_HOST = 4
+URL_CACHE_SIZE = 1024
+SAVE_EVERY = 25
+
+# Labels that appear in most patterns and would not narrow anything
+_COMMON_LABELS = {"www", "m", "com", "net", "org", "tv", "co", "uk", "de", "fr"}
+_LABEL_RE = re.compile(r"([a-z0-9][a-z0-9-]*)\\\.")
+_GROUP_RE = re.compile(r"\(\?:([a-z0-9|\-\\.]+)\)\\\.")
+_GENERIC_NAMES = ("generic", "Generic")
+
+
+def _pattern_labels(pattern: str) -> set[str]:
+    """Domain labels literally present in a _VALID_URL pattern."""
+    pattern = pattern.lower()
+    labels = set(_LABEL_RE.findall(pattern))
+    for group in _GROUP_RE.findall(pattern):
+        for alternative in group.split("|"):
+            alternative = alternative.replace("\\.", ".").strip(".")
+            if alternative:
+                labels.add(alternative.rsplit(".", 1)[-1])
+    return labels - _COMMON_LABELS
+
+
+def _url_host(url: str) -> str:
+    try:
+        host = (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class ExtractorIndex:
+    """
+    Domain-narrowed routing over yt-dlp extractor classes with a bounded,
+    persisted host cache and an in-memory per-URL result cache.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, cache_file: str | None = None, max_hosts: int = MAX_HOSTS):
+        self.cache_file = cache_file or HOST_CACHE_FILE
+        self.max_hosts = max_hosts
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._classes: list[Any] | None = None
+        self._by_key: dict[str, Any] = {}
+        self._by_label: dict[str, list[int]] = {}
+        self._unindexed: list[int] = []
+        self._hosts: OrderedDict[str, list[str]] = OrderedDict()
+        self._urls: OrderedDict[str, bool] = OrderedDict()
+        self._dirty = 0
+        self._loaded = False
+        self._stats: dict[str, Any] = {
+            "build_seconds": None,
+            "first_classification_seconds": None,
+            "host_hits": 0,
+            "narrowed_hits": 0,
+            "full_scans": 0,
+            "known_host_misses": 0,
+            "url_hits": 0,
+        }
+
+    def build(self) -> None:
+        """Load extractor classes and build the label index (once)."""
+        with self._build_lock:
+            if self._classes is not None:
+                return
+            started = time.perf_counter()
+            classes = list(yt_dlp.extractor.gen_extractor_classes())
+            by_label: dict[str, list[int]] = {}
+            unindexed: list[int] = []
+            for position, ie in enumerate(classes):
+                valid = getattr(ie, "_VALID_URL", None)
+                patterns = valid if isinstance(valid, list | tuple) else [valid]
+                labels: set[str] = set()
+                for pattern in patterns:
+                    if isinstance(pattern, str):
+                        labels |= _pattern_labels(pattern)
+                if not labels:
+                    unindexed.append(position)
+                for label in labels:
+                    by_label.setdefault(label, []).append(position)
+
+            with self._lock:
+                self._by_key = {ie.ie_key(): ie for ie in classes}
+                self._by_label = by_label
+                self._unindexed = unindexed
+                self._classes = classes
+                self._stats["build_seconds"] = time.perf_counter() - started
+            logger.info(
+                "Extractor index built: %d extractors, %d labels in %.3fs",
+                len(classes),
+                len(by_label),
+                self._stats["build_seconds"],
+            )
+
+    def warm(self) -> None:
+        """Build the index, load the host cache and precompile URL patterns."""
+        self.load()
+        self.build()
+        for ie in self._classes or []:
+            try:
+                ie.suitable("https://warmup.invalid/")
+            except Exception:  # pylint: disable=broad-exception-caught
+                continue
+
+    def _candidates(self, host: str) -> list[int]:
+        positions = set(self._unindexed)
+        for label in host.split("."):
+            positions.update(self._by_label.get(label, ()))
+        return sorted(positions)
+
+    @staticmethod
+    def _suitable(ie: Any, url: str) -> bool:
+        if ie.IE_NAME in _GENERIC_NAMES:
+            return False
+        try:
+            return bool(ie.suitable(url))
+        except Exception:  # pylint: disable=broad-exception-caught
+            return False
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _match(self, url: str, host: str) -> tuple[str | None, bool]:
+        """
+        Return the ie_key of the first specific extractor suitable for url
+        (None if there is none) and whether every extractor was checked.
+        """
+        classes = self._classes or []
+        with self._lock:
+            hinted = self._hosts.get(host)
+            known = hinted is not None
+            hinted = list(hinted or ())
+        for key in hinted:
+            ie = self._by_key.get(key)
+            if ie is not None and self._suitable(ie, url):
+                self._count("host_hits")
+                return key, False
+
+        narrowed = self._candidates(host)
+        for position in narrowed:
+            if self._suitable(classes[position], url):
+                self._count("narrowed_hits")
+                return classes[position].ie_key(), False
+
+        if known:
+            # A full scan for this host has run before; trust the index
+            self._count("known_host_misses")
+            return None, False
+
+        self._count("full_scans")
+        skip = set(narrowed)
+        for position, ie in enumerate(classes):
+            if position not in skip and self._suitable(ie, url):
+                return ie.ie_key(), True
+        return None, True
+
+    def supports(self, url: str) -> bool:
+        """True if a specific (non-generic) yt-dlp extractor handles url."""
+        with self._lock:
+            if url in self._urls:
+                self._urls.move_to_end(url)
+                self._stats["url_hits"] += 1
+                return self._urls[url]
+
+        started = time.perf_counter()
+        self.load()
+        self.build()
+        host = _url_host(url)
+        key, scanned = self._match(url, host)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            if self._stats["first_classification_seconds"] is None:
+                self._stats["first_classification_seconds"] = elapsed
+                logger.info("First URL classification took %.3fs", elapsed)
+            self._urls[url] = key is not None
+            while len(self._urls) > URL_CACHE_SIZE:
+                self._urls.popitem(last=False)
+            if host and (key or scanned):
+                self._remember_host(host, key)
+        return key is not None
+
+    def _remember_host(self, host: str, key: str | None) -> None:
+        """Record key for host; None records that no extractor matched."""
+        keys = self._hosts.pop(host, None)
+        if keys is None or (key is not None and key not in keys):
+            self._dirty += 1
+        keys = keys or []
+        if key is not None:
+            keys = [key] + [k for k in keys if k != key]
+        self._hosts[host] = keys[:MAX_EXTRACTORS_PER_HOST]
+        while len(self._hosts) > self.max_hosts:
+            self._hosts.popitem(last=False)
+        if self._dirty >= SAVE_EVERY:
+            self.save()
+
+    def load(self) -> None:
+        """Load the persisted host cache (once)."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.cache_file, encoding="utf-8") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable extractor host cache: %s", e)
+                return
+            if isinstance(data, dict):
+                for host, keys in list(data.items())[-self.max_hosts :]:
+                    if isinstance(host, str) and isinstance(keys, list):
+                        self._hosts[host] = [k for k in keys if isinstance(k, str)]
+
+    def save(self) -> None:
+        """Atomically persist the host cache if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._hosts)
+            self._dirty = 0
+        try:
+            directory = os.path.dirname(self.cache_file) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                dir=directory, prefix=".extractor_hosts_", suffix=".json"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.cache_file)
+        except OSError as e:
+            logger.warning("Failed to save extractor host cache: %s", e)
+
+    def stats(self) -> dict[str, Any]:
+        """Timings and routing counters for diagnostics."""
+        with self._lock:
+            return {**self._stats, "hosts": len(self._hosts), "urls": len(self._urls)}
+
+
+_INDEX = ExtractorIndex()
+
+
+def get_extractor_index() -> ExtractorIndex:
+    """Return the process-wide extractor index."""
+    return _INDEX
+
+
+def warm_extractor_index() -> None:
+    """Build the index in the calling thread (used by background startup)."""
+    try:
+        _INDEX.warm()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Extractor index warm-up failed: %s", e)
@@ -16,6 +16,7 @@ from typing import Any
 import requests
 
 from downloader.constants import RESERVED_FILENAMES
+from downloader.dedup import ContentHasher, hash_file
 from downloader.types import DownloadResult
 from ui_utils import format_file_size, validate_url
 
@@ -186,6 +187,27 @@ class GenericDownloader:
 
         raise ValueError("Too many redirects")
 
+    @staticmethod
+    def _reuse_head(
+        head: dict[str, Any] | None, url: str
+    ) -> tuple[str, int, str] | None:
+        """Return (final_url, total_size, filename) from a prefetched HEAD result."""
+        if not isinstance(head, dict) or head.get("webpage_url") != url:
+            return None
+        final_url = head.get("final_url")
+        if not isinstance(final_url, str) or not validate_url(
+            final_url, resolve_host=True
+        ):
+            return None
+        try:
+            total_size = int(head.get("filesize") or 0)
+        except (TypeError, ValueError):
+            total_size = 0
+        filename = GenericDownloader._get_filename_from_headers(
+            final_url, {"Content-Disposition": head.get("content_disposition") or ""}
+        )
+        return final_url, total_size, filename
+
     @staticmethod
     def _verify_path_security(final_path: str, output_path: str) -> None:
         """Ensure final path is strictly within output path to prevent traversal."""
@@ -208,10 +230,12 @@ class GenericDownloader:
         cancel_token: Any | None = None,
         max_retries: int = 3,
         filename: str | None = None,
+        head: dict[str, Any] | None = None,
     ) -> DownloadResult:
         """
         Downloads a file using requests with streaming.
         Supports resume and exponential backoff.
+        A HEAD result from GenericExtractor.get_metadata may be passed as head.
         """
         if not validate_url(url, resolve_host=True):
             raise ValueError(f"Invalid or unsafe URL: {url}")
@@ -223,32 +247,40 @@ class GenericDownloader:
             except OSError as e:
                 raise ValueError(f"Invalid output path: {e}") from e
 
-        # 1. HEAD Request
-        try:
-            GenericDownloader._check_cancel(cancel_token)
-            h = GenericDownloader._request_with_safe_redirects(
-                "head", url, timeout=10
-            )
-            h.raise_for_status()
-            final_url = h.url
-            if not validate_url(final_url, resolve_host=True):
-                raise ValueError(f"Redirected to an unsafe URL: {final_url}")
+        # 1. HEAD Request (skipped when the metadata lookup already resolved it)
+        reused = GenericDownloader._reuse_head(head, url)
+        if reused:
+            logger.debug("Reusing prefetched HEAD result for %s", url)
+            final_url, total_size, head_filename = reused
+            filename = filename or head_filename
+        else:
             try:
-                total_size = int(h.headers.get("content-length", 0))
-            except (TypeError, ValueError):
-                total_size = 0
-
-            if not filename:
-                filename = GenericDownloader._get_filename_from_headers(
-                    final_url, h.headers
+                GenericDownloader._check_cancel(cancel_token)
+                h = GenericDownloader._request_with_safe_redirects(
+                    "head", url, timeout=10
                 )
-        except Exception as exc:  # pylint: disable=broad-exception-caught
-            logger.debug("HEAD request failed: %s", exc)
-            final_url = url
-            total_size = 0
-            if not filename:
-                path = urllib.parse.urlparse(url).path
-                filename = GenericDownloader._sanitize_filename(os.path.basename(path))
+                h.raise_for_status()
+                final_url = h.url
+                if not validate_url(final_url, resolve_host=True):
+                    raise ValueError(f"Redirected to an unsafe URL: {final_url}")
+                try:
+                    total_size = int(h.headers.get("content-length", 0))
+                except (TypeError, ValueError):
+                    total_size = 0
+
+                if not filename:
+                    filename = GenericDownloader._get_filename_from_headers(
+                        final_url, h.headers
+                    )
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.debug("HEAD request failed: %s", exc)
+                final_url = url
+                total_size = 0
+                if not filename:
+                    path = urllib.parse.urlparse(url).path
+                    filename = GenericDownloader._sanitize_filename(
+                        os.path.basename(path)
+                    )
 
         # 2. Path Setup
         filename = GenericDownloader._sanitize_filename(filename or "downloaded_file")
@@ -277,6 +309,7 @@ class GenericDownloader:
                     "title": filename,
                     "type": "video",
                     "size": total_size,
+                    "content_hash": hash_file(final_path),
                 }
             if total_size > 0 and existing < total_size:
                 downloaded = existing
@@ -285,10 +318,16 @@ class GenericDownloader:
         # 4. Download Loop
         retry_count = 0
         last_error = None
+        # Hashed as it is written; a resumed file's existing part is read once
+        hasher = ContentHasher()
 
         while retry_count <= max_retries:
             try:
                 GenericDownloader._check_cancel(cancel_token)
+                if mode == "wb":
+                    hasher = ContentHasher()
+                elif hasher.size != downloaded:
+                    hasher = ContentHasher.from_file(final_path, downloaded)
                 headers = GenericDownloader._prepare_headers(
                     downloaded, total_size, mode == "ab"
                 )
@@ -310,6 +349,7 @@ class GenericDownloader:
                         logger.warning("Server ignored Range header, restarting")
                         downloaded = 0
                         mode = "wb"
+                        hasher = ContentHasher()
                         try:
                             total_size = int(r.headers.get("content-length", 0))
                         except (ValueError, TypeError):
@@ -327,6 +367,7 @@ class GenericDownloader:
                                 continue
 
                             f.write(chunk)
+                            hasher.update(chunk)
                             downloaded += len(chunk)
 
                             # Progress Update Logic
@@ -361,6 +402,8 @@ class GenericDownloader:
                                                 total_size
                                             ),
                                             "filename": filename,
+                                            "url": final_url,
+                                            "engine": "generic",
                                             "downloaded_bytes": downloaded,
                                             "total_bytes": total_size,
                                         }
@@ -384,6 +427,7 @@ class GenericDownloader:
                         "title": filename,
                         "type": "video",
                         "size": downloaded,
+                        "content_hash": hasher.hexdigest(),
                     }
 
             except InterruptedError:
@@ -0,0 +1,248 @@
+"""
+Pool of reusable yt_dlp.YoutubeDL instances.
+
+Constructing a YoutubeDL processes every option and sets up postprocessors;
+browser cookies come from the session cookie cache instead of being
+re-extracted per instance. Jobs with identical settings (e.g. a 200 item batch) can
+share an instance: instances are keyed by a fingerprint of the options that
+are not per-job, and per-job state (output template, progress hooks, time
+ranges, counters) is swapped in on checkout and cleared on return.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import ExitStack, contextmanager
+from typing import Any
+
+import yt_dlp
+
+from downloader.cookie_cache import get_cookie_cache
+
+logger = logging.getLogger(__name__)
+
+# Options that change between jobs without requiring a new instance
+PER_JOB_OPTIONS = frozenset(
+    {"outtmpl", "progress_hooks", "postprocessor_hooks", "download_ranges"}
+)
+MAX_IDLE_INSTANCES = 4
+MAX_INSTANCE_AGE = 600.0
+MAX_INSTANCE_USES = 50
+
+
+def options_fingerprint(options: dict[str, Any]) -> str:
+    """Stable hash of the options that determine how an instance is built."""
+    shared = {k: v for k, v in options.items() if k not in PER_JOB_OPTIONS}
+    encoded = json.dumps(shared, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Pooled:
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("ydl", "stack", "created", "uses")
+
+    def __init__(self, ydl: Any, stack: ExitStack):
+        self.ydl = ydl
+        # Exits the YoutubeDL context when the instance is closed
+        self.stack = stack
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+class YoutubeDLPool:
+    """
+    Bounded pool of idle YoutubeDL instances.
+
+    An instance is only ever used by one job at a time. Instances are dropped
+    after MAX_INSTANCE_AGE seconds or MAX_INSTANCE_USES jobs, and whenever a
+    job raises (its internal state may be inconsistent).
+    """
+
+    def __init__(
+        self,
+        max_idle: int = MAX_IDLE_INSTANCES,
+        max_age: float = MAX_INSTANCE_AGE,
+        max_uses: int = MAX_INSTANCE_USES,
+    ):
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self._lock = threading.Lock()
+        self._idle: list[tuple[str, _Pooled]] = []
+        self._stats = {"created": 0, "reused": 0, "discarded": 0}
+        self._construct_seconds = 0.0
+
+    def _expired(self, pooled: _Pooled) -> bool:
+        return (
+            time.monotonic() - pooled.created > self.max_age
+            or pooled.uses >= self.max_uses
+        )
+
+    def _take(self, key: str) -> _Pooled | None:
+        stale: list[_Pooled] = []
+        found = None
+        with self._lock:
+            for position, (idle_key, pooled) in enumerate(self._idle):
+                if idle_key != key:
+                    continue
+                del self._idle[position]
+                if self._expired(pooled):
+                    stale.append(pooled)
+                else:
+                    found = pooled
+                break
+        for pooled in stale:
+            self._close(pooled)
+        return found
+
+    @staticmethod
+    def _shared_cookie_jar(options: dict[str, Any]) -> Any | None:
+        """Session-cached jar for cookiesfrombrowser (refreshed if the store changed)."""
+        spec = options.get("cookiesfrombrowser")
+        if not spec:
+            return None
+        browser, profile = spec[0], spec[1] if len(spec) > 1 else None
+        return get_cookie_cache().get_jar(browser, profile)
+
+    def _create(self, options: dict[str, Any]) -> _Pooled:
+        started = time.perf_counter()
+        jar = self._shared_cookie_jar(options)
+        if jar is not None:
+            # Skip yt-dlp's own browser extraction; the shared jar is injected
+            options = {k: v for k, v in options.items() if k != "cookiesfrombrowser"}
+        with ExitStack() as stack:
+            # mypy: options is dict[str, Any], but YoutubeDL expects _Params | None
+            ydl = stack.enter_context(
+                yt_dlp.YoutubeDL(options)  # type: ignore[arg-type]
+            )
+            if jar is not None:
+                ydl.cookiejar = jar
+            # Kept open until the pool closes the instance
+            kept = stack.pop_all()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["created"] += 1
+            self._construct_seconds += elapsed
+        logger.debug("Constructed YoutubeDL in %.3fs", elapsed)
+        return _Pooled(ydl, kept)
+
+    @staticmethod
+    def _apply_job_options(ydl: Any, options: dict[str, Any]) -> None:
+        """Swap per-job state into a reused instance."""
+        params = ydl.params
+        outtmpl = options.get("outtmpl") or {}
+        params["outtmpl"] = (
+            dict(outtmpl) if isinstance(outtmpl, dict) else {"default": outtmpl}
+        )
+        if hasattr(ydl, "_parse_outtmpl"):
+            ydl._parse_outtmpl()  # pylint: disable=protected-access
+        if options.get("download_ranges") is not None:
+            params["download_ranges"] = options["download_ranges"]
+        else:
+            params.pop("download_ranges", None)
+        YoutubeDLPool._set_hooks(
+            ydl,
+            options.get("progress_hooks") or [],
+            options.get("postprocessor_hooks") or [],
+        )
+        # pylint: disable=protected-access
+        ydl._num_downloads = 0
+        ydl._download_retcode = 0
+
+    @staticmethod
+    def _clear_job_options(ydl: Any) -> None:
+        """Drop references to the finished job's callbacks."""
+        YoutubeDLPool._set_hooks(ydl, [], [])
+        ydl.params.pop("download_ranges", None)
+
+    @staticmethod
+    def _set_hooks(
+        ydl: Any, progress_hooks: list[Any], postprocessor_hooks: list[Any]
+    ) -> None:
+        """Install a job's hooks, including on the instance's postprocessors."""
+        # pylint: disable=protected-access
+        previous = list(getattr(ydl, "_postprocessor_hooks", None) or [])
+        ydl._progress_hooks = list(progress_hooks)
+        ydl._postprocessor_hooks = list(postprocessor_hooks)
+        # Postprocessors copy the hooks when they are built; keep their own
+        # (e.g. report_progress) and replace the previous job's
+        for pps in (getattr(ydl, "_pps", None) or {}).values():
+            for pp in pps:
+                hooks = getattr(pp, "_progress_hooks", None)
+                if isinstance(hooks, list):
+                    pp._progress_hooks = [
+                        hook for hook in hooks if hook not in previous
+                    ] + list(postprocessor_hooks)
+
+    def _close(self, pooled: _Pooled) -> None:
+        with self._lock:
+            self._stats["discarded"] += 1
+        try:
+            pooled.stack.close()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Error closing pooled YoutubeDL: %s", e)
+
+    def _release(self, key: str, pooled: _Pooled) -> None:
+        if self._expired(pooled):
+            self._close(pooled)
+            return
+        evicted = None
+        with self._lock:
+            self._idle.append((key, pooled))
+            if len(self._idle) > self.max_idle:
+                _, evicted = self._idle.pop(0)
+        if evicted:
+            self._close(evicted)
+
+    @contextmanager
+    def checkout(self, options: dict[str, Any]) -> Iterator[Any]:
+        """Yield a YoutubeDL configured for options; returned to the pool after."""
+        key = options_fingerprint(options)
+        pooled = self._take(key)
+        if pooled is None:
+            pooled = self._create(options)
+        else:
+            with self._lock:
+                self._stats["reused"] += 1
+            self._apply_job_options(pooled.ydl, options)
+            # Re-checks the browser store; refreshes the shared jar in place
+            self._shared_cookie_jar(options)
+
+        pooled.uses += 1
+        try:
+            yield pooled.ydl
+        except BaseException:
+            self._close(pooled)
+            raise
+        self._clear_job_options(pooled.ydl)
+        self._release(key, pooled)
+
+    def stats(self) -> dict[str, Any]:
+        """Counters and average construction time (seconds)."""
+        with self._lock:
+            created = self._stats["created"]
+            return {
+                **self._stats,
+                "idle": len(self._idle),
+                "avg_construct_seconds": (
+                    self._construct_seconds / created if created else 0.0
+                ),
+            }
+
+    def clear(self) -> None:
+        """Close every idle instance."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _, pooled in idle:
+            self._close(pooled)
+
+
+_POOL = YoutubeDLPool()
+
+
+def get_ydl_pool() -> YoutubeDLPool:
+    """Return the process-wide YoutubeDL pool."""
+    return _POOL
@@ -12,7 +12,12 @@ from collections.abc import Callable, Iterable
 from pathlib import Path
 from typing import Any, cast
 
-import yt_dlp
+from downloader.cookie_cache import get_cookie_cache
+from downloader.dedup import hash_file
+from downloader.engines.extractor_index import get_extractor_index
+from downloader.engines.ydl_pool import get_ydl_pool
+from downloader.metadata_cache import media_key_from_info
+from downloader.postprocess import PostProcessJob, split_deferred_postprocessors
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +28,6 @@ class YTDLPWrapper:
     Ensures consistent behavior for cancellation and progress reporting.
     """
 
-    _SUPPORT_CACHE: dict[str, bool] = {}
-
     def __init__(self, options: dict[str, Any]):
         self.options = options.copy()
 
@@ -78,11 +81,41 @@ class YTDLPWrapper:
 
         return prepared
 
+    @classmethod
+    def video_result(
+        cls, info: dict[str, Any], prepared: str, hash_content: bool = True
+    ) -> dict[str, Any]:
+        """
+        Result dict for a downloaded (or post-processed) single video.
+        hash_content=False skips the content digest, for a file that its
+        postprocessors will still rewrite.
+        """
+        filename = cls._existing_file_candidate(info, prepared)
+        try:
+            file_size = os.path.getsize(filename) if os.path.exists(filename) else None
+        except OSError:
+            file_size = None
+
+        return {
+            "filename": os.path.basename(filename),
+            "filepath": filename,
+            "title": info.get("title", "Unknown Title"),
+            "duration": info.get("duration"),
+            "thumbnail": info.get("thumbnail"),
+            "uploader": info.get("uploader"),
+            "type": "video",
+            "media_key": media_key_from_info(info),
+            "size": file_size,
+            "file_size": file_size,
+            "content_hash": hash_file(filename) if hash_content else None,
+        }
+
     @staticmethod
     def supports(url: str) -> bool:
         """
         Check if yt-dlp supports the URL by querying its extractors.
-        Uses caching to improve performance on repeated checks.
+        Routing goes through the shared extractor index (domain-narrowed,
+        with bounded URL and host caches).
 
         Returns True if yt-dlp has an extractor for this URL,
         False otherwise (allowing fallback to generic downloader).
@@ -90,27 +123,31 @@ class YTDLPWrapper:
         if not url:
             return False
 
-        # Check cache
-        if url in YTDLPWrapper._SUPPORT_CACHE:
-            return YTDLPWrapper._SUPPORT_CACHE[url]
-
         try:
-            # Use yt-dlp's extractor system to check URL support
-            # We iterate through extractors. This can be slow, so we cache the result.
-            for ie in yt_dlp.extractor.gen_extractors():
-                if ie.suitable(url):
-                    # Skip generic extractors as we want specific support
-                    if ie.IE_NAME in ("generic", "Generic"):
-                        continue
-                    YTDLPWrapper._SUPPORT_CACHE[url] = True
-                    return True
-
-            YTDLPWrapper._SUPPORT_CACHE[url] = False
-            return False
+            return get_extractor_index().supports(url)
         except Exception:  # pylint: disable=broad-exception-caught
             # On any error, assume yt-dlp might support it to be safe
             return True
 
+    @staticmethod
+    def _extract_and_download(
+        ydl: Any, url: str, prefetched: dict[str, Any] | None
+    ) -> Any:
+        """Download from prefetched info when possible, else extract from scratch."""
+        if prefetched:
+            try:
+                logger.info("Reusing prefetched info for: %s", url)
+                result = ydl.process_ie_result(dict(prefetched), download=True)
+                if result:
+                    return result
+                logger.info("Prefetched info produced no result, re-extracting")
+            except Exception as exc:
+                if isinstance(exc, InterruptedError) or "Cancelled" in str(exc):
+                    raise
+                # Most likely expired stream URLs
+                logger.warning("Prefetched info failed (%s), re-extracting", exc)
+        return ydl.extract_info(url, download=True)
+
     def download(
         self,
         url: str,
@@ -118,6 +155,8 @@ class YTDLPWrapper:
         cancel_token: Any | None = None,
         download_item: dict[str, Any] | None = None,
         output_path: str | None = None,
+        info: dict[str, Any] | None = None,
+        defer_postprocessing: bool = False,
     ) -> dict[str, Any]:
         """
         Execute download.
@@ -128,6 +167,11 @@ class YTDLPWrapper:
             cancel_token: Object to check for cancellation.
             download_item: Optional dictionary containing item details (for compatibility).
             output_path: Optional output path override (for compatibility).
+            info: Previously extracted info dict; downloaded directly instead of
+                re-extracting, falling back to extraction if it fails.
+            defer_postprocessing: Leave the file's postprocessors to the
+                post-processing stage; the result then carries them as a
+                PostProcessJob under "postprocess".
 
         Returns:
             Dict containing metadata of downloaded file.
@@ -150,6 +194,13 @@ class YTDLPWrapper:
             except Exception as exc:  # pylint: disable=broad-exception-caught
                 logger.warning("Failed to apply output path override: %s", exc)
 
+        # Single videos only: a playlist result has no one file to hand over
+        deferred = (
+            split_deferred_postprocessors(options)
+            if defer_postprocessing and options.get("noplaylist", True)
+            else []
+        )
+
         # Add progress hooks
         hooks = options.setdefault("progress_hooks", [])
 
@@ -175,10 +226,10 @@ class YTDLPWrapper:
 
         try:
             logger.info("Starting yt-dlp download: %s", url)
-            # mypy: options is dict[str, Any], but YoutubeDL expects _Params | None
-            with yt_dlp.YoutubeDL(options) as ydl:  # type: ignore[arg-type]
+            # Instances with identical non-per-job options are reused
+            with get_ydl_pool().checkout(options) as ydl:
                 # Extract info and download
-                info = ydl.extract_info(url, download=True)
+                info = self._extract_and_download(ydl, url, info)
 
                 # Handle null info (can happen in some cases)
                 if not info:
@@ -187,41 +238,31 @@ class YTDLPWrapper:
 
                 # Handle Playlists
                 if "entries" in info:
-                    entries_raw = info.get("entries", [])
-                    # entries_raw is typed as object by mypy, but we know it is iterable if not None
-                    # We cast to Iterable[Any] to satisfy mypy
-
-                    entries_iterable = cast(Iterable[Any], entries_raw)
-                    entries_list = (
-                        list(entries_iterable) if entries_raw is not None else []
-                    )
+                    # Count without materialising the entry dicts
+                    entries_raw = info.get("entries")
+                    count = info.get("playlist_count")
+                    if not isinstance(count, int):
+                        count = sum(1 for _ in cast(Iterable[Any], entries_raw or ()))
                     return {
                         "filename": info.get("title", "Playlist"),
                         # Omit filepath for playlists to avoid misleading template string
                         "title": info.get("title", "Playlist"),
-                        "entries": len(entries_list),
+                        "entries": count,
                         "type": "playlist",
                     }
 
                 # Handle Single Video
-                prepared_filename = ydl.prepare_filename(info)
-                filename = self._existing_file_candidate(info, prepared_filename)
-                try:
-                    file_size = os.path.getsize(filename) if os.path.exists(filename) else None
-                except OSError:
-                    file_size = None
-
-                return {
-                    "filename": os.path.basename(filename),
-                    "filepath": filename,
-                    "title": info.get("title", "Unknown Title"),
-                    "duration": info.get("duration"),
-                    "thumbnail": info.get("thumbnail"),
-                    "uploader": info.get("uploader"),
-                    "type": "video",
-                    "size": file_size,
-                    "file_size": file_size,
-                }
+                result = self.video_result(
+                    info, ydl.prepare_filename(info), hash_content=not deferred
+                )
+                if deferred:
+                    result["postprocess"] = PostProcessJob(
+                        filepath=result["filepath"],
+                        info=info,
+                        postprocessors=deferred,
+                        params=options,
+                    )
+                return result
 
         except Exception as e:
             # Detect cancellation to re-raise cleanly
@@ -231,5 +272,10 @@ class YTDLPWrapper:
                 # pylint: disable=broad-exception-raised
                 raise InterruptedError("Download Cancelled by user") from e
 
+            spec = options.get("cookiesfrombrowser")
+            if spec and any(k in msg.lower() for k in ("sign in", "login", "cookies")):
+                # Auth failures may mean the cached cookies went stale
+                get_cookie_cache().invalidate(spec[0])
+
             logger.error("yt-dlp error for %s: %s", url, e)
             raise
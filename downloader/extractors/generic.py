@@ -45,6 +45,9 @@ class GenericExtractor:
                 "extractor": "generic",
                 "filesize": response.headers.get("Content-Length"),
                 "format": content_type,
+                # Resolved HEAD result, reused by GenericDownloader
+                "final_url": response.url or url,
+                "content_disposition": response.headers.get("Content-Disposition"),
             }
         except requests.RequestException as exc:
             logger.debug("Generic metadata HEAD failed for %s: %s", url, exc)
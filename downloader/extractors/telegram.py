@@ -2,22 +2,147 @@
 """
 Telegram extractor module.
 Extracts metadata and media URLs from public Telegram posts (t.me/...).
+
+Post pages are scanned incrementally and only until the media URL and the
+og: tags are found. Channel links (t.me/<channel> or t.me/s/<channel>) are
+batches: their public web listing is paged through and the video posts are
+resolved concurrently over one shared session, for playlist fan-out.
 """
 
+import codecs
 import logging
 import re
+from collections import deque
 from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
 from typing import Any
 from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup, Tag
 
 from downloader.constants import RESERVED_FILENAMES
 from ui_utils import safe_request_with_redirects, validate_url
 
 logger = logging.getLogger(__name__)
 
+# We need to impersonate a browser to get the preview page
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+# Limit response reading to 2MB to prevent DoS via large HTML/files
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+_CHUNK_BYTES = 8192
+_OG_PROPERTIES = ("og:video", "og:image", "og:description")
+# Posts of one listing page resolved at once
+CHANNEL_WORKERS = 8
+
+_HOSTS = {"t.me", "www.t.me", "telegram.me", "www.telegram.me"}
+_CHANNEL_PATH = re.compile(r"^/(?:s/)?([A-Za-z][A-Za-z0-9_]{3,31})/?$")
+# t.me paths that look like channel names but are not
+_SERVICE_PATHS = {
+    "addemoji",
+    "addstickers",
+    "addtheme",
+    "confirmphone",
+    "contact",
+    "invoice",
+    "joinchat",
+    "login",
+    "proxy",
+    "setlanguage",
+    "share",
+    "socks",
+}
+
+
+class _PostScanner(HTMLParser):
+    """Collects a post page's og: meta tags and first <video> source."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: dict[str, str] = {}
+        self.video_src: str | None = None
+        self._head_done = False
+
+    def handle_starttag(self, tag, attrs):
+        values = dict(attrs)
+        if tag == "meta":
+            prop = values.get("property")
+            content = values.get("content")
+            if prop in _OG_PROPERTIES and prop not in self.meta and content:
+                self.meta[prop] = content
+        elif tag == "video" and not self.video_src:
+            self.video_src = values.get("src") or None
+        elif tag == "body":
+            self._head_done = True
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._head_done = True
+
+    @property
+    def done(self) -> bool:
+        """Whether the rest of the page can tell nothing more."""
+        if self.video_src:
+            # Players only come after the <head> meta tags
+            return True
+        if "og:video" not in self.meta:
+            return False
+        return self._head_done or len(self.meta) == len(_OG_PROPERTIES)
+
+
+class _ListingScanner(HTMLParser):
+    """Posts on one page of a channel's t.me/s/ listing, oldest first."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: str | None = None
+        self.video_posts: list[int] = []
+        self.oldest: int | None = None
+        self._post: int | None = None
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        values = dict(attrs)
+        if tag == "meta" and values.get("property") == "og:title":
+            self.title = self.title or values.get("content")
+        post = values.get("data-post")
+        if post:
+            number = post.rpartition("/")[2]
+            self._post = int(number) if number.isdigit() else None
+            if self._post is not None:
+                self.oldest = min(self.oldest or self._post, self._post)
+        elif self._post is not None and (
+            tag == "video" or "tgme_widget_message_video" in (values.get("class") or "")
+        ):
+            if self._post not in self.video_posts:
+                self.video_posts.append(self._post)
+
+
+def _scan(url: str, scanner: Any, session: requests.Session | None = None) -> bool:
+    """
+    Stream url into scanner until it is done; False if the page is over the
+    size limit.
+    """
+    with safe_request_with_redirects(
+        "GET", url, headers=_HEADERS, timeout=10, stream=True, session=session
+    ) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        read = 0
+        for chunk in response.iter_content(chunk_size=_CHUNK_BYTES):
+            read += len(chunk)
+            if read > MAX_PAGE_BYTES:
+                logger.warning("Telegram response too large, aborting.")
+                return False
+            scanner.feed(decoder.decode(chunk))
+            if scanner.done:
+                return True
+        scanner.feed(decoder.decode(b"", final=True))
+        scanner.close()
+    return True
+
 
 class TelegramExtractor:
     """
@@ -32,67 +157,41 @@ class TelegramExtractor:
         try:
             parsed = urlparse(url)
             host = (parsed.hostname or "").lower().strip(".")
-            return host in {"t.me", "www.t.me", "telegram.me", "www.telegram.me"}
+            return host in _HOSTS
         except Exception:  # pylint: disable=broad-exception-caught
             return False
 
     @staticmethod
-    def get_metadata(url: str) -> dict[str, Any] | None:
+    def channel_name(url: str) -> str | None:
+        """The channel a t.me/<channel> or t.me/s/<channel> link lists, if any."""
+        if not TelegramExtractor.is_telegram_url(url):
+            return None
+        parsed = urlparse(url)
+        match = _CHANNEL_PATH.match(parsed.path)
+        if not match or match.group(1).lower() in _SERVICE_PATHS:
+            return None
+        return match.group(1)
+
+    @staticmethod
+    def get_metadata(
+        url: str, session: requests.Session | None = None
+    ) -> dict[str, Any] | None:
         """
         Scrape the public Telegram page to find the media URL and metadata.
         Returns a dict with 'url', 'title', 'thumbnail' or None.
-        Safely limits memory usage by streaming the response.
+        Safely limits memory usage by streaming the response and stops
+        reading once the media URL and og: tags are found.
         """
         try:
-            # We need to impersonate a browser to get the preview page
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-
-            # Use stream=True to prevent loading large responses into memory
-            with safe_request_with_redirects(
-                "GET", url, headers=headers, timeout=10, stream=True
-            ) as response:
-                response.raise_for_status()
-
-                # Limit response reading to 2MB to prevent DoS via large HTML/files
-                max_bytes = 2 * 1024 * 1024
-                content = b""
-                for chunk in response.iter_content(chunk_size=8192):
-                    content += chunk
-                    if len(content) > max_bytes:
-                        logger.warning("Telegram response too large, aborting.")
-                        return None
-
-            soup = BeautifulSoup(content, "html.parser")
+            scanner = _PostScanner()
+            if not _scan(url, scanner, session):
+                return None
 
             # Extract Title/Description
-            title: str | None = "Telegram Video"
-            title_tag = soup.find("meta", property="og:description")
-
-            if isinstance(title_tag, Tag):
-                content_attr = title_tag.get("content")
-                if isinstance(content_attr, str):
-                    title = content_attr
-                elif isinstance(content_attr, list):
-                    title = str(content_attr[0])
-
-            # Extract Video URL
-            video_url = None
-            video_tag = soup.find("video")
-
-            if isinstance(video_tag, Tag):
-                src = video_tag.get("src")
-                if isinstance(src, str):
-                    video_url = src
-
-            # If no video tag, check for og:video
-            if not video_url:
-                og_vid = soup.find("meta", property="og:video")
-                if isinstance(og_vid, Tag):
-                    content_attr = og_vid.get("content")
-                    if isinstance(content_attr, str):
-                        video_url = content_attr
+            title = scanner.meta.get("og:description") or "Telegram Video"
+
+            # A <video> player wins over og:video
+            video_url = scanner.video_src or scanner.meta.get("og:video")
 
             # Validate extracted URL
             if video_url and not video_url.startswith("http"):
@@ -111,14 +210,7 @@ class TelegramExtractor:
                 )
                 return None
 
-            # Extract Thumbnail
-            thumbnail = None
-            og_image = soup.find("meta", property="og:image")
-            if isinstance(og_image, Tag):
-                content_attr = og_image.get("content")
-                if isinstance(content_attr, str):
-                    thumbnail = content_attr
-
+            thumbnail = scanner.meta.get("og:image")
             return {
                 "url": video_url,
                 "title": str(title)[:100],  # Truncate title
@@ -173,3 +265,106 @@ class TelegramExtractor:
                 filename=filename,
             )
         )
+
+
+class TelegramChannelEnumerator:
+    """
+    Pages through a public channel's video posts, newest first, with the
+    same interface as playlist.PlaylistEnumerator.
+    """
+
+    def __init__(self, url: str, options: dict[str, Any], offset: int = 0):
+        self.url = url
+        self.channel = TelegramExtractor.channel_name(url)
+        self.exhausted = False
+        self._session = requests.Session()
+        # Every worker keeps its connection to t.me
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=CHANNEL_WORKERS)
+        self._session.mount("https://", adapter)
+        if options.get("proxy"):
+            self._session.proxies = {
+                "http": options["proxy"],
+                "https": options["proxy"],
+            }
+        self._pushed_back: deque[dict[str, Any]] = deque()
+        # Listed video posts not resolved yet, newest first
+        self._listed: deque[int] = deque()
+        self._before: int | None = None
+        self._listing_done = self.channel is None
+        self.title: str | None = None
+        self.is_playlist = self.channel is not None and self._list_page()
+        # Reopened after eviction: skip what was already fanned out
+        for _ in range(offset):
+            if not self._fill(1):
+                break
+            self._listed.popleft()
+
+    def _list_page(self) -> bool:
+        """Read the next listing page; False once the channel has no more."""
+        url = f"https://t.me/s/{self.channel}"
+        if self._before is not None:
+            url += f"?before={self._before}"
+        scanner = _ListingScanner()
+        if not _scan(url, scanner, self._session) or scanner.oldest is None:
+            self._listing_done = True
+            return False
+        self.title = self.title or scanner.title
+        self._listed.extend(reversed(scanner.video_posts))
+        self._before = scanner.oldest
+        self._listing_done = scanner.oldest <= 1
+        return True
+
+    def _fill(self, count: int) -> bool:
+        """List pages until count posts are waiting; False if fewer remain."""
+        while len(self._listed) < count and not self._listing_done:
+            self._list_page()
+        return len(self._listed) >= count
+
+    def _entry(self, post: int) -> dict[str, Any] | None:
+        url = f"https://t.me/{self.channel}/{post}"
+        meta = TelegramExtractor.get_metadata(url, self._session)
+        if not meta:
+            return None
+        return {
+            "url": url,
+            "title": meta["title"],
+            "media_key": f"telegram:{self.channel}/{post}".lower(),
+            "duration": None,
+        }
+
+    def next_page(self, size: int = 50) -> list[dict[str, Any]]:
+        """Return up to size further entries; empty once the channel is done."""
+        page: list[dict[str, Any]] = []
+        while self._pushed_back and len(page) < size:
+            page.append(self._pushed_back.popleft())
+        while len(page) < size and not self.exhausted:
+            self._fill(size - len(page))
+            posts = [
+                self._listed.popleft()
+                for _ in range(min(size - len(page), len(self._listed)))
+            ]
+            if not posts:
+                self.exhausted = True
+                break
+            with ThreadPoolExecutor(
+                max_workers=CHANNEL_WORKERS, thread_name_prefix="TelegramPost"
+            ) as pool:
+                entries = pool.map(self._entry, posts)
+            page.extend(e for e in entries if e)
+        return page
+
+    def push_back(self, entries: list[dict[str, Any]]) -> None:
+        """Return entries that could not be queued; they come out first next time."""
+        self._pushed_back.extendleft(reversed(entries))
+
+    @property
+    def done(self) -> bool:
+        """True once every entry has been handed out."""
+        return self.exhausted and not self._pushed_back
+
+    def close(self) -> None:
+        """Release the shared session."""
+        try:
+            self._session.close()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Error closing Telegram channel session: %s", e)
@@ -3,19 +3,137 @@ Module for fetching video metadata using yt-dlp or fallback extractors.
 """
 
 import logging
-from concurrent.futures import ThreadPoolExecutor
+import pickle
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ThreadPoolExecutor
 from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import Any, cast
 
 import yt_dlp
 
+from downloader.engines.ydl_pool import get_ydl_pool
 from downloader.extractors.generic import GenericExtractor
 from downloader.extractors.telegram import TelegramExtractor
+from downloader.metadata_cache import get_metadata_cache
+from downloader.process_pool import get_process_backend
 
 logger = logging.getLogger(__name__)
 
 # Configurable timeout for info extraction (can be overridden)
 INFO_EXTRACTION_TIMEOUT = 45
+# Upper bound on concurrent yt-dlp extractions across the app
+MAX_CONCURRENT_EXTRACTIONS = 4
+
+
+class ExtractionPool:
+    """
+    Shared, bounded executor for metadata extraction.
+
+    - Identical in-flight requests share one Future (singleflight).
+    - Extractions whose callers timed out are tracked as "abandoned" until
+      they actually finish; once every worker is held by one, new requests
+      fail fast instead of queueing behind a hung site.
+    """
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_EXTRACTIONS):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._inflight: dict[Hashable, Future] = {}
+        self._abandoned: set[Future] = set()
+        self._stats = {"submitted": 0, "shared": 0, "timeouts": 0, "rejected": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="InfoExtract"
+            )
+        return self._executor
+
+    def submit(self, key: Hashable, fn: Callable[[], Any]) -> Future:
+        """Return the in-flight Future for key, starting fn if there is none."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                logger.debug("Joining in-flight extraction for %s", key)
+                return future
+
+            if len(self._abandoned) >= self.max_workers:
+                self._stats["rejected"] += 1
+                raise RuntimeError(
+                    "All metadata extraction workers are stuck on timed-out jobs"
+                )
+
+            future = self._get_executor().submit(fn)
+            self._inflight[key] = future
+            self._stats["submitted"] += 1
+
+        def _done(done: Future) -> None:
+            self._on_done(key, done)
+
+        future.add_done_callback(_done)
+        return future
+
+    def _on_done(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if future in self._abandoned:
+                self._abandoned.discard(future)
+                logger.info("Abandoned extraction for %s finished", key)
+
+    def result(self, key: Hashable, future: Future, timeout: float) -> Any:
+        """Wait for future; on timeout mark it abandoned and raise TimeoutError."""
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError as exc:
+            # Threads cannot be killed; cancel() only helps if it never started
+            if not future.cancel():
+                with self._lock:
+                    if not future.done():
+                        self._abandoned.add(future)
+                    if self._inflight.get(key) is future:
+                        del self._inflight[key]
+                    self._stats["timeouts"] += 1
+                    abandoned = len(self._abandoned)
+                logger.warning(
+                    "Extraction still running after timeout (%d/%d workers held)",
+                    abandoned,
+                    self.max_workers,
+                )
+            raise TimeoutError("Info extraction timed out") from exc
+
+    def stats(self) -> dict[str, int]:
+        """Return counters plus current in-flight and abandoned sizes."""
+        with self._lock:
+            return {
+                **self._stats,
+                "inflight": len(self._inflight),
+                "abandoned": len(self._abandoned),
+            }
+
+    def shutdown(self) -> None:
+        """Stop accepting work; running extractions are left to finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._inflight.clear()
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_POOL = ExtractionPool()
+
+
+def get_extraction_stats() -> dict[str, int]:
+    """Expose extraction pool counters (for diagnostics/dashboard)."""
+    return _POOL.stats()
+
+
+def shutdown_extraction_pool() -> None:
+    """Release the shared extraction pool (called on application shutdown)."""
+    _POOL.shutdown()
 
 
 def _extract_telegram_info(url: str) -> dict[str, Any] | None:
@@ -61,6 +179,7 @@ def _extract_generic_info(url: str) -> dict[str, Any] | None:
             ],
             "audio_streams": [],
             "original_url": url,
+            "_raw": generic_info if generic_info.get("final_url") else None,
         }
     return None
 
@@ -155,8 +274,52 @@ def get_video_info(
 ) -> dict[str, Any] | None:
     """
     Fetches video metadata without downloading the video.
-    Tries yt-dlp first, then falls back to Telegram scraping or Generic file check.
+    Reads through the persistent metadata cache, then tries yt-dlp and falls
+    back to Telegram scraping or Generic file check.
     """
+    cache = get_metadata_cache()
+    cached = cache.get(url)
+    if cached:
+        logger.debug("Metadata cache hit for: %s", url)
+        return cached
+
+    backend = get_process_backend()
+    if backend is not None:
+        # A hung extractor is killed with its worker instead of pinning a thread
+        info = backend.run(
+            _fetch_in_worker,
+            (url, cookies_from_browser, cookies_from_browser_profile),
+            timeout=INFO_EXTRACTION_TIMEOUT + 5,
+        )
+    else:
+        info = _fetch_video_info(
+            url, cookies_from_browser, cookies_from_browser_profile
+        )
+    if info:
+        cache.put(url, info, raw=info.pop("_raw", None))
+    return info
+
+
+def _fetch_in_worker(
+    payload: tuple[str, str | None, str | None], progress_hook: Any, cancel_token: Any
+) -> dict[str, Any] | None:
+    """Process-backend job: _fetch_video_info, with a result the pipe can carry."""
+    # pylint: disable=unused-argument
+    info = _fetch_video_info(*payload)
+    if info and info.get("_raw") is not None:
+        try:
+            pickle.dumps(info["_raw"])
+        except Exception:  # pylint: disable=broad-exception-caught
+            info["_raw"] = None  # only used to warm the stream cache
+    return info
+
+
+def _fetch_video_info(
+    url: str,
+    cookies_from_browser: str | None,
+    cookies_from_browser_profile: str | None,
+) -> dict[str, Any] | None:
+    """Uncached metadata lookup behind get_video_info."""
     # 1. Check for Telegram URL explicitly first (faster)
     if TelegramExtractor.is_telegram_url(url):
         return _extract_telegram_info(url)
@@ -181,29 +344,18 @@ def get_video_info(
 
         logger.info("Fetching video info for: %s", url)
 
-        # Execute extraction with cross-platform timeout
+        # Execute extraction on the shared pool; identical requests share a future
         def _fetch():
-            # pylint: disable=line-too-long
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:  # type: ignore
+            with get_ydl_pool().checkout(ydl_opts) as ydl:
                 return cast(dict[str, Any], ydl.extract_info(url, download=False))
 
-        executor = ThreadPoolExecutor(max_workers=1)
-        shutdown_done = False
+        key = (url, cookies_from_browser, cookies_from_browser_profile)
+        future = _POOL.submit(key, _fetch)
         try:
-            future = executor.submit(_fetch)
-            info_dict = future.result(timeout=INFO_EXTRACTION_TIMEOUT)
-        except FuturesTimeoutError as exc:
-            future.cancel()
-            executor.shutdown(wait=False, cancel_futures=True)
-            shutdown_done = True
+            info_dict = _POOL.result(key, future, INFO_EXTRACTION_TIMEOUT)
+        except TimeoutError:
             logger.error("Info extraction timed out after %ds", INFO_EXTRACTION_TIMEOUT)
-            raise TimeoutError("Info extraction timed out") from exc
-        else:
-            executor.shutdown(wait=True)
-            shutdown_done = True
-        finally:
-            if not shutdown_done:
-                executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
         # Check if yt-dlp fell back to generic and didn't find much
         if info_dict:
@@ -232,6 +384,8 @@ def get_video_info(
                 "audio_streams": audio_streams,
                 "chapters": info_dict.get("chapters", None),
                 "original_url": url,
+                # Raw result is kept for the stream cache and stripped by caller
+                "_raw": info_dict if isinstance(info_dict, dict) else None,
             }
 
             logger.info("Successfully fetched video info: %s", result["title"])
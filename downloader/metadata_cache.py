@@ -0,0 +1,405 @@
+"""
+Persistent metadata cache.
+
+Stores extracted video metadata in SQLite so repeated lookups (preview, queue
+add, RSS) survive restarts. Entries are keyed by a canonical media id
+(e.g. ``youtube:dQw4w9WgXcQ``) so short links, timestamps and tracking
+parameters all resolve to the same record.
+
+Two payloads are kept per entry with separate lifetimes:
+- static metadata (title, thumbnail, formats summary) - long TTL
+- the raw extractor result, whose stream URLs expire quickly - short TTL
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_FILE = os.path.expanduser("~/.streamcatch/metadata_cache.db")
+STATIC_TTL_SECONDS = 7 * 24 * 3600
+STREAM_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MEMORY_ENTRIES = 50
+
+# Click ids that never select content, on any host
+_TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+}
+_YOUTUBE_HOSTS = {
+    "youtube.com",
+    "m.youtube.com",
+    "music.youtube.com",
+    "youtube-nocookie.com",
+}
+# Share/referral parameters that are tracking-only on these hosts but may be
+# real query parameters elsewhere
+_HOST_TRACKING_PARAMS: dict[str, frozenset[str]] = {
+    **{host: frozenset({"si", "feature", "pp"}) for host in _YOUTUBE_HOSTS},
+    "open.spotify.com": frozenset({"si"}),
+    "twitter.com": frozenset({"ref", "ref_src"}),
+    "x.com": frozenset({"ref", "ref_src"}),
+}
+_YOUTUBE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_YOUTUBE_PATH_RE = re.compile(r"^/(?:shorts|embed|live|v)/([^/?#]+)")
+
+
+def canonical_url_key(url: str) -> str:
+    """
+    Map equivalent URLs to one cache key.
+
+    YouTube links become ``youtube:<id>``; other URLs drop scheme, ``www.``,
+    fragments and tracking parameters (click ids and ``utm_*`` everywhere,
+    share parameters such as ``si`` only on hosts known to use them that way)
+    and sort the remaining query.
+    Non-URL targets (e.g. ``ytsearch1:...``) are returned stripped.
+    """
+    target = (url or "").strip()
+    try:
+        parsed = urlparse(target)
+        host = (parsed.hostname or "").lower().strip(".")
+        port = parsed.port
+    except ValueError:
+        return target
+    if not host:
+        return target
+    if host.startswith("www."):
+        host = host[4:]
+
+    video_id: str | None = None
+    if host == "youtu.be":
+        video_id = parsed.path.strip("/").split("/")[0]
+    elif host in _YOUTUBE_HOSTS:
+        if parsed.path == "/watch":
+            video_id = parse_qs(parsed.query).get("v", [""])[0]
+        else:
+            match = _YOUTUBE_PATH_RE.match(parsed.path)
+            video_id = match.group(1) if match else None
+    if video_id and _YOUTUBE_ID_RE.match(video_id):
+        return f"youtube:{video_id}"
+
+    host_tracking = _HOST_TRACKING_PARAMS.get(host, frozenset())
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS
+        and k.lower() not in host_tracking
+        and not k.lower().startswith("utm_")
+    )
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    path = parsed.path.rstrip("/") or "/"
+    return f"url:{netloc}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def media_key_from_info(raw: dict[str, Any] | None) -> str | None:
+    """Return ``<extractor>:<id>`` for a raw yt-dlp info dict, if available."""
+    if not isinstance(raw, dict):
+        return None
+    extractor = raw.get("extractor_key") or raw.get("extractor")
+    media_id = raw.get("id")
+    if not isinstance(extractor, str) or not isinstance(media_id, str | int):
+        return None
+    return f"{extractor.lower()}:{media_id}"
+
+
+def _stream_expiry(raw: dict[str, Any], default_ttl: float, now: float) -> float:
+    """Expiry for stream URLs: default TTL, capped by any signed 'expire' param."""
+    expires = now + default_ttl
+    formats = raw.get("formats")
+    for fmt in formats if isinstance(formats, list) else []:
+        stream_url = fmt.get("url") if isinstance(fmt, dict) else None
+        if not isinstance(stream_url, str) or "expire=" not in stream_url:
+            continue
+        try:
+            value = parse_qs(urlparse(stream_url).query).get("expire", [""])[0]
+            expires = min(expires, float(value) - 60)
+        except ValueError:
+            continue
+    return expires
+
+
+def _pack(data: Any) -> bytes:
+    return zlib.compress(json.dumps(data, default=str).encode("utf-8"))
+
+
+def _unpack(blob: bytes | None) -> Any:
+    if not blob:
+        return None
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class MetadataCache:
+    """
+    Thread-safe two-level metadata cache: an in-memory LRU in front of SQLite.
+    The on-disk store is bounded by entry count and evicted least-recently-used.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self,
+        db_file: str | None = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        static_ttl: float = STATIC_TTL_SECONDS,
+        stream_ttl: float = STREAM_TTL_SECONDS,
+    ):
+        self.db_file = db_file or DEFAULT_DB_FILE
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.static_ttl = static_ttl
+        self.stream_ttl = stream_ttl
+        self._lock = threading.RLock()
+        self._memory: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "stream_hits": 0, "stream_misses": 0}
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=5)
+        if not self._ready:
+            self._init_db(conn)
+        return conn
+
+    def _init_db(self, conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS media (
+                key TEXT PRIMARY KEY,
+                static_blob BLOB,
+                static_expires REAL,
+                streams_blob BLOB,
+                streams_expires REAL,
+                last_access REAL NOT NULL
+            )
+            """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_media_last_access ON media(last_access)"
+        )
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS aliases (
+                alias TEXT PRIMARY KEY,
+                key TEXT NOT NULL
+            )
+            """)
+        conn.commit()
+        self._ready = True
+
+    def _resolve_key(self, conn: sqlite3.Connection, url: str) -> str:
+        alias = canonical_url_key(url)
+        row = conn.execute(
+            "SELECT key FROM aliases WHERE alias = ?", (alias,)
+        ).fetchone()
+        return row[0] if row else alias
+
+    def _record(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        """Return cached static metadata for url, or None on miss/expiry."""
+        now = time.time()
+        alias = canonical_url_key(url)
+        with self._lock:
+            cached = self._memory.get(alias)
+            if cached and cached[0] > now:
+                self._memory.move_to_end(alias)
+                self._stats["hits"] += 1
+                return dict(cached[1])
+
+        try:
+            with self._connect() as conn:
+                key = self._resolve_key(conn, url)
+                row = conn.execute(
+                    "SELECT static_blob, static_expires FROM media WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if not row or not row[0] or (row[1] or 0) <= now:
+                    self._record("misses")
+                    return None
+                conn.execute(
+                    "UPDATE media SET last_access = ? WHERE key = ?", (now, key)
+                )
+                info = _unpack(row[0])
+        except (sqlite3.Error, OSError, ValueError, zlib.error) as e:
+            logger.warning("Metadata cache read failed: %s", e)
+            self._record("misses")
+            return None
+
+        self._remember(alias, row[1], info)
+        self._record("hits")
+        return dict(info)
+
+    def get_streams(self, url: str) -> dict[str, Any] | None:
+        """Return the cached raw extractor result while its stream URLs are valid."""
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                key = self._resolve_key(conn, url)
+                row = conn.execute(
+                    "SELECT streams_blob, streams_expires FROM media WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if not row or not row[0] or (row[1] or 0) <= now:
+                    self._record("stream_misses")
+                    return None
+                raw = _unpack(row[0])
+        except (sqlite3.Error, OSError, ValueError, zlib.error) as e:
+            logger.warning("Metadata cache stream read failed: %s", e)
+            self._record("stream_misses")
+            return None
+        self._record("stream_hits")
+        return raw
+
+    def put(
+        self, url: str, info: dict[str, Any], raw: dict[str, Any] | None = None
+    ) -> None:
+        """Store static metadata (and optionally the raw extractor result)."""
+        now = time.time()
+        alias = canonical_url_key(url)
+        key = media_key_from_info(raw) or alias
+        static_expires = now + self.static_ttl
+        streams_blob = None
+        streams_expires = None
+        if isinstance(raw, dict):
+            streams_blob = _pack(raw)
+            streams_expires = _stream_expiry(raw, self.stream_ttl, now)
+
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO media (key, static_blob, static_expires,
+                        streams_blob, streams_expires, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        static_blob = excluded.static_blob,
+                        static_expires = excluded.static_expires,
+                        streams_blob = COALESCE(excluded.streams_blob, streams_blob),
+                        streams_expires = COALESCE(
+                            excluded.streams_expires, streams_expires
+                        ),
+                        last_access = excluded.last_access
+                    """,
+                    (
+                        key,
+                        _pack(info),
+                        static_expires,
+                        streams_blob,
+                        streams_expires,
+                        now,
+                    ),
+                )
+                if key != alias:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO aliases (alias, key) VALUES (?, ?)",
+                        (alias, key),
+                    )
+                self._evict(conn, now)
+                conn.commit()
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            logger.warning("Metadata cache write failed: %s", e)
+
+        self._remember(alias, static_expires, info)
+
+    def _remember(self, alias: str, expires: float, info: dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[alias] = (expires, dict(info))
+            self._memory.move_to_end(alias)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        conn.execute("DELETE FROM media WHERE static_expires <= ?", (now,))
+        count = conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            # Trim an extra 10% so eviction does not run on every insert
+            excess += self.max_entries // 10
+            conn.execute(
+                "DELETE FROM media WHERE key IN "
+                "(SELECT key FROM media ORDER BY last_access ASC LIMIT ?)",
+                (excess,),
+            )
+        conn.execute("DELETE FROM aliases WHERE key NOT IN (SELECT key FROM media)")
+
+    def invalidate(self, url: str) -> None:
+        """Remove a single entry (e.g. when a download reports stale data)."""
+        alias = canonical_url_key(url)
+        with self._lock:
+            self._memory.pop(alias, None)
+        try:
+            with self._connect() as conn:
+                key = self._resolve_key(conn, url)
+                conn.execute("DELETE FROM media WHERE key = ?", (key,))
+                conn.execute("DELETE FROM aliases WHERE key = ?", (key,))
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Metadata cache invalidate failed: %s", e)
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._memory.clear()
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM media")
+                conn.execute("DELETE FROM aliases")
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Metadata cache clear failed: %s", e)
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters, hit rate and stored entry count."""
+        with self._lock:
+            stats: dict[str, Any] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        try:
+            with self._connect() as conn:
+                stats["entries"] = conn.execute(
+                    "SELECT COUNT(*) FROM media"
+                ).fetchone()[0]
+        except sqlite3.Error:
+            stats["entries"] = 0
+        return stats
+
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: MetadataCache | None = None  # pylint: disable=invalid-name
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Return the process-wide metadata cache, creating it on first use."""
+    global _CACHE  # pylint: disable=global-statement
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            directory = os.path.dirname(DEFAULT_DB_FILE)
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                logger.error("Failed to create metadata cache directory: %s", e)
+            _CACHE = MetadataCache()
+        return _CACHE
+
+
+def configure_metadata_cache(**kwargs: Any) -> MetadataCache:
+    """Apply size/TTL settings (max_entries, memory_entries, ...) to the cache."""
+    cache = get_metadata_cache()
+    for name, value in kwargs.items():
+        if value is not None and hasattr(cache, name):
+            setattr(cache, name, value)
+    return cache
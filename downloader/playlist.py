@@ -0,0 +1,202 @@
+"""
+Lazy playlist enumeration for queue fan-out.
+
+Playlists and channels are not downloaded inside a single job. Instead the
+parent job walks the playlist with flat extraction (no per-video metadata
+requests) and turns each entry into its own queue item, a page at a time.
+Enumerators are kept open between pages so large channels are never
+materialised in memory; if one is evicted it is reopened and skips ahead.
+Telegram channels are enumerated from their public web listing instead.
+"""
+
+import itertools
+import logging
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Iterator
+from typing import Any
+
+import yt_dlp
+
+from downloader.extractors.telegram import TelegramChannelEnumerator, TelegramExtractor
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 50
+MAX_OPEN_ENUMERATORS = 8
+MAX_NESTING = 3
+
+# Options that only affect downloading; irrelevant for flat enumeration
+_ENUMERATION_OPTIONS = (
+    "proxy",
+    "cookiesfrombrowser",
+    "nocheckcertificate",
+    "socket_timeout",
+)
+
+
+def flat_options(options: dict[str, Any] | None = None) -> dict[str, Any]:
+    """yt-dlp options for a flat, lazy walk of a playlist."""
+    flat: dict[str, Any] = {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        "extract_flat": "in_playlist",
+        "lazy_playlist": True,
+        "ignoreerrors": True,
+    }
+    for key in _ENUMERATION_OPTIONS:
+        if options and options.get(key) is not None:
+            flat[key] = options[key]
+    return flat
+
+
+def _slim_entry(entry: dict[str, Any]) -> dict[str, Any] | None:
+    """Keep just what a child queue item needs from a flat entry."""
+    url = entry.get("url") or entry.get("webpage_url")
+    if not isinstance(url, str) or not url:
+        return None
+    extractor = entry.get("ie_key") or entry.get("extractor_key")
+    media_id = entry.get("id")
+    return {
+        "url": url,
+        "title": entry.get("title") or url,
+        # Same "<extractor>:<id>" form as the metadata cache and download archive
+        "media_key": (
+            f"{str(extractor).lower()}:{media_id}" if extractor and media_id else None
+        ),
+        "duration": entry.get("duration"),
+    }
+
+
+class PlaylistEnumerator:
+    """Pages through a playlist's entries without holding them all."""
+
+    def __init__(self, url: str, options: dict[str, Any], offset: int = 0):
+        self.url = url
+        self.exhausted = False
+        flat = flat_options(options)
+        self._ydl: Any = yt_dlp.YoutubeDL(flat)  # type: ignore[arg-type]
+        self._pushed_back: deque[dict[str, Any]] = deque()
+        result = self._resolve(url) or {}
+        self.title: str | None = result.get("title")
+        self.is_playlist = result.get("_type") == "playlist"
+        self._entries = self._walk(result, 0) if self.is_playlist else iter(())
+        if offset:
+            # Reopened after eviction: skip what was already fanned out
+            next(itertools.islice(self._entries, offset, offset), None)
+
+    def _resolve(self, url: str, ie_key: str | None = None) -> dict[str, Any] | None:
+        result = self._ydl.extract_info(
+            url, download=False, process=False, ie_key=ie_key
+        )
+        for _ in range(MAX_NESTING):
+            if not result or result.get("_type") not in ("url", "url_transparent"):
+                break
+            result = self._ydl.extract_info(
+                result["url"],
+                download=False,
+                process=False,
+                ie_key=result.get("ie_key"),
+            )
+        return result
+
+    @staticmethod
+    def _iter_raw(entries: Any) -> Iterator[Any]:
+        if entries is None:
+            return
+        if hasattr(entries, "getslice"):
+            # yt-dlp PagedList: fetch one page of the site listing at a time
+            for start in itertools.count(0, PAGE_SIZE):
+                page = entries.getslice(start, start + PAGE_SIZE)
+                if not page:
+                    return
+                yield from page
+        else:
+            yield from entries
+
+    def _walk(self, result: dict[str, Any], depth: int) -> Iterator[dict[str, Any]]:
+        for entry in self._iter_raw(result.get("entries")):
+            if not isinstance(entry, dict):
+                continue
+            if entry.get("_type") == "playlist" and depth < MAX_NESTING:
+                # Channels list their tabs/seasons as nested playlists
+                yield from self._walk(entry, depth + 1)
+                continue
+            slim = _slim_entry(entry)
+            if slim:
+                yield slim
+
+    def next_page(self, size: int = PAGE_SIZE) -> list[dict[str, Any]]:
+        """Return up to size further entries; empty once the playlist is done."""
+        page: list[dict[str, Any]] = []
+        while self._pushed_back and len(page) < size:
+            page.append(self._pushed_back.popleft())
+        if len(page) < size and not self.exhausted:
+            fetched = list(itertools.islice(self._entries, size - len(page)))
+            if len(fetched) < size - len(page):
+                self.exhausted = True
+            page.extend(fetched)
+        return page
+
+    def push_back(self, entries: list[dict[str, Any]]) -> None:
+        """Return entries that could not be queued; they come out first next time."""
+        self._pushed_back.extendleft(reversed(entries))
+
+    @property
+    def done(self) -> bool:
+        """True once every entry has been handed out."""
+        return self.exhausted and not self._pushed_back
+
+    def close(self) -> None:
+        """Release the underlying YoutubeDL instance."""
+        try:
+            self._ydl.close()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug("Error closing playlist enumerator: %s", e)
+
+
+_lock = threading.Lock()
+Enumerator = PlaylistEnumerator | TelegramChannelEnumerator
+_open: "OrderedDict[str, Enumerator]" = OrderedDict()
+
+
+def open_enumerator(
+    key: str, url: str, options: dict[str, Any], offset: int = 0
+) -> Enumerator:
+    """Return the open enumerator for key, creating it at offset if needed."""
+    evicted: list[Enumerator] = []
+    with _lock:
+        current = _open.get(key)
+        if current is not None:
+            _open.move_to_end(key)
+            return current
+    enumerator: Enumerator
+    if TelegramExtractor.channel_name(url):
+        enumerator = TelegramChannelEnumerator(url, options, offset=offset)
+    else:
+        enumerator = PlaylistEnumerator(url, options, offset=offset)
+    with _lock:
+        _open[key] = enumerator
+        while len(_open) > MAX_OPEN_ENUMERATORS:
+            evicted.append(_open.popitem(last=False)[1])
+    for stale in evicted:
+        stale.close()
+    return enumerator
+
+
+def close_enumerator(key: str) -> None:
+    """Close and forget the enumerator for key, if any."""
+    with _lock:
+        enumerator = _open.pop(key, None)
+    if enumerator is not None:
+        enumerator.close()
+
+
+def close_all_enumerators() -> None:
+    """Close every open enumerator (application shutdown)."""
+    with _lock:
+        enumerators = list(_open.values())
+        _open.clear()
+    for enumerator in enumerators:
+        enumerator.close()
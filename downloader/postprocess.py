@@ -0,0 +1,206 @@
+"""
+Post-processing stage.
+
+FFmpeg work after a download (metadata, thumbnail and subtitle embedding,
+audio extraction, parallel chapter splitting) runs on this stage rather
+than on the download worker: the job hands its finished file over and
+returns, so an item in "Processing" no longer holds a network slot. The
+stage has its own pool sized by CPU count. On Linux its threads run at
+lower CPU and I/O priority, which the ffmpeg processes they start inherit,
+so downloads and the UI are not starved by transcodes.
+"""
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from downloader.chapters import chapter_cuts, run_cuts
+from downloader.engines.ydl_pool import get_ydl_pool
+
+logger = logging.getLogger(__name__)
+
+NICENESS = 10
+# Best-effort class at its lowest level; the idle class could starve entirely
+IONICE_ARGS = ("-c", "2", "-n", "7")
+
+# yt-dlp's stage for configured postprocessors without an explicit "when"
+_AFTER_DOWNLOAD = "post_process"
+_SPLIT_CHAPTERS = "FFmpegSplitChapters"
+
+
+def default_workers() -> int:
+    """Stage concurrency: ffmpeg is multi-threaded, so half the cores."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def split_deferred_postprocessors(ydl_opts: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Remove the postprocessors that run on the finished file from ydl_opts and
+    return them. Earlier stages (e.g. SponsorBlock's chapter lookup) stay.
+    """
+    kept: list[dict[str, Any]] = []
+    deferred: list[dict[str, Any]] = []
+    for pp in ydl_opts.get("postprocessors") or []:
+        if pp.get("when", _AFTER_DOWNLOAD) == _AFTER_DOWNLOAD:
+            deferred.append(pp)
+        else:
+            kept.append(pp)
+    if deferred:
+        ydl_opts["postprocessors"] = kept
+    return deferred
+
+
+@dataclass
+class PostProcessJob:
+    """A downloaded file waiting for its postprocessors."""
+
+    filepath: str
+    info: dict[str, Any]
+    postprocessors: list[dict[str, Any]]
+    # yt-dlp options of the download (ffmpeg args, output template, ...)
+    params: dict[str, Any] = field(default_factory=dict)
+
+    def run(self, cancel_token: Any | None = None) -> dict[str, Any]:
+        """
+        Run the postprocessors; returns the updated info dict. cancel_token
+        stops chapter cuts that have not started yet.
+        """
+        params = {k: v for k, v in self.params.items() if not k.endswith("_hooks")}
+        # Chapters are cut in parallel from the final file instead of by
+        # yt-dlp's splitter, one after another
+        params["postprocessors"] = [
+            pp for pp in self.postprocessors if pp.get("key") != _SPLIT_CHAPTERS
+        ]
+        split = len(params["postprocessors"]) != len(self.postprocessors)
+        with get_ydl_pool().checkout(params) as ydl:
+            info = ydl.post_process(self.filepath, self.info)
+            if split:
+                self._split_chapters(ydl, info, cancel_token)
+        return info
+
+    def _split_chapters(
+        self, ydl: Any, info: dict[str, Any], cancel_token: Any | None
+    ) -> None:
+        chapters = info.get("chapters") or []
+        if not chapters:
+            logger.info("No chapter information for %s", info.get("filepath"))
+            return
+
+        def _name(number: int, chapter: dict[str, Any]) -> str:
+            # yt-dlp's "chapter" output template, as its own splitter uses
+            section = {
+                "section_number": number,
+                "section_title": chapter.get("title"),
+                "section_start": chapter.get("start_time"),
+                "section_end": chapter.get("end_time"),
+            }
+            return ydl.prepare_filename({**info, **section}, "chapter")
+
+        try:
+            run_cuts(
+                info["filepath"],
+                chapter_cuts(chapters, _name),
+                cancel_token=cancel_token,
+            )
+        except (OSError, RuntimeError) as e:
+            if not self.params.get("ignoreerrors"):
+                raise
+            # Like yt-dlp with ignoreerrors: keep the full file, report the split
+            logger.error("Chapter splitting failed for %s: %s", info["filepath"], e)
+
+
+def lower_thread_priority() -> None:
+    """
+    Lower the calling thread's CPU and I/O priority. Linux schedules threads
+    individually and a child process inherits the priority of the thread that
+    started it; elsewhere this would slow the whole app, so it is skipped.
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    tid = threading.get_native_id()
+    try:
+        current = os.getpriority(os.PRIO_PROCESS, tid)
+        os.setpriority(os.PRIO_PROCESS, tid, max(current, NICENESS))
+    except OSError as e:
+        logger.debug("Could not lower post-processing CPU priority: %s", e)
+
+    ionice = shutil.which("ionice")
+    if not ionice:
+        return
+    try:
+        subprocess.run(
+            [ionice, *IONICE_ARGS, "-p", str(tid)],
+            check=False,
+            capture_output=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("Could not lower post-processing I/O priority: %s", e)
+
+
+class PostProcessStage:
+    """Bounded, low-priority pool that runs PostProcessJobs."""
+
+    def __init__(self, max_workers: int | None = None):
+        self.max_workers = max(1, max_workers or default_workers())
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="PostProcess",
+            initializer=lower_thread_priority,
+        )
+
+    @staticmethod
+    def _run(job: PostProcessJob, cancel_token: Any | None) -> dict[str, Any]:
+        if cancel_token is not None:
+            cancel_token.check()  # cancelled while waiting for a slot
+        return job.run(cancel_token)
+
+    def submit(
+        self, job: PostProcessJob, cancel_token: Any | None = None
+    ) -> "Future[dict[str, Any]]":
+        """Queue a job; the future resolves to the post-processed info dict."""
+        return self._executor.submit(self._run, job, cancel_token)
+
+    def shutdown(self) -> None:
+        """Drop queued jobs; running ffmpeg processes finish on their own."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_lock = threading.Lock()
+_STAGE: PostProcessStage | None = None
+_CONFIGURED_WORKERS: int | None = None
+
+
+def configure_postprocess_stage(max_workers: int | None = None) -> None:
+    """Set the stage size (None: by CPU count); replaces any existing pool."""
+    global _STAGE, _CONFIGURED_WORKERS  # pylint: disable=global-statement
+    with _lock:
+        previous, _STAGE = _STAGE, None
+        _CONFIGURED_WORKERS = max_workers or None
+    if previous is not None:
+        previous.shutdown()
+
+
+def get_postprocess_stage() -> PostProcessStage:
+    """The shared stage, created on first use."""
+    global _STAGE  # pylint: disable=global-statement
+    with _lock:
+        if _STAGE is None:
+            _STAGE = PostProcessStage(_CONFIGURED_WORKERS)
+            logger.info("Post-processing stage: %d workers", _STAGE.max_workers)
+        return _STAGE
+
+
+def shutdown_postprocess_stage() -> None:
+    """Stop the stage (application shutdown)."""
+    global _STAGE  # pylint: disable=global-statement
+    with _lock:
+        stage, _STAGE = _STAGE, None
+    if stage is not None:
+        stage.shutdown()
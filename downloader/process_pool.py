@@ -0,0 +1,360 @@
+"""
+Optional process-pool execution backend.
+
+yt-dlp extraction (pure-Python parsing, JS signature solving, format sorting)
+normally runs in threads of the app process and competes with the Flet UI
+for the GIL; a pathological extractor can stall everything. When enabled,
+``download_video`` and ``get_video_info`` run in worker processes instead.
+
+A job is a module-level function ``job(payload, progress_hook,
+cancel_token)``, sent to the worker by reference, so this module does not
+depend on the code it runs. Disk reservations and staging stay with the
+app process; workers only run the download engines.
+
+Each worker owns one end of a duplex pipe. The parent sends a job, then
+relays ``progress`` messages to the job's progress hook and forwards
+cancellation as a ``cancel`` message; the worker answers with ``result`` or
+``error``. A worker that ignores cancellation or exceeds the timeout is
+killed. Workers exit after ``max_jobs`` jobs to bound memory and are replaced
+on demand, up to one per CPU core.
+"""
+
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+from typing import Any
+
+from utils import CancelToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_JOBS_PER_WORKER = 25
+# Seconds a worker gets to stop after a cancel before it is killed
+CANCEL_GRACE_SECONDS = 5.0
+_POLL_INTERVAL = 0.1
+
+# job(payload, progress_hook, cancel_token); must be picklable (module-level)
+WorkerJob = Callable[[Any, Callable[[dict[str, Any]], None], CancelToken], Any]
+
+# Progress fields the app uses; yt-dlp's hook dict also carries the whole
+# info_dict, which is large and not always picklable
+_PROGRESS_FIELDS = (
+    "status",
+    "downloaded_bytes",
+    "total_bytes",
+    "total_bytes_estimate",
+    "speed",
+    "eta",
+    "elapsed",
+    "filename",
+    "_percent_str",
+    "_speed_str",
+    "_eta_str",
+    "_total_bytes_str",
+)
+
+# True inside worker processes, so the public entry points run locally there
+_IN_WORKER = False
+
+
+def in_worker() -> bool:
+    """Whether this code runs inside a backend worker process."""
+    return _IN_WORKER
+
+
+def _progress_fields(d: dict[str, Any]) -> dict[str, Any]:
+    return {k: d[k] for k in _PROGRESS_FIELDS if k in d}
+
+
+def _picklable_error(exc: BaseException) -> BaseException:
+    try:
+        # Round trip: some exceptions pickle but fail to rebuild
+        pickle.loads(pickle.dumps(exc))
+        return exc
+    except Exception:  # pylint: disable=broad-exception-caught
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+
+
+def _run_job(
+    job: WorkerJob, payload: Any, conn: Connection, cancel: CancelToken
+) -> Any:
+    def _progress(d: dict[str, Any]) -> None:
+        conn.send(("progress", _progress_fields(d)))
+
+    return job(payload, _progress, cancel)
+
+
+def _worker_main(conn: Connection, max_jobs: int) -> None:
+    """Worker process loop: run up to max_jobs jobs, then exit."""
+    global _IN_WORKER  # pylint: disable=global-statement
+    _IN_WORKER = True
+
+    jobs = 0
+    while jobs < max_jobs:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message[0] == "stop":
+            return
+        if message[0] == "cancel":
+            continue  # arrived after its job had already finished
+
+        jobs += 1
+        job, payload = message
+        cancel = CancelToken()
+        finished = threading.Event()
+
+        def _listen(token: CancelToken = cancel, done: threading.Event = finished):
+            # Only the cancel message can arrive while a job runs
+            while not done.is_set():
+                try:
+                    if not conn.poll(_POLL_INTERVAL):
+                        continue
+                    message = conn.recv()
+                    if message[0] == "cancel":
+                        # The flag says whether partial files must be kept
+                        if message[1]:
+                            token.suspend()
+                        else:
+                            token.cancel()
+                except (EOFError, OSError):
+                    token.cancel()
+                    return
+
+        listener = threading.Thread(target=_listen, daemon=True)
+        listener.start()
+        try:
+            reply: tuple[str, Any] = ("result", _run_job(job, payload, conn, cancel))
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            reply = ("error", _picklable_error(e))
+        finally:
+            finished.set()
+            listener.join()
+        try:
+            conn.send(reply)
+        except (EOFError, OSError):
+            return  # parent gave up on this worker
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            conn.send(("error", RuntimeError(f"Unsendable job result: {e}")))
+
+
+class _Worker:
+    # pylint: disable=too-few-public-methods
+    __slots__ = ("process", "conn", "jobs")
+
+    def __init__(self, process: Any, conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class ProcessBackend:
+    """Pool of worker processes for extraction and download jobs."""
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+    ):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.max_jobs_per_worker = max(1, max_jobs_per_worker)
+        # spawn: forking a process with UI and worker threads is unsafe
+        self._ctx = multiprocessing.get_context("spawn")
+        self._cond = threading.Condition()
+        self._idle: list[_Worker] = []
+        self._busy = 0
+        self._closed = False
+        self._stats = {"jobs": 0, "spawned": 0, "recycled": 0, "killed": 0}
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_jobs_per_worker),
+            daemon=True,
+            name="StreamCatchWorker",
+        )
+        process.start()
+        child_conn.close()
+        with self._cond:
+            self._stats["spawned"] += 1
+        return _Worker(process, parent_conn)
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Process backend is shut down")
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.process.is_alive():
+                        self._busy += 1
+                        return worker
+                    worker.conn.close()
+                if self._busy < self.max_workers:
+                    self._busy += 1
+                    break
+                self._cond.wait()
+        try:
+            return self._spawn()
+        except BaseException:
+            with self._cond:
+                self._busy -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        retire = False
+        with self._cond:
+            self._busy -= 1
+            worker.jobs += 1
+            self._stats["jobs"] += 1
+            if not healthy:
+                retire = True
+            elif worker.jobs >= self.max_jobs_per_worker or self._closed:
+                # The worker exits on its own after max_jobs; reap it
+                self._stats["recycled"] += 1
+                retire = True
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+        if retire:
+            self._discard(worker, graceful=healthy)
+
+    def _discard(self, worker: _Worker, graceful: bool = False) -> None:
+        if graceful:
+            try:
+                worker.conn.send(("stop", None))
+            except (OSError, ValueError):
+                pass
+            worker.process.join(timeout=1.0)
+        if worker.process.is_alive():
+            with self._cond:
+                self._stats["killed"] += 1
+            worker.process.kill()
+            worker.process.join(timeout=1.0)
+        worker.conn.close()
+
+    def run(
+        self,
+        job: WorkerJob,
+        payload: Any,
+        progress_hook: Any | None = None,
+        cancel_token: Any | None = None,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Run job(payload, ...) in a worker and return its result (or raise its
+        error). Blocks the calling thread; progress is relayed on that thread.
+        """
+        worker = self._acquire()
+        healthy = False
+        try:
+            tag, value = self._exchange(
+                worker, (job, payload), progress_hook, cancel_token, timeout
+            )
+            healthy = True
+        finally:
+            self._release(worker, healthy)
+        if tag == "error":
+            raise value
+        return value
+
+    def _exchange(
+        self,
+        worker: _Worker,
+        job: tuple[WorkerJob, Any],
+        progress_hook: Any | None,
+        cancel_token: Any | None,
+        timeout: float | None,
+    ) -> tuple[str, Any]:
+        started = time.monotonic()
+        cancel_sent_at: float | None = None
+        try:
+            worker.conn.send(job)
+            while True:
+                now = time.monotonic()
+                if cancel_sent_at is None and getattr(cancel_token, "cancelled", False):
+                    suspended = bool(getattr(cancel_token, "suspended", False))
+                    worker.conn.send(("cancel", suspended))
+                    cancel_sent_at = now
+                if cancel_sent_at is not None:
+                    if now - cancel_sent_at > CANCEL_GRACE_SECONDS:
+                        raise InterruptedError("Download Cancelled by user")
+                elif timeout is not None and now - started > timeout:
+                    raise TimeoutError(f"Worker job timed out after {timeout:g}s")
+
+                if not worker.conn.poll(_POLL_INTERVAL):
+                    if not worker.process.is_alive():
+                        raise RuntimeError(
+                            f"Worker process died (exit code {worker.process.exitcode})"
+                        )
+                    continue
+
+                tag, value = worker.conn.recv()
+                if tag != "progress":
+                    return tag, value
+                if progress_hook and cancel_sent_at is None:
+                    try:
+                        progress_hook(value)
+                    except InterruptedError:
+                        worker.conn.send(("cancel", None))
+                        cancel_sent_at = time.monotonic()
+        except (InterruptedError, TimeoutError):
+            raise  # OSError subclasses, but raised here rather than by the pipe
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Lost connection to worker process: {e}") from e
+
+    def stats(self) -> dict[str, int]:
+        """Job/worker counters."""
+        with self._cond:
+            return {**self._stats, "idle": len(self._idle), "busy": self._busy}
+
+    def shutdown(self) -> None:
+        """Stop idle workers; busy ones are reaped when their job returns."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            self._discard(worker, graceful=True)
+
+
+_lock = threading.Lock()
+_BACKEND: ProcessBackend | None = None
+
+
+def configure_process_backend(
+    enabled: bool,
+    max_workers: int | None = None,
+    max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+) -> None:
+    """Enable (or disable) the process backend; replaces any existing pool."""
+    global _BACKEND  # pylint: disable=global-statement
+    backend = (
+        ProcessBackend(max_workers or None, max_jobs_per_worker) if enabled else None
+    )
+    with _lock:
+        previous, _BACKEND = _BACKEND, backend
+    if previous is not None:
+        previous.shutdown()
+    if backend is not None:
+        logger.info("Process backend enabled (%d workers)", backend.max_workers)
+
+
+def get_process_backend() -> ProcessBackend | None:
+    """The active process backend, or None when jobs should run in-process."""
+    if _IN_WORKER:
+        return None
+    return _BACKEND
+
+
+def shutdown_process_backend() -> None:
+    """Stop all workers (application shutdown)."""
+    configure_process_backend(False)
@@ -0,0 +1,193 @@
+"""
+Local staging area for downloads.
+
+With a staging directory configured (e.g. a tmpfs or local SSD while
+``download_path`` is a network share), a job downloads, merges and
+post-processes in its own directory below it, where fragment writes,
+``.part`` files and ffmpeg's random I/O are cheap. Only the finished files
+are then moved to the output path: a rename when both are on one volume,
+otherwise one sequential copy into a temporary name that is renamed into
+place. Jobs reserve their expected size against the staging capacity; a
+job that does not fit downloads straight to the output path instead. A job
+suspended at shutdown keeps its directory, which is keyed by the queue item,
+so the resumed download finds its partial files again.
+"""
+
+import errno
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from downloader.disk_ledger import MIB, get_disk_ledger
+
+logger = logging.getLogger(__name__)
+
+# Leftovers of an interrupted transfer; never published
+_PARTIAL_SUFFIXES = (".part", ".ytdl", ".aria2")
+
+
+def move_file(source: str, destination: str) -> None:
+    """
+    Move source to destination atomically: a rename on the same volume,
+    else a sequential copy to a temporary name next to destination that is
+    renamed over it.
+    """
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    try:
+        os.replace(source, destination)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    partial = f"{destination}.staging"
+    try:
+        shutil.copyfile(source, partial)
+        shutil.copystat(source, partial)
+        os.replace(partial, destination)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    os.remove(source)
+
+
+@dataclass
+class StagedJob:
+    """One job's staging directory and where its files finally go."""
+
+    key: str
+    directory: str
+    destination: str
+    area: "StagingArea"
+    # Set when publishing failed: the directory may hold the only finished copy
+    kept: bool = False
+
+    def publish(self, result: dict[str, Any]) -> dict[str, Any]:
+        """
+        Move every finished file to the same relative path below the
+        destination, point result's filepath at the moved file and release
+        the staging space. If a move fails, the files not moved yet stay in
+        the staging directory and the error is raised.
+        """
+        moved: dict[str, str] = {}
+        try:
+            for dirpath, _, filenames in os.walk(self.directory):
+                for name in filenames:
+                    if name.endswith(_PARTIAL_SUFFIXES) or ".part-Frag" in name:
+                        continue
+                    source = os.path.join(dirpath, name)
+                    relative = os.path.relpath(source, self.directory)
+                    target = os.path.join(self.destination, relative)
+                    move_file(source, target)
+                    moved[os.path.abspath(source)] = target
+        except BaseException as e:
+            self.kept = True
+            self.area.release(self.key)
+            logger.error(
+                "Could not move staged files to %s (%s); they are kept in %s",
+                self.destination,
+                e,
+                self.directory,
+            )
+            raise
+        self.discard()
+
+        filepath = result.get("filepath")
+        if filepath and os.path.abspath(filepath) in moved:
+            result["filepath"] = moved[os.path.abspath(filepath)]
+            result["filename"] = os.path.basename(result["filepath"])
+        logger.info("Moved %d staged file(s) to %s", len(moved), self.destination)
+        return result
+
+    def discard(self) -> None:
+        """Delete whatever is left in the staging directory and free its space."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.area.release(self.key)
+
+    def abandon(self, cancel_token: Any | None = None) -> None:
+        """
+        Give up on a failed or cancelled job: discard it, or only free its
+        space when the token was suspended so a resumed job can continue (or
+        publishing failed, so the finished files are not lost).
+        """
+        if self.kept:
+            return  # space already released by publish
+        if getattr(cancel_token, "suspended", False):
+            logger.info("Keeping suspended staging directory %s", self.directory)
+            self.area.release(self.key)
+        else:
+            self.discard()
+
+
+class StagingArea:
+    """Per-job directories below root, within a total capacity."""
+
+    def __init__(self, root: str, capacity_bytes: int = 0):
+        self.root = os.path.abspath(root)
+        self.capacity_bytes = capacity_bytes
+        self._lock = threading.Lock()
+        # Expected bytes per job; the files themselves may not exist yet
+        self._held: dict[str, int] = {}
+
+    def acquire(
+        self,
+        destination: str,
+        info: dict[str, Any] | None = None,
+        key: str | None = None,
+    ) -> StagedJob | None:
+        """
+        A staging directory for a job writing to destination, or None if the
+        job's expected size does not fit (it then works in place). Jobs with
+        a key (the queue item id) reuse the directory left by a suspended run.
+        """
+        nbytes, _ = get_disk_ledger().estimate(info)
+        key = re.sub(r"[^A-Za-z0-9_-]", "_", key) if key else uuid.uuid4().hex
+        directory = os.path.join(self.root, key)
+        with self._lock:
+            held = sum(self._held.values())
+            if self.capacity_bytes and held + nbytes > self.capacity_bytes:
+                logger.info("Staging area full, downloading in place")
+                return None
+            resumed = os.path.isdir(directory)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                free = shutil.disk_usage(directory).free
+            except OSError as e:
+                logger.warning("Not staging download: %s", e)
+                if not resumed:
+                    shutil.rmtree(directory, ignore_errors=True)
+                return None
+            # Other jobs' staged files may not be written yet
+            if held + nbytes > free:
+                if not resumed:
+                    os.rmdir(directory)
+                logger.info("Not enough free staging space, downloading in place")
+                return None
+            self._held[key] = nbytes
+        return StagedJob(key, directory, destination, self)
+
+    def release(self, key: str) -> None:
+        """Return a job's share of the capacity."""
+        with self._lock:
+            self._held.pop(key, None)
+
+
+_lock = threading.Lock()
+_AREA: StagingArea | None = None
+
+
+def configure_staging(root: str | None, capacity_mb: int = 0) -> None:
+    """Enable staging below root (None or "" disables it); 0 MB: no cap."""
+    global _AREA  # pylint: disable=global-statement
+    with _lock:
+        _AREA = StagingArea(root, capacity_mb * MIB) if root else None
+
+
+def get_staging_area() -> StagingArea | None:
+    """The configured staging area, if any."""
+    with _lock:
+        return _AREA
@@ -58,6 +58,10 @@ class DownloadOptions:
     download_item: dict[str, Any] | None = None
     filename: str | None = None
     no_check_certificate: bool = False
+    # Extractor result (or HEAD result) from the metadata lookup, if still valid
+    prefetched_info: dict[str, Any] | None = None
+    # Return ffmpeg postprocessing as a PostProcessJob instead of running it
+    defer_postprocessing: bool = False
 
     def validate(self):
         """Perform validation on the options."""
@@ -162,6 +166,9 @@ class DownloadResult(TypedDict, total=False):
     size: int | float
     type: Literal["video", "playlist", "audio"]
     entries: int  # For playlists
+    media_key: str | None  # "<extractor>:<id>", recorded in the download archive
+    content_hash: str | None  # sha256 of the file, for duplicate detection
+    duplicate_of: str  # existing identical file this one was linked to/skipped for
 
 
 class QueueItem(TypedDict, total=False):
@@ -216,5 +223,20 @@ class QueueItem(TypedDict, total=False):
     filepath: str
     filename: str
     control_ref: Any  # weakref to UI control
+    prefetched_info: dict[str, Any] | None  # resolved info reused by the engine
+    media_key: str | None  # "<extractor>:<id>" when known (download archive)
+    checkpoint: dict[str, Any]  # engine progress, saved if the app shuts down
+    # Playlist fan-out
+    parent_id: str  # set on entries queued by a playlist parent
+    playlist_total: int  # parent: entries queued so far
+    playlist_offset: int  # parent: enumerator entries queued or skipped so far
+    playlist_done: int
+    playlist_failed: int
+    playlist_enumerated: bool  # parent: no more entries to queue
+    _expanding: bool
+    _postprocessing: bool  # in the post-processing stage (no download slot)
+    _dedup_key: tuple[Any, ...]  # media id and output options, for merging
+    _merged_into: str  # id of the in-flight item downloading the same media
+    _settled: bool
     _allocated_at: datetime
     _was_queued: bool
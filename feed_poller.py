@@ -0,0 +1,327 @@
+"""
+Background feed polling.
+
+Every subscribed feed has its own schedule: the interval follows how often
+the feed publishes (a few polls per typical gap between its entries,
+within the configured bounds) and backs off exponentially while fetches
+fail. Polls go through RSSManager.refresh_feed, so unchanged feeds cost a
+conditional GET and the view reads the refreshed item store.
+
+A persistent index of seen entry ids tells which items are new. On feeds
+with ``auto_download`` set, new items that pass the feed's ``include`` /
+``exclude`` keywords and are not in the download archive are queued.
+"""
+
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any
+
+from rss_manager import RSSManager, feed_time
+from ui_utils import get_default_download_path
+
+logger = logging.getLogger(__name__)
+
+SEEN_INDEX_FILE = os.path.expanduser("~/.streamcatch/feed_seen.json")
+# Entry ids remembered per feed; feeds list far fewer at a time
+MAX_SEEN_PER_FEED = 500
+DEFAULT_MIN_INTERVAL = 10 * 60.0
+DEFAULT_MAX_INTERVAL = 12 * 3600.0
+# Polls per typical gap between a feed's entries
+POLLS_PER_PUBLISH = 4
+# Spreads feeds with equal intervals apart
+JITTER = 0.1
+
+
+def _keywords(value: Any) -> list[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [str(k).strip().lower() for k in value if str(k).strip()]
+
+
+def matches_filters(item: dict[str, Any], feed: dict[str, Any]) -> bool:
+    """
+    Whether an item's title passes the feed's filters: any of the
+    comma-separated ``include`` keywords (if set) and none of ``exclude``.
+    """
+    title = str(item.get("title") or "").lower()
+    include = _keywords(feed.get("include"))
+    if include and not any(k in title for k in include):
+        return False
+    return not any(k in title for k in _keywords(feed.get("exclude")))
+
+
+def feed_download_item(
+    item: dict[str, Any], feed: dict[str, Any], config: dict[str, Any]
+) -> dict[str, Any]:
+    """Queue item for a feed entry, with the configured download options."""
+    return {
+        "url": item["link"],
+        "title": item.get("title") or item["link"],
+        "video_format": feed.get("video_format") or "best",
+        "output_path": get_default_download_path(config.get("download_path")),
+        "output_template": config.get("output_template"),
+        "use_aria2c": config.get("use_aria2c", False),
+        "gpu_accel": config.get("gpu_accel", "None"),
+        "proxy": config.get("proxy") or None,
+        "rate_limit": config.get("rate_limit") or None,
+    }
+
+
+def publish_interval(
+    items: list[dict[str, Any]], min_interval: float, max_interval: float
+) -> float:
+    """
+    Poll interval for a feed from the median gap between its entries'
+    publish times; the upper bound when there are too few dated entries.
+    """
+    parsed = (feed_time(item.get("published")) for item in items)
+    times = sorted((t.timestamp() for t in parsed if t), reverse=True)[:20]
+    gaps = [a - b for a, b in zip(times, times[1:]) if a > b]
+    if not gaps:
+        return max_interval
+    interval = statistics.median(gaps) / POLLS_PER_PUBLISH
+    return min(max(interval, min_interval), max_interval)
+
+
+class SeenIndex:
+    """Entry ids already seen per feed, persisted as JSON."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or SEEN_INDEX_FILE
+        self._lock = threading.Lock()
+        self._seen: dict[str, list[str]] = {}
+        self._dirty = False
+        self._loaded = False
+
+    def load(self) -> None:
+        """Load the persisted index (once)."""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable feed seen index: %s", e)
+                return
+            if isinstance(data, dict):
+                for url, ids in data.items():
+                    if isinstance(url, str) and isinstance(ids, list):
+                        self._seen[url] = [i for i in ids if isinstance(i, str)]
+
+    def new_items(
+        self, feed_url: str, items: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Items not seen before, which are marked seen. A feed's first poll
+        only records its backlog, so subscribing never floods the queue.
+        """
+        self.load()
+        keys = [str(i.get("entry_id") or i.get("link")) for i in items]
+        with self._lock:
+            known = self._seen.get(feed_url)
+            seen = set(known or ())
+            new = [i for i, k in zip(items, keys) if k not in seen]
+            if known is None or new:
+                fresh = [k for k in keys if k not in seen]
+                self._seen[feed_url] = (fresh + (known or []))[:MAX_SEEN_PER_FEED]
+                self._dirty = True
+        return new if known is not None else []
+
+    def forget(self, feed_urls: set[str]) -> None:
+        """Drop every feed but feed_urls (e.g. after unsubscribing)."""
+        with self._lock:
+            for url in set(self._seen) - feed_urls:
+                del self._seen[url]
+                self._dirty = True
+
+    def save(self) -> None:
+        """Atomically persist the index if it changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._seen)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(
+                dir=directory, prefix=".feed_seen_", suffix=".json"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Failed to save feed seen index: %s", e)
+
+
+@dataclass
+class FeedSchedule:
+    """When a feed is next polled and how its interval evolved."""
+
+    next_poll: float
+    interval: float
+    failures: int = 0
+
+
+class FeedPoller:
+    """Polls each feed on its own adaptive schedule in a daemon thread."""
+
+    def __init__(
+        self,
+        rss_manager: RSSManager,
+        enqueue: Callable[[dict[str, Any]], None] | None = None,
+        history_manager: Any = None,
+        config: dict[str, Any] | None = None,
+        seen_index: SeenIndex | None = None,
+    ):
+        self.rss_manager = rss_manager
+        self.enqueue = enqueue
+        self.history_manager = history_manager
+        self.config = config if config is not None else {}
+        self.seen = seen_index or SeenIndex()
+        self.min_interval = (
+            float(self.config.get("rss_poll_min_minutes") or 0) * 60
+            or DEFAULT_MIN_INTERVAL
+        )
+        self.max_interval = max(
+            float(self.config.get("rss_poll_max_minutes") or 0) * 60
+            or DEFAULT_MAX_INTERVAL,
+            self.min_interval,
+        )
+        self.workers = int(self.config.get("rss_poll_workers") or 4)
+        self._schedules: dict[str, FeedSchedule] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call callback (from the poller thread) after a round of polls."""
+        self._listeners.append(callback)
+
+    def start(self) -> None:
+        """Start polling in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, daemon=True, name="FeedPoller"
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the polling thread."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self.seen.save()
+
+    def poll_now(self) -> None:
+        """Make every feed due and wake the poller."""
+        with self._lock:
+            for schedule in self._schedules.values():
+                schedule.next_poll = 0.0
+        self._wake.set()
+
+    def _due_feeds(self, now: float) -> list[dict[str, Any]]:
+        feeds = self.rss_manager.get_feeds()
+        urls = {f["url"] for f in feeds}
+        with self._lock:
+            for url in set(self._schedules) - urls:
+                del self._schedules[url]
+            for url in urls - set(self._schedules):
+                self._schedules[url] = FeedSchedule(now, self.min_interval)
+            due = [f for f in feeds if self._schedules[f["url"]].next_poll <= now]
+        self.seen.forget(urls)
+        return due
+
+    def _next_wait(self, now: float) -> float:
+        with self._lock:
+            upcoming = [s.next_poll for s in self._schedules.values()]
+        return max(0.0, min(upcoming) - now) if upcoming else self.max_interval
+
+    def _loop(self) -> None:
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="FeedPoll"
+        ) as pool:
+            while not self._stop.is_set():
+                self._wake.clear()
+                try:
+                    due = self._due_feeds(time.monotonic())
+                    if due:
+                        wait([pool.submit(self.poll_feed, feed) for feed in due])
+                        self.rss_manager.flush_feed_names()
+                        self.seen.save()
+                        self._notify_listeners()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.error("Feed poller error: %s", e)
+                self._wake.wait(self._next_wait(time.monotonic()))
+
+    def _notify_listeners(self) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                logger.debug("Feed listener error: %s", e)
+
+    def _reschedule(self, url: str, interval: float | None) -> None:
+        """Schedule the next poll; None backs off after a failure."""
+        with self._lock:
+            schedule = self._schedules.get(url)
+            if schedule is None:
+                return
+            if interval is None:
+                schedule.failures += 1
+                delay = min(schedule.interval * 2**schedule.failures, self.max_interval)
+            else:
+                schedule.failures = 0
+                schedule.interval = delay = interval
+            delay *= random.uniform(1 - JITTER, 1 + JITTER)
+            schedule.next_poll = time.monotonic() + delay
+
+    def poll_feed(self, feed: dict[str, Any]) -> list[dict[str, Any]]:
+        """Refresh one feed and queue its new items if wanted; returns them."""
+        url = feed["url"]
+        try:
+            items = self.rss_manager.refresh_feed(url)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Polling feed %s failed: %s", url, e)
+            self._reschedule(url, None)
+            return []
+        self._reschedule(
+            url, publish_interval(items, self.min_interval, self.max_interval)
+        )
+
+        new = self.seen.new_items(url, items)
+        if new:
+            logger.info("%d new item(s) in feed %s", len(new), feed.get("name", url))
+        if new and feed.get("auto_download") and self.enqueue:
+            wanted = [i for i in new if i.get("link") and matches_filters(i, feed)]
+            # Oldest first, as they were published
+            for item in reversed(
+                RSSManager.unarchived_items(wanted, self.history_manager)
+            ):
+                try:
+                    self.enqueue(feed_download_item(item, feed, self.config))
+                except ValueError as e:
+                    logger.warning("Could not queue %s: %s", item.get("link"), e)
+        return new
@@ -0,0 +1,169 @@
+"""
+Download archive.
+
+Media already downloaded, keyed ``<extractor>:<id>`` (or by canonical URL),
+so playlist and feed entries can be skipped without any network request.
+The archive is a table of the history database.
+"""
+
+import logging
+import sqlite3
+from collections.abc import Callable
+from typing import Any
+
+from downloader.metadata_cache import canonical_url_key
+
+logger = logging.getLogger(__name__)
+
+# Row-value lookups per query when checking the download archive
+_LOOKUP_CHUNK = 400
+
+
+def archive_keys(url: str | None = None, media_key: str | None = None) -> list[str]:
+    """
+    Download archive keys (``<extractor>:<id>``) identifying a media item.
+
+    The extractor's own id is preferred; the canonical URL key is added so
+    items known only by URL (RSS links, pasted URLs) match as well.
+    """
+    keys: list[str] = []
+    if media_key and ":" in media_key:
+        extractor, _, video_id = media_key.partition(":")
+        keys.append(f"{extractor.lower()}:{video_id}")
+    if url:
+        url_key = canonical_url_key(url)
+        if url_key and url_key not in keys:
+            keys.append(url_key if ":" in url_key else f"url:{url_key}")
+    return keys
+
+
+def _split_archive_key(key: str) -> tuple[str, str]:
+    extractor, _, video_id = key.partition(":")
+    return extractor.lower(), video_id
+
+
+def create_download_archive(conn: sqlite3.Connection) -> None:
+    """Create the archive table, seeded from completed downloads in history."""
+    logger.info("Adding download archive to history database...")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS download_archive (
+            extractor TEXT NOT NULL,
+            video_id TEXT NOT NULL,
+            url TEXT,
+            title TEXT,
+            filepath TEXT,
+            added_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (extractor, video_id)
+        ) WITHOUT ROWID
+        """)
+    # Seed from completed downloads already in history (by URL)
+    rows = conn.execute(
+        "SELECT url, title, filepath FROM history WHERE status = 'Completed'"
+    ).fetchall()
+    conn.executemany(
+        "INSERT OR IGNORE INTO download_archive "
+        "(extractor, video_id, url, title, filepath) VALUES (?, ?, ?, ?, ?)",
+        [
+            (*_split_archive_key(key), url, title, filepath)
+            for url, title, filepath in rows
+            for key in archive_keys(url)
+        ],
+    )
+
+
+class DownloadArchiveMixin:
+    """Download archive methods of HistoryManager."""
+
+    _get_connection: Callable[[], sqlite3.Connection]
+
+    def add_to_archive(
+        self,
+        keys: list[str],
+        url: str | None = None,
+        title: str | None = None,
+        filepath: str | None = None,
+    ) -> None:
+        """Record a downloaded media item under each of its archive keys."""
+        if not keys:
+            return
+        try:
+            with self._get_connection() as conn:
+                conn.executemany(
+                    """
+                    INSERT INTO download_archive
+                        (extractor, video_id, url, title, filepath)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(extractor, video_id) DO UPDATE SET
+                        url = excluded.url,
+                        title = COALESCE(excluded.title, title),
+                        filepath = COALESCE(excluded.filepath, filepath)
+                    """,
+                    [(*_split_archive_key(k), url, title, filepath) for k in keys],
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Failed to update download archive: %s", e)
+
+    def archived_keys(self, keys: list[str]) -> set[str]:
+        """Return the subset of keys present in the download archive."""
+        found: set[str] = set()
+        unique = list(dict.fromkeys(keys))
+        if not unique:
+            return found
+        try:
+            with self._get_connection() as conn:
+                for start in range(0, len(unique), _LOOKUP_CHUNK):
+                    chunk = unique[start : start + _LOOKUP_CHUNK]
+                    values = ",".join(["(?, ?)"] * len(chunk))
+                    params = [part for k in chunk for part in _split_archive_key(k)]
+                    cursor = conn.execute(
+                        "SELECT extractor, video_id FROM download_archive "
+                        f"WHERE (extractor, video_id) IN (VALUES {values})",
+                        params,
+                    )
+                    found.update(f"{row[0]}:{row[1]}" for row in cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error("Failed to query download archive: %s", e)
+        return found
+
+    def filter_unarchived(
+        self, entries: list[dict[str, Any]], keys_for: Callable[[dict], list[str]]
+    ) -> list[dict[str, Any]]:
+        """Drop entries already in the download archive, in one batched lookup."""
+        if not entries:
+            return entries
+        keys = [keys_for(entry) for entry in entries]
+        archived = self.archived_keys([k for entry_keys in keys for k in entry_keys])
+        if not archived:
+            return entries
+        return [
+            entry
+            for entry, entry_keys in zip(entries, keys)
+            if not archived.intersection(entry_keys)
+        ]
+
+    def is_archived(self, url: str | None = None, media_key: str | None = None) -> bool:
+        """Whether a media item (by id and/or URL) was already downloaded."""
+        return bool(self.archived_keys(archive_keys(url, media_key)))
+
+    def remove_from_archive(self, keys: list[str]) -> None:
+        """Forget archive keys so the items are downloaded again."""
+        try:
+            with self._get_connection() as conn:
+                conn.executemany(
+                    "DELETE FROM download_archive WHERE extractor = ? AND video_id = ?",
+                    [_split_archive_key(k) for k in keys],
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error("Failed to update download archive: %s", e)
+
+    def archive_size(self) -> int:
+        """Number of archived media keys."""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute("SELECT COUNT(*) FROM download_archive")
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning("Failed to count download archive: %s", e)
+            return 0
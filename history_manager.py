@@ -7,14 +7,204 @@ import csv
 import json
 import logging
 import os
+import re
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from typing import Any
+from urllib.parse import urlparse
+
+from history_archive import DownloadArchiveMixin, create_download_archive
+from history_sync import HistorySyncMixin, create_sync_log
 
 logger = logging.getLogger(__name__)
 
+# Bump when adding migrations to HistoryManager._migrate_schema
+SCHEMA_VERSION = 5
+
+_SIZE_RE = re.compile(
+    r"^\s*(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[KMGT]?)(?:I?B)?\s*$", re.IGNORECASE
+)
+_SIZE_MULTIPLIERS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+# SQL expression turning a history timestamp (text or unix epoch) into a day
+_DAY_EXPR = """
+    CASE
+        WHEN typeof({col}) IN ('integer', 'real') THEN date({col}, 'unixepoch')
+        ELSE date({col})
+    END
+"""
+
+# Rollup maintenance. Triggers keep the aggregates in sync for every writer
+# (add_entry, edits, deletes, retention, sync imports) without a full table
+# scan. Rows whose timestamp has no day only count in the status totals.
+_ROLLUP_COLUMNS = (
+    "timestamp",
+    "status",
+    "host",
+    "file_size_bytes",
+    "duration_seconds",
+    "elapsed_seconds",
+)
+
+_ROLLUP_ADD = """
+        INSERT INTO history_daily
+            (day, host, downloads, total_bytes, total_duration, total_elapsed)
+        SELECT * FROM (
+            SELECT {day} AS day,
+                COALESCE({row}.host, ''),
+                1,
+                COALESCE({row}.file_size_bytes, 0),
+                COALESCE({row}.duration_seconds, 0),
+                COALESCE({row}.elapsed_seconds, 0)
+        )
+        WHERE day IS NOT NULL
+        ON CONFLICT(day, host) DO UPDATE SET
+            downloads = downloads + 1,
+            total_bytes = total_bytes + excluded.total_bytes,
+            total_duration = total_duration + excluded.total_duration,
+            total_elapsed = total_elapsed + excluded.total_elapsed;
+
+        INSERT INTO history_totals (status, downloads, total_bytes)
+        VALUES (COALESCE({row}.status, ''), 1, COALESCE({row}.file_size_bytes, 0))
+        ON CONFLICT(status) DO UPDATE SET
+            downloads = downloads + 1,
+            total_bytes = total_bytes + excluded.total_bytes;
+"""
+
+_ROLLUP_REMOVE = """
+        UPDATE history_daily SET
+            downloads = downloads - 1,
+            total_bytes = total_bytes - COALESCE({row}.file_size_bytes, 0),
+            total_duration = total_duration - COALESCE({row}.duration_seconds, 0),
+            total_elapsed = total_elapsed - COALESCE({row}.elapsed_seconds, 0)
+        WHERE day = {day} AND host = COALESCE({row}.host, '');
+        DELETE FROM history_daily WHERE downloads <= 0;
+
+        UPDATE history_totals SET
+            downloads = downloads - 1,
+            total_bytes = total_bytes - COALESCE({row}.file_size_bytes, 0)
+        WHERE status = COALESCE({row}.status, '');
+        DELETE FROM history_totals WHERE downloads <= 0;
+"""
+
+
+def _rollup_sql(template: str, row: str) -> str:
+    return template.format(row=row, day=_DAY_EXPR.format(col=f"{row}.timestamp"))
+
+
+_ROLLUP_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_history_rollup_insert
+    AFTER INSERT ON history
+    BEGIN
+        {_rollup_sql(_ROLLUP_ADD, "NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_history_rollup_update
+    AFTER UPDATE OF {", ".join(_ROLLUP_COLUMNS)} ON history
+    BEGIN
+        {_rollup_sql(_ROLLUP_REMOVE, "OLD")}
+        {_rollup_sql(_ROLLUP_ADD, "NEW")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_history_rollup_delete
+    AFTER DELETE ON history
+    BEGIN
+        {_rollup_sql(_ROLLUP_REMOVE, "OLD")}
+    END
+    """,
+)
+
+
+def parse_size_bytes(value: Any) -> int | None:
+    """
+    Convert a stored file size ("10MB", "1.5 GiB", 2048) to bytes.
+    Returns None when the value cannot be interpreted.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int | float):
+        return int(value) if value >= 0 else None
+    if not isinstance(value, str):
+        return None
+
+    match = _SIZE_RE.match(value)
+    if not match:
+        return None
+    unit = match.group("unit").upper()
+    return int(float(match.group("value")) * _SIZE_MULTIPLIERS[unit])
+
+
+def url_host(url: str | None) -> str | None:
+    """Return the normalized host of a URL (without 'www.'), or None."""
+    if not url:
+        return None
+    try:
+        host = (urlparse(url).hostname or "").lower().strip(".")
+    except ValueError:
+        return None
+    if host.startswith("www."):
+        host = host[4:]
+    return host or None
+
+
+def _as_float(value: Any) -> float | None:
+    """Coerce numeric-looking values to float, ignoring placeholders like 'N/A'."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    History retention rules. A zero value disables the corresponding rule.
 
-class HistoryManager:
+    Attributes:
+        max_age_days: Delete entries older than this many days.
+        max_entries: Keep only the newest N entries.
+        prune_statuses: Statuses (e.g. "Failed") subject to status_max_age_days.
+        status_max_age_days: Age after which prune_statuses entries are deleted.
+    """
+
+    max_age_days: int = 0
+    max_entries: int = 0
+    prune_statuses: tuple[str, ...] = ()
+    status_max_age_days: int = 7
+
+    @classmethod
+    def from_config(cls, config: Any) -> "RetentionPolicy":
+        """Build a policy from the application config mapping."""
+
+        def _int(key: str, default: int) -> int:
+            try:
+                return max(int(config.get(key, default) or 0), 0)
+            except (TypeError, ValueError):
+                return default
+
+        statuses = config.get("history_prune_statuses") or []
+        return cls(
+            max_age_days=_int("history_retention_days", 0),
+            max_entries=_int("history_max_entries", 0),
+            prune_statuses=tuple(str(s) for s in statuses if s),
+            status_max_age_days=_int("history_prune_status_days", 7),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any rule would delete rows."""
+        return bool(self.max_age_days or self.max_entries or self.prune_statuses)
+
+
+class HistoryManager(DownloadArchiveMixin, HistorySyncMixin):
     """
     Manages the history of downloads using SQLite.
     """
@@ -22,9 +212,16 @@ class HistoryManager:
     DB_FILE = os.path.expanduser("~/.streamcatch/history.db")
     MAX_DB_RETRIES = 3
 
+    # Retention runs in short transactions so concurrent writers are not blocked
+    RETENTION_BATCH_SIZE = 500
+    RETENTION_BATCH_PAUSE = 0.05
+    VACUUM_STEP_PAGES = 256
+
     def __init__(self):
         self._ensure_db_dir()
         self._init_db()
+        self._retention_stop = threading.Event()
+        self._retention_thread: threading.Thread | None = None
 
     def _ensure_db_dir(self):
         directory = os.path.dirname(self.DB_FILE)
@@ -60,6 +257,8 @@ class HistoryManager:
                 os.makedirs(directory, exist_ok=True)
 
             with sqlite3.connect(db_file) as conn:
+                # Must precede table creation to take effect on new databases
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL;")
                 conn.execute("PRAGMA journal_mode=WAL;")
                 cursor = conn.cursor()
 
@@ -119,13 +318,136 @@ class HistoryManager:
                 cursor.execute(
                     "CREATE INDEX IF NOT EXISTS idx_history_status ON history(status)"
                 )
+                cls._migrate_schema(conn)
                 conn.commit()
 
+            cls._ensure_incremental_vacuum(db_file)
+
         except OSError as e:
             logger.error("Failed to create history DB directory: %s", e)
         except sqlite3.Error as e:
             logger.error("Failed to initialize/migrate history DB: %s", e)
 
+    @staticmethod
+    def _migrate_schema(conn: sqlite3.Connection) -> None:
+        """Apply versioned schema migrations tracked via PRAGMA user_version."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        if version < 1:
+            logger.info("Migrating history database to typed columns and rollups...")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+            for name, sql_type in (
+                ("file_size_bytes", "INTEGER"),
+                ("duration_seconds", "REAL"),
+                ("elapsed_seconds", "REAL"),
+                ("host", "TEXT"),
+            ):
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE history ADD COLUMN {name} {sql_type}")
+
+            # Backfill typed values from the legacy text columns
+            rows = conn.execute("SELECT id, url, file_size FROM history").fetchall()
+            conn.executemany(
+                "UPDATE history SET file_size_bytes = ?, host = ? WHERE id = ?",
+                [
+                    (parse_size_bytes(file_size), url_host(url), row_id)
+                    for row_id, url, file_size in rows
+                ],
+            )
+
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS history_daily (
+                    day TEXT NOT NULL,
+                    host TEXT NOT NULL DEFAULT '',
+                    downloads INTEGER NOT NULL DEFAULT 0,
+                    total_bytes INTEGER NOT NULL DEFAULT 0,
+                    total_duration REAL NOT NULL DEFAULT 0,
+                    total_elapsed REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, host)
+                )
+                """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS history_totals (
+                    status TEXT PRIMARY KEY,
+                    downloads INTEGER NOT NULL DEFAULT 0,
+                    total_bytes INTEGER NOT NULL DEFAULT 0
+                )
+                """)
+
+            HistoryManager._seed_rollups(conn)
+            for trigger_sql in _ROLLUP_TRIGGERS:
+                conn.execute(trigger_sql)
+
+        if version < 2:
+            create_download_archive(conn)
+
+        if version < 3:
+            logger.info("Adding content hashes to history database...")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+            if "content_hash" not in columns:
+                conn.execute("ALTER TABLE history ADD COLUMN content_hash TEXT")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_content_hash "
+                "ON history(content_hash) WHERE content_hash IS NOT NULL"
+            )
+
+        if version < 4:
+            create_sync_log(conn)
+
+        if 1 <= version < 5:
+            # The first rollup triggers missed updates and failed inserts of
+            # rows without a valid timestamp
+            logger.info("Rebuilding history rollups...")
+            conn.execute("DROP TRIGGER IF EXISTS trg_history_rollup_insert")
+            conn.execute("DROP TRIGGER IF EXISTS trg_history_rollup_delete")
+            HistoryManager._seed_rollups(conn)
+            for trigger_sql in _ROLLUP_TRIGGERS:
+                conn.execute(trigger_sql)
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _seed_rollups(conn: sqlite3.Connection) -> None:
+        """Recompute the rollup tables from every history row (full scan)."""
+        conn.execute("DELETE FROM history_daily")
+        conn.execute("DELETE FROM history_totals")
+        conn.execute(f"""
+            INSERT INTO history_daily
+                (day, host, downloads, total_bytes, total_duration, total_elapsed)
+            SELECT {_DAY_EXPR.format(col="timestamp")} AS day,
+                COALESCE(host, ''), COUNT(*),
+                COALESCE(SUM(file_size_bytes), 0),
+                COALESCE(SUM(duration_seconds), 0),
+                COALESCE(SUM(elapsed_seconds), 0)
+            FROM history
+            WHERE day IS NOT NULL
+            GROUP BY day, COALESCE(host, '')
+            """)
+        conn.execute("""
+            INSERT INTO history_totals (status, downloads, total_bytes)
+            SELECT COALESCE(status, ''), COUNT(*),
+                COALESCE(SUM(file_size_bytes), 0)
+            FROM history
+            GROUP BY COALESCE(status, '')
+            """)
+
+    @staticmethod
+    def _ensure_incremental_vacuum(db_file: str) -> None:
+        """
+        Convert legacy databases to auto_vacuum=INCREMENTAL.
+        Changing the mode on an existing file needs one full VACUUM; afterwards
+        space is reclaimed in small steps by incremental_vacuum().
+        """
+        with sqlite3.connect(db_file, isolation_level=None) as conn:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if mode == 2:
+                return
+            logger.info("Enabling incremental auto-vacuum on history database")
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+
     def _init_db(self):
         """Instance-level database initialization."""
         HistoryManager.init_db()
@@ -138,10 +460,17 @@ class HistoryManager:
 
         try:
             with self._get_connection() as conn:
+                size_bytes = entry.get("file_size_bytes")
+                if size_bytes is None:
+                    size_bytes = parse_size_bytes(entry.get("file_size"))
                 conn.execute(
                     """
-                    INSERT INTO history (url, title, status, filename, filepath, file_size)
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    INSERT INTO history (
+                        url, title, status, filename, filepath, file_size,
+                        file_size_bytes, duration_seconds, elapsed_seconds, host,
+                        content_hash
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                     (
                         entry.get("url"),
@@ -150,12 +479,40 @@ class HistoryManager:
                         entry.get("filename"),
                         entry.get("filepath"),
                         entry.get("file_size"),
+                        size_bytes,
+                        _as_float(entry.get("duration")),
+                        _as_float(entry.get("elapsed")),
+                        url_host(entry.get("url")),
+                        entry.get("content_hash"),
                     ),
                 )
                 conn.commit()
         except sqlite3.Error as e:
             logger.error("Failed to add history entry: %s", e)
 
+    def find_by_hash(self, content_hash: str, exclude: str | None = None) -> str | None:
+        """
+        Path of the most recent completed download with this content digest
+        that is still on disk (other than exclude).
+        """
+        if not content_hash:
+            return None
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT filepath FROM history "
+                    "WHERE content_hash = ? AND status = 'Completed' "
+                    "ORDER BY id DESC",
+                    (content_hash,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Failed to look up content hash: %s", e)
+            return None
+        for (filepath,) in rows:
+            if filepath and filepath != exclude and os.path.isfile(filepath):
+                return filepath
+        return None
+
     def get_history(
         self, limit: int = 50, offset: int = 0, search_query: str = ""
     ) -> list[dict]:
@@ -189,8 +546,8 @@ class HistoryManager:
                 conn.execute("DELETE FROM history")
                 conn.commit()
 
-            # Vacuum must run outside an active transaction
-            self.vacuum()
+            # Reclaim freed pages in steps instead of a blocking full VACUUM
+            self.incremental_vacuum()
         except sqlite3.Error as e:
             logger.error("Failed to clear history: %s", e)
 
@@ -250,17 +607,11 @@ class HistoryManager:
         stats: dict[str, Any] = {"total": 0, "by_status": {}}
         try:
             with self._get_connection() as conn:
-                # Total
-                cursor = conn.execute("SELECT COUNT(*) FROM history")
-                result = cursor.fetchone()
-                stats["total"] = result[0] if result else 0
-
-                # By status
-                cursor = conn.execute(
-                    "SELECT status, COUNT(*) FROM history GROUP BY status"
-                )
+                # Read the per-status rollup instead of scanning history
+                cursor = conn.execute("SELECT status, downloads FROM history_totals")
                 for row in cursor.fetchall():
-                    stats["by_status"][row["status"]] = row[1]
+                    stats["by_status"][row["status"]] = row["downloads"]
+                stats["total"] = sum(stats["by_status"].values())
         except sqlite3.Error as e:
             logger.error("Failed to get history stats: %s", e)
         return stats
@@ -293,22 +644,12 @@ class HistoryManager:
             conn = self._get_connection()
             cursor = conn.cursor()
 
-            # Updated query to handle both text timestamps and unix epoch if any
+            # Rollup rows are bounded by days * hosts, independent of history size
             query = """
-                SELECT
-                    CASE
-                        WHEN typeof(timestamp) IN ('integer', 'real') THEN date(timestamp, 'unixepoch')
-                        ELSE date(timestamp)
-                    END AS day,
-                    COUNT(*)
-                FROM history
-                WHERE
-                    CASE
-                        WHEN typeof(timestamp) IN ('integer', 'real') THEN date(timestamp, 'unixepoch')
-                        ELSE date(timestamp)
-                    END >= date('now', ?)
+                SELECT day, SUM(downloads)
+                FROM history_daily
+                WHERE day >= date('now', ?)
                 GROUP BY day
-                ORDER BY day ASC
             """
             cursor.execute(query, (f"-{days} days",))
 
@@ -337,21 +678,41 @@ class HistoryManager:
 
     def get_stats(self) -> dict:
         """Returns overall stats."""
-        stats = {"total_downloads": 0, "total_size_mb": 0}
+        stats: dict[str, Any] = {"total_downloads": 0, "total_size_mb": 0}
         try:
             with self._get_connection() as conn:
-                # Total count
-                cursor = conn.execute("SELECT COUNT(*) FROM history")
-                stats["total_downloads"] = cursor.fetchone()[0]
-
-                # Total size (approx, parsing strings might be hard if format varies)
-                # We stored file_size as string "XX MB".
-                # For accurate stats we should store bytes in future.
-                # Here we just count entries for now.
+                cursor = conn.execute(
+                    "SELECT COALESCE(SUM(downloads), 0), COALESCE(SUM(total_bytes), 0) "
+                    "FROM history_totals"
+                )
+                downloads, total_bytes = cursor.fetchone()
+                stats["total_downloads"] = downloads
+                stats["total_size_mb"] = round(total_bytes / (1024 * 1024), 2)
         except sqlite3.Error as e:
             logger.warning("Failed to get aggregate history stats: %s", e)
         return stats
 
+    def get_host_stats(self, days: int = 30, limit: int = 10) -> list[dict]:
+        """Returns the busiest hosts over the last N days from the daily rollup."""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.execute(
+                    """
+                    SELECT host, SUM(downloads) AS downloads,
+                        SUM(total_bytes) AS total_bytes
+                    FROM history_daily
+                    WHERE day >= date('now', ?)
+                    GROUP BY host
+                    ORDER BY downloads DESC
+                    LIMIT ?
+                    """,
+                    (f"-{days} days", limit),
+                )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.warning("Failed to get host stats: %s", e)
+            return []
+
     def export_to_json(self, filepath: str):
         """Exports history to JSON."""
         data = self.get_history(limit=10000)
@@ -370,6 +731,165 @@ class HistoryManager:
             writer.writeheader()
             writer.writerows(data)
 
+    def _retention_selectors(
+        self, policy: RetentionPolicy
+    ) -> list[tuple[str, tuple[Any, ...]]]:
+        """Build (SELECT id ... LIMIT ?) queries for each enabled retention rule."""
+        selectors: list[tuple[str, tuple[Any, ...]]] = []
+
+        def _older_than(days: int) -> tuple[str, tuple[Any, ...]]:
+            # Timestamps are UTC text (CURRENT_TIMESTAMP); tolerate legacy epochs
+            cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+            clause = (
+                "((typeof(timestamp) = 'text' AND timestamp < ?) OR "
+                "(typeof(timestamp) IN ('integer', 'real') AND timestamp < ?))"
+            )
+            return clause, (cutoff.strftime("%Y-%m-%d %H:%M:%S"), cutoff.timestamp())
+
+        if policy.max_age_days:
+            clause, params = _older_than(policy.max_age_days)
+            selectors.append((f"SELECT id FROM history WHERE {clause} LIMIT ?", params))
+
+        if policy.prune_statuses:
+            clause, params = _older_than(policy.status_max_age_days)
+            placeholders = ",".join("?" * len(policy.prune_statuses))
+            selectors.append(
+                (
+                    f"SELECT id FROM history WHERE status IN ({placeholders}) "
+                    f"AND {clause} LIMIT ?",
+                    (*policy.prune_statuses, *params),
+                )
+            )
+
+        if policy.max_entries:
+            # Everything past the newest max_entries rows; re-evaluated per batch
+            selectors.append(
+                (
+                    "SELECT id FROM (SELECT id FROM history "
+                    "ORDER BY timestamp DESC, id DESC LIMIT -1 OFFSET ?) LIMIT ?",
+                    (policy.max_entries,),
+                )
+            )
+        return selectors
+
+    def apply_retention(
+        self,
+        policy: RetentionPolicy,
+        batch_size: int | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> int:
+        """
+        Delete entries matching the retention policy in small batches.
+
+        Each batch is its own short transaction, with a pause in between, so
+        downloads finishing concurrently can still write history. Freed pages
+        are then reclaimed with incremental_vacuum().
+
+        Returns:
+            Number of deleted entries.
+        """
+        if not policy.enabled:
+            return 0
+
+        batch = batch_size or self.RETENTION_BATCH_SIZE
+        deleted = 0
+        try:
+            for select_sql, params in self._retention_selectors(policy):
+                while not (stop_event and stop_event.is_set()):
+                    with self._get_connection() as conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        ids = [
+                            row[0] for row in conn.execute(select_sql, (*params, batch))
+                        ]
+                        if not ids:
+                            conn.rollback()
+                            break
+                        last_seq = conn.execute(
+                            "SELECT COALESCE(MAX(seq), 0) FROM history_changes"
+                        ).fetchone()[0]
+                        placeholders = ",".join("?" * len(ids))
+                        conn.execute(
+                            f"DELETE FROM history WHERE id IN ({placeholders})", ids
+                        )
+                        # Retention is a local setting: the purge is not synced
+                        # as deletions to other devices
+                        conn.execute(
+                            "DELETE FROM history_changes WHERE seq > ?", (last_seq,)
+                        )
+                        conn.commit()
+                    deleted += len(ids)
+                    time.sleep(self.RETENTION_BATCH_PAUSE)
+        except sqlite3.Error as e:
+            logger.warning("History retention pass failed: %s", e)
+
+        if deleted:
+            logger.info("History retention removed %d entries", deleted)
+            self.incremental_vacuum(stop_event=stop_event)
+        return deleted
+
+    def incremental_vacuum(
+        self,
+        step_pages: int | None = None,
+        stop_event: threading.Event | None = None,
+    ) -> int:
+        """
+        Return free pages to the filesystem a few at a time.
+
+        Returns:
+            Number of pages released.
+        """
+        step = step_pages or self.VACUUM_STEP_PAGES
+        released = 0
+        try:
+            db_file = self._resolve_db_file()
+            with sqlite3.connect(db_file, isolation_level=None) as conn:
+                while not (stop_event and stop_event.is_set()):
+                    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if not free:
+                        break
+                    # The pragma works row by row; drain the cursor to run it fully
+                    conn.execute(f"PRAGMA incremental_vacuum({int(step)})").fetchall()
+                    remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if remaining >= free:
+                        # auto_vacuum not active on this file; nothing to reclaim
+                        break
+                    released += free - remaining
+                    time.sleep(self.RETENTION_BATCH_PAUSE)
+        except sqlite3.Error as e:
+            logger.warning("Incremental vacuum failed: %s", e)
+        return released
+
+    def start_retention_worker(self, config: Any, interval: float = 3600.0) -> None:
+        """Start a daemon thread applying the configured retention periodically."""
+        if self._retention_thread and self._retention_thread.is_alive():
+            return
+
+        self._retention_stop.clear()
+
+        def _loop():
+            while not self._retention_stop.is_set():
+                try:
+                    self.apply_retention(
+                        RetentionPolicy.from_config(config),
+                        stop_event=self._retention_stop,
+                    )
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.error("History retention worker error: %s", e)
+                self._retention_stop.wait(interval)
+
+        self._retention_thread = threading.Thread(
+            target=_loop, daemon=True, name="HistoryRetention"
+        )
+        self._retention_thread.start()
+
+    def stop_retention_worker(self) -> None:
+        """Stop the retention worker thread."""
+        if not self._retention_thread:
+            return
+        self._retention_stop.set()
+        self._retention_thread.join(timeout=2.0)
+        self._retention_thread = None
+
     def vacuum(self):
         """Optimizes the database."""
         try:
@@ -0,0 +1,342 @@
+"""
+History delta sync.
+
+Triggers log every insert, update and delete of history rows in
+``history_changes``; the pending changes are uploaded as one delta, and
+deltas from other devices are merged by row ``sync_id`` (the newer
+``updated_at`` wins). The transfer itself is done by SyncManager.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Rows per query when reading or deleting changed rows
+_ROW_CHUNK = 400
+
+# Unix time with sub-second precision, for trigger defaults
+_NOW_EXPR = "((julianday('now') - 2440587.5) * 86400.0)"
+
+# History columns exchanged by delta sync; rows are matched across devices
+# by sync_id, and the newer updated_at wins
+SYNC_COLUMNS = (
+    "sync_id",
+    "updated_at",
+    "url",
+    "title",
+    "status",
+    "timestamp",
+    "filename",
+    "filepath",
+    "file_size",
+    "file_size_bytes",
+    "duration_seconds",
+    "elapsed_seconds",
+    "host",
+    "content_hash",
+)
+
+# Change log for delta sync. Inserting a row assigns its sync id, which is
+# an update, so every insert and update is logged once by the update
+# trigger; deletes keep the sync id as a tombstone.
+_SYNC_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS trg_history_sync_insert
+    AFTER INSERT ON history
+    BEGIN
+        UPDATE history SET
+            sync_id = COALESCE(NEW.sync_id, lower(hex(randomblob(16)))),
+            updated_at = COALESCE(NEW.updated_at, {_NOW_EXPR})
+        WHERE id = NEW.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_history_sync_update
+    AFTER UPDATE ON history
+    BEGIN
+        INSERT INTO history_changes (row_id) VALUES (NEW.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_history_sync_delete
+    AFTER DELETE ON history
+    BEGIN
+        INSERT INTO history_changes (row_id, sync_id, deleted)
+        VALUES (OLD.id, OLD.sync_id, 1);
+    END
+    """,
+)
+
+
+def _legacy_sync_id(url: Any, timestamp: Any, title: Any, copy: int) -> str:
+    """
+    Sync id for a row created before delta sync. Derived from the row (and
+    which identical copy it is), so histories copied by the old
+    whole-database sync match up.
+    """
+    digest = hashlib.sha1(
+        f"{url}\x00{timestamp}\x00{title}\x00{copy}".encode(),
+        usedforsecurity=False,
+    )
+    return digest.hexdigest()[:32]
+
+
+def _sync_row_values(row: dict[str, Any]) -> list[Any] | None:
+    """A synced row's SYNC_COLUMNS values, or None if the row is unusable."""
+    if not isinstance(row.get("sync_id"), str) or not isinstance(row.get("url"), str):
+        return None
+    if not row["sync_id"] or not row["url"]:
+        return None
+    values = [row.get(column) for column in SYNC_COLUMNS]
+    if not all(v is None or isinstance(v, str | int | float) for v in values):
+        return None
+    return values
+
+
+def _updated_at(row: dict[str, Any]) -> float:
+    value = row.get("updated_at")
+    if isinstance(value, bool):
+        return 0.0
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def create_sync_log(conn: sqlite3.Connection) -> None:
+    """Add sync ids, the change log and its triggers to the history table."""
+    logger.info("Adding sync change log to history database...")
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+    for name, sql_type in (("sync_id", "TEXT"), ("updated_at", "REAL")):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE history ADD COLUMN {name} {sql_type}")
+    copies: dict[tuple[Any, ...], int] = {}
+    sync_ids = []
+    for row_id, url, timestamp, title in conn.execute(
+        "SELECT id, url, timestamp, title FROM history ORDER BY id"
+    ):
+        fields = (url, timestamp, title)
+        copy = copies[fields] = copies.get(fields, -1) + 1
+        sync_ids.append((_legacy_sync_id(url, timestamp, title, copy), row_id))
+    conn.executemany("UPDATE history SET sync_id = ? WHERE id = ?", sync_ids)
+    conn.execute(
+        f"UPDATE history SET updated_at = {_NOW_EXPR} WHERE updated_at IS NULL"
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_history_sync_id ON history(sync_id)"
+    )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS history_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            row_id INTEGER NOT NULL,
+            sync_id TEXT,
+            deleted INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        ) WITHOUT ROWID
+        """)
+    # Nothing has been uploaded as a delta yet
+    conn.execute(
+        "INSERT INTO history_changes (row_id) SELECT id FROM history ORDER BY id"
+    )
+    for trigger_sql in _SYNC_TRIGGERS:
+        conn.execute(trigger_sql)
+
+
+class HistorySyncMixin:
+    """Delta sync and backup methods of HistoryManager."""
+
+    _get_connection: Callable[[], sqlite3.Connection]
+
+    def snapshot(self, destination_path: str) -> None:
+        """
+        Copy the database to destination_path with SQLite's online backup,
+        so the copy is consistent even while downloads keep writing.
+        """
+        source = self._get_connection()
+        try:
+            target = sqlite3.connect(destination_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+    def sync_device_id(self) -> str | None:
+        """This device's id in synced history, created on first use."""
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT value FROM sync_state WHERE key = 'device_id'"
+                ).fetchone()
+                if row:
+                    return row[0]
+                device_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO sync_state (key, value) VALUES ('device_id', ?)",
+                    (device_id,),
+                )
+                conn.commit()
+                return device_id
+        except sqlite3.Error as e:
+            logger.error("Failed to read sync device id: %s", e)
+            return None
+
+    def sync_position(self, key: str) -> int | None:
+        """
+        A sync cursor: deltas uploaded ("uploaded") or applied per device.
+        None if it cannot be read.
+        """
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT value FROM sync_state WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error("Failed to read sync position %s: %s", key, e)
+            return None
+        return int(row[0]) if row else 0
+
+    def pending_changes(self) -> tuple[list[dict[str, Any]], list[str], int]:
+        """
+        Local changes not uploaded yet: the current version of each added or
+        changed row, the sync ids of deleted rows, and the last change
+        sequence number (0 if there are none, or they cannot be read).
+        """
+        try:
+            with self._get_connection() as conn:
+                changes = conn.execute(
+                    "SELECT seq, row_id, sync_id, deleted FROM history_changes "
+                    "ORDER BY seq"
+                ).fetchall()
+                # Only the latest change of each row matters
+                latest = {row[1]: (row[2], row[3]) for row in changes}
+                changed = [
+                    row_id for row_id, (_, deleted) in latest.items() if not deleted
+                ]
+                rows: list[dict[str, Any]] = []
+                columns = ", ".join(SYNC_COLUMNS)
+                for start in range(0, len(changed), _ROW_CHUNK):
+                    chunk = changed[start : start + _ROW_CHUNK]
+                    cursor = conn.execute(
+                        f"SELECT {columns} FROM history "
+                        f"WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id",
+                        chunk,
+                    )
+                    rows.extend(dict(row) for row in cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error("Failed to read pending history changes: %s", e)
+            return [], [], 0
+        deleted_ids = [
+            sync_id for sync_id, deleted in latest.values() if deleted and sync_id
+        ]
+        return rows, deleted_ids, changes[-1][0] if changes else 0
+
+    def mark_uploaded(self, last_seq: int, position: int) -> bool:
+        """Drop changes up to last_seq, uploaded as delta number position."""
+        try:
+            with self._get_connection() as conn:
+                conn.execute("DELETE FROM history_changes WHERE seq <= ?", (last_seq,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) "
+                    "VALUES ('uploaded', ?)",
+                    (str(position),),
+                )
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error("Failed to record uploaded history delta: %s", e)
+            return False
+
+    def apply_changes(
+        self,
+        device_id: str,
+        position: int,
+        rows: list[dict[str, Any]],
+        deleted: list[str],
+    ) -> int | None:
+        """
+        Merge another device's delta number position into the history: rows
+        are matched by sync_id and replaced only by a newer updated_at, and
+        deleted sync ids are removed. Rows that cannot be stored are skipped.
+        The device's cursor moves in the same transaction, and the merge is
+        not logged as local changes.
+
+        Returns:
+            Number of rows inserted, replaced or deleted, or None if the
+            delta could not be applied (it is retried on the next sync).
+        """
+        applied = 0
+        try:
+            with self._get_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                last_seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM history_changes"
+                ).fetchone()[0]
+                for row in rows:
+                    applied += self._merge_synced_row(conn, row)
+                for start in range(0, len(deleted), _ROW_CHUNK):
+                    chunk = deleted[start : start + _ROW_CHUNK]
+                    cursor = conn.execute(
+                        "DELETE FROM history "
+                        f"WHERE sync_id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                    applied += cursor.rowcount
+                conn.execute("DELETE FROM history_changes WHERE seq > ?", (last_seq,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                    (f"applied:{device_id}", str(position)),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.error(
+                "Failed to apply history delta %d of device %s: %s",
+                position,
+                device_id,
+                e,
+            )
+            return None
+        return applied
+
+    @staticmethod
+    def _merge_synced_row(conn: sqlite3.Connection, row: dict[str, Any]) -> int:
+        """Insert or replace one synced row; 1 if it changed the history."""
+        values = _sync_row_values(row)
+        if values is None:
+            logger.warning("Skipping invalid synced history row")
+            return 0
+        existing = conn.execute(
+            "SELECT id, updated_at FROM history WHERE sync_id = ?",
+            (row["sync_id"],),
+        ).fetchone()
+        if existing is not None and _updated_at(row) <= (existing[1] or 0):
+            return 0
+        # A row the database rejects must not take the rest of the delta down
+        conn.execute("SAVEPOINT synced_row")
+        try:
+            if existing is not None:
+                # Delete and insert, so the rollup triggers stay exact
+                conn.execute("DELETE FROM history WHERE id = ?", (existing[0],))
+            conn.execute(
+                f"INSERT INTO history ({', '.join(SYNC_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(SYNC_COLUMNS))})",
+                values,
+            )
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO synced_row")
+            logger.warning("Skipping synced history row %s: %s", row["sync_id"], e)
+            return 0
+        finally:
+            conn.execute("RELEASE synced_row")
+        return 1
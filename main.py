@@ -6,6 +6,7 @@ Refactored for event-driven queue processing and cleaner architecture.
 """
 
 import logging
+import multiprocessing
 import os
 import signal
 import sys
@@ -248,6 +249,8 @@ def global_crash_handler(exctype: type, value: BaseException, tb: Any) -> None:
 
 
 if __name__ == "__main__":
+    # Frozen builds re-enter here in process-backend workers
+    multiprocessing.freeze_support()
     console_mode = "--console" in sys.argv or "--debug" in sys.argv
     if console_mode:
         logger.info("Console mode enabled - all output will be visible")
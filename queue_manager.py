@@ -10,11 +10,63 @@ from collections.abc import Callable
 from datetime import datetime, timedelta
 from typing import Any, cast
 
+from downloader.metadata_cache import canonical_url_key
 from downloader.types import DownloadStatus, QueueItem
 from utils import CancelToken
 
 logger = logging.getLogger(__name__)
 
+# Item options that change the file produced; merged duplicates must agree
+_OUTPUT_OPTION_KEYS = (
+    "output_path",
+    "output_template",
+    "video_format",
+    "audio_format",
+    "audio_only",
+    "subtitle_lang",
+    "start_time",
+    "end_time",
+    "split_chapters",
+    "download_profile",
+)
+
+
+# Runtime fields a resumed item starts again without
+_TRANSIENT_KEYS = frozenset(
+    {
+        "control_ref",
+        "prefetched_info",
+        "scheduled_time",
+        "speed",
+        "eta",
+        "error",
+        "parent_id",
+        "playlist_total",
+        "playlist_offset",
+        "playlist_done",
+        "playlist_failed",
+        "playlist_enumerated",
+    }
+)
+_JSON_TYPES = (str, int, float, bool, list, dict, type(None))
+
+
+def dedup_key(
+    item: dict[str, Any], media_key: str | None = None
+) -> tuple[Any, ...] | None:
+    """
+    Identity of the file an item will produce: its canonical media id (or
+    URL) plus the options that shape the output. None for playlists.
+    """
+    if item.get("playlist") or "playlist_total" in item:
+        return None
+    media = media_key or item.get("media_key")
+    if not media and item.get("url"):
+        media = canonical_url_key(str(item["url"]))
+    if not media:
+        return None
+    return (media, *(item.get(k) for k in _OUTPUT_OPTION_KEYS))
+
 
 class QueueManager:
     """
@@ -25,11 +77,24 @@ class QueueManager:
     - "Queued" -> "Allocating" -> "Downloading" -> "Error"
     - "Queued" -> "Allocating" -> "Downloading" -> "Cancelled"
     - "Scheduled (HH:MM)" -> "Queued" (when time reached)
+
+    Playlists fan out into child items (``parent_id``). The parent stays
+    "Downloading" with aggregate counters while its children run, and is
+    re-queued to enumerate the next page when few children are pending.
+    Completed children are dropped from the queue to keep memory bounded.
+
+    Items that resolve to the same media (and output options) as one already
+    queued or in flight are merged into it: the duplicate mirrors the
+    other item's status and result and never downloads itself.
     """
 
     # pylint: disable=too-many-public-methods
 
     MAX_QUEUE_SIZE = 1000
+    # Upper bound on unfinished children of one playlist in the queue
+    PLAYLIST_WINDOW = 200
+    _TERMINAL = ("Completed", "Error", "Cancelled")
+    _IN_FLIGHT = ("Allocating", "Downloading", "Processing")
 
     def __init__(self) -> None:
         # We explicitly type self._queue as list[QueueItem]
@@ -97,6 +162,10 @@ class QueueManager:
                 1
                 for item in self._queue
                 if item.get("status") in ("Downloading", "Allocating", "Processing")
+                # A playlist parent only holds a worker while enumerating
+                and ("playlist_total" not in item or item.get("_expanding"))
+                and not item.get("_postprocessing")
+                and not item.get("_merged_into")
             )
 
     def get_queue_count(self) -> int:
@@ -147,6 +216,7 @@ class QueueManager:
                 item["status"] = "Queued"
 
             queue_item = cast(QueueItem, item)
+            self._merge_on_add(queue_item)
             item_id_for_display = str(queue_item.get("id", "unknown"))
             display_name = (
                 queue_item.get("title")
@@ -185,9 +255,13 @@ class QueueManager:
                     )
                     # We assume status is a valid Literal
                     item["status"] = cast(Any, status)
+                    if status != "Processing":
+                        item.pop("_postprocessing", None)
                     if updates:
                         # pylint: disable=no-member
                         item.update(cast(Any, updates))
+                    self._settle_child(item)
+                    self._sync_followers(item, updates)
                     updated = True
                     break
 
@@ -215,14 +289,24 @@ class QueueManager:
                         break
 
             if target:
-                if item_id:
-                    logger.info("Removing item from queue: %s", item_id)
-                    # Cancel if running
-                    token = self._cancel_tokens.get(item_id)
-                    if token:
-                        token.cancel()
-
-                self._queue.remove(target)
+                doomed = [target]
+                if item_id and "playlist_total" in target:
+                    doomed += self._children_of(item_id)
+                for victim in doomed:
+                    victim_id = victim.get("id")
+                    if victim_id:
+                        logger.info("Removing item from queue: %s", victim_id)
+                        # Cancel if running
+                        token = self._cancel_tokens.get(victim_id)
+                        if token:
+                            token.cancel()
+                    self._queue.remove(victim)
+
+                self._release_followers(target)
+                parent = self._parent_of(target)
+                if parent is not None and not target.get("_settled"):
+                    parent["playlist_total"] = parent.get("playlist_total", 1) - 1
+                    self._refresh_parent(parent)
                 removed = True
 
         # Notify outside lock to prevent deadlock if listener calls back into queue
@@ -286,7 +370,7 @@ class QueueManager:
 
             # Find next
             for item in self._queue:
-                if item["status"] == "Queued":
+                if item["status"] == "Queued" and not item.get("_merged_into"):
                     item["status"] = "Allocating"
                     item["_allocated_at"] = now
                     return item
@@ -327,7 +411,16 @@ class QueueManager:
                     del self._cancel_tokens[item_id]
 
     def cancel_item(self, item_id: str) -> None:
-        """Request cancellation of a specific item."""
+        """Request cancellation of a specific item (and a playlist's children)."""
+        with self._lock:
+            self._cancel_one(item_id)
+            for child in self._children_of(item_id):
+                if child.get("id"):
+                    self._cancel_one(str(child["id"]))
+
+        self._notify_listeners_safe()
+
+    def _cancel_one(self, item_id: str) -> None:
         with self._lock:
             token = self._cancel_tokens.get(item_id)
             if token:
@@ -351,10 +444,10 @@ class QueueManager:
                             "Setting status to Cancelled for item ID: %s", item_id
                         )
                         item["status"] = "Cancelled"
+                        self._settle_child(item)
+                        self._release_followers(item)
                     break
 
-        self._notify_listeners_safe()
-
     def retry_item(self, item_id: str | None) -> bool:
         """Retry a cancelled or failed item by resetting its status and progress."""
         if not item_id:
@@ -374,17 +467,10 @@ class QueueManager:
                     )
                     return False
 
-                item.update(
-                    {
-                        "status": "Queued",
-                        "scheduled_time": None,
-                        "progress": 0,
-                        "speed": "",
-                        "eta": "",
-                        "size": "",
-                        "error": None,
-                    }
-                )
+                if "playlist_total" in item:
+                    self._retry_playlist(item)
+                else:
+                    self._reset_for_retry(item)
                 updated = True
                 break
 
@@ -396,6 +482,272 @@ class QueueManager:
             self._notify_listeners_safe()
         return updated
 
+    @staticmethod
+    def _reset_fields(item: QueueItem) -> None:
+        item.update(
+            {
+                "status": "Queued",
+                "scheduled_time": None,
+                "progress": 0,
+                "speed": "",
+                "eta": "",
+                "size": "",
+                "error": None,
+            }
+        )
+        item.pop("_merged_into", None)
+
+    def _reset_for_retry(self, item: QueueItem) -> None:
+        self._reset_fields(item)
+        parent = self._parent_of(item)
+        if parent is not None and item.pop("_settled", False):
+            parent["playlist_failed"] = max(0, parent.get("playlist_failed", 0) - 1)
+            if parent.get("status") in ("Error", "Cancelled", "Completed"):
+                parent["status"] = "Downloading"
+                parent["error"] = None
+            self._refresh_parent(parent)
+
+    def _retry_playlist(self, parent: QueueItem) -> None:
+        """Retry a playlist's failed children and resume its enumeration."""
+        parent["status"] = "Downloading"
+        parent["error"] = None
+        for child in self._children_of(str(parent.get("id"))):
+            if child.get("status") in ("Error", "Cancelled"):
+                self._reset_fields(child)
+                if child.pop("_settled", False):
+                    parent["playlist_failed"] = max(
+                        0, parent.get("playlist_failed", 0) - 1
+                    )
+        self._refresh_parent(parent)
+
+    # --- Playlist fan-out ---
+
+    def _children_of(self, parent_id: str) -> list[QueueItem]:
+        return [item for item in self._queue if item.get("parent_id") == parent_id]
+
+    def _parent_of(self, item: QueueItem) -> QueueItem | None:
+        parent_id = item.get("parent_id")
+        if not parent_id:
+            return None
+        for candidate in self._queue:
+            if candidate.get("id") == parent_id:
+                return candidate
+        return None
+
+    def pending_children(self, parent_id: str) -> int:
+        """Number of a playlist's children that have not finished yet."""
+        with self._lock:
+            return sum(
+                1 for child in self._children_of(parent_id) if not child.get("_settled")
+            )
+
+    def add_children(self, parent_id: str, children: list[dict[str, Any]]) -> int:
+        """
+        Queue entries of a playlist as child items.
+        Returns how many fit; the rest should be offered again later.
+        """
+        with self._lock:
+            parent = next(
+                (item for item in self._queue if item.get("id") == parent_id), None
+            )
+            if parent is None:
+                return 0
+            room = max(0, self.MAX_QUEUE_SIZE - len(self._queue))
+            accepted = children[:room]
+            for child in accepted:
+                child.setdefault("id", str(uuid.uuid4()))
+                child["status"] = "Queued"
+                child["parent_id"] = parent_id
+                self._merge_on_add(cast(QueueItem, child))
+                self._queue.append(cast(QueueItem, child))
+            if accepted:
+                parent["playlist_total"] = parent.get("playlist_total", 0) + len(
+                    accepted
+                )
+                self._refresh_parent(parent)
+                self._has_work.notify_all()
+
+        if accepted:
+            logger.info(
+                "Queued %d playlist entries for parent %s", len(accepted), parent_id
+            )
+            self._notify_listeners_safe()
+        return len(accepted)
+
+    # --- In-flight deduplication ---
+
+    def _merge_on_add(self, item: QueueItem) -> None:
+        """Key a new item and let a queued one follow a pending duplicate."""
+        key = dedup_key(cast(dict, item))
+        if key is None:
+            return
+        item["_dedup_key"] = key
+        if item.get("status") == "Queued":
+            leader = self._find_leader(item, key, ("Queued", *self._IN_FLIGHT))
+            if leader is not None:
+                self._follow(item, leader)
+
+    def _find_leader(
+        self, item: QueueItem, key: tuple[Any, ...], statuses: tuple[str, ...]
+    ) -> QueueItem | None:
+        for other in self._queue:
+            if (
+                other is not item
+                and other.get("_dedup_key") == key
+                and other.get("status") in statuses
+                and not other.get("_merged_into")
+            ):
+                return other
+        return None
+
+    def _followers_of(self, leader_id: str) -> list[QueueItem]:
+        return [item for item in self._queue if item.get("_merged_into") == leader_id]
+
+    @staticmethod
+    def _follow(item: QueueItem, leader: QueueItem) -> None:
+        logger.info("Merging duplicate %s into %s", item.get("url"), leader.get("url"))
+        item["_merged_into"] = str(leader.get("id"))
+        item["status"] = leader.get("status", "Queued")
+        item["progress"] = leader.get("progress", 0)
+
+    def merge_duplicate(self, item_id: str, media_key: str | None) -> str | None:
+        """
+        Record the media id an item resolved to before downloading. If another
+        item is already downloading the same file, the item follows it instead
+        and that item's id is returned; None means download normally.
+        """
+        merged: str | None = None
+        with self._lock:
+            item = next((i for i in self._queue if i.get("id") == item_id), None)
+            if item is None:
+                return None
+            key = dedup_key(cast(dict, item), media_key)
+            if key is None:
+                return None
+            item["_dedup_key"] = key
+            leader = self._find_leader(item, key, self._IN_FLIGHT)
+            if leader is not None:
+                self._follow(item, leader)
+                merged = str(leader.get("id"))
+        if merged:
+            self._notify_listeners_safe()
+        return merged
+
+    def _sync_followers(
+        self, leader: QueueItem, updates: dict[str, Any] | None = None
+    ) -> None:
+        """Mirror a leader's status (and result) onto its merged duplicates."""
+        leader_id = leader.get("id")
+        if not leader_id:
+            return
+        if leader.get("status") == "Cancelled":
+            self._release_followers(leader)
+            return
+        for follower in self._followers_of(str(leader_id)):
+            follower["status"] = leader.get("status", "Queued")
+            if updates:
+                # pylint: disable=no-member
+                follower.update(cast(Any, updates))
+            self._settle_child(follower)
+
+    def _release_followers(self, leader: QueueItem) -> None:
+        """A cancelled or removed leader hands its duplicates back to the queue."""
+        leader_id = leader.get("id")
+        if not leader_id:
+            return
+        followers = self._followers_of(str(leader_id))
+        for follower in followers:
+            if follower.get("status") not in self._TERMINAL:
+                self._reset_fields(follower)
+            follower.pop("_merged_into", None)
+        if followers:
+            self._has_work.notify_all()
+
+    def start_postprocessing(self, item_id: str) -> None:
+        """
+        Move an item to the post-processing stage. It stays "Processing" but
+        no longer counts as an active download, so the next item can start.
+        """
+        with self._lock:
+            for item in self._queue:
+                if item.get("id") == item_id:
+                    item["status"] = "Processing"
+                    item["progress"] = 1.0
+                    item["_postprocessing"] = True
+                    self._sync_followers(item, {"progress": 1.0})
+                    break
+            self._has_work.notify_all()
+        self._notify_listeners_safe()
+
+    def start_expansion(self, parent_id: str, title: str | None = None) -> None:
+        """Mark a playlist parent as enumerating (it holds a worker meanwhile)."""
+        with self._lock:
+            for item in self._queue:
+                if item.get("id") == parent_id:
+                    item.setdefault("playlist_total", 0)
+                    item.setdefault("playlist_done", 0)
+                    item.setdefault("playlist_failed", 0)
+                    item["_expanding"] = True
+                    if title:
+                        item["title"] = title
+                    break
+        self._notify_listeners_safe()
+
+    def finish_expansion(
+        self, parent_id: str, enumerated: bool, resume: bool = True
+    ) -> None:
+        """
+        Record the end of an enumeration pass. The parent is re-queued for the
+        next page once few children are left, unless resume is False.
+        """
+        with self._lock:
+            for item in self._queue:
+                if item.get("id") == parent_id:
+                    item["_expanding"] = False
+                    item["playlist_enumerated"] = enumerated
+                    self._refresh_parent(item, resume=resume)
+                    break
+        self._notify_listeners_safe()
+
+    def _settle_child(self, item: QueueItem) -> None:
+        """Fold a finished child into its parent's counters (once)."""
+        if item.get("status") not in self._TERMINAL or item.get("_settled"):
+            return
+        parent = self._parent_of(item)
+        if parent is None:
+            return
+        item["_settled"] = True
+        if item.get("status") == "Completed":
+            parent["playlist_done"] = parent.get("playlist_done", 0) + 1
+            # Already in history; the parent keeps the count
+            self._queue.remove(item)
+        else:
+            parent["playlist_failed"] = parent.get("playlist_failed", 0) + 1
+        self._refresh_parent(parent)
+
+    def _refresh_parent(self, parent: QueueItem, resume: bool = True) -> None:
+        """Recompute a playlist parent's aggregate progress and status."""
+        total = parent.get("playlist_total", 0)
+        done = parent.get("playlist_done", 0)
+        failed = parent.get("playlist_failed", 0)
+        settled = done + failed
+        parent["progress"] = settled / total if total else 0.0
+        parent["size"] = f"{done}/{total}" if total else ""
+        if parent.get("status") != "Downloading" or parent.get("_expanding"):
+            return
+        if parent.get("playlist_enumerated"):
+            if settled >= total:
+                if failed:
+                    parent["status"] = "Error"
+                    parent["error"] = f"{failed} of {total} entries failed"
+                else:
+                    parent["status"] = "Completed"
+            return
+        pending = total - settled
+        if resume and pending <= self.PLAYLIST_WINDOW // 2:
+            parent["status"] = "Queued"
+            self._has_work.notify_all()
+
     def cancel_all(self) -> int:
         """Cancel all active downloads in the queue."""
         cancelled_count = 0
@@ -424,12 +776,52 @@ class QueueManager:
                     item["scheduled_time"] = None
                     cancelled_count += 1
 
+            for item in list(self._queue):
+                self._settle_child(item)
+
         if cancelled_count > 0:
             logger.info("Cancelled %d downloads", cancelled_count)
             self._notify_listeners_safe()
 
         return cancelled_count
 
+    def suspend_all(self) -> list[dict[str, Any]]:
+        """
+        Stop every unfinished download for a resume on the next start:
+        running jobs are interrupted without deleting their partial files.
+
+        Returns the queued, paused and in-flight items as plain data to
+        re-add later, including each job's last checkpoint. Playlist
+        entries are kept as standalone items and their parents enumerate
+        again; entries queued twice that way merge with each other.
+        """
+        suspended: list[dict[str, Any]] = []
+        with self._lock:
+            for item in self._queue:
+                item_id = item.get("id")
+                status = item.get("status")
+                if not item_id or status not in ("Queued", "Paused", *self._IN_FLIGHT):
+                    continue
+                token = self._cancel_tokens.get(item_id)
+                if token:
+                    token.suspend()
+                saved = {
+                    key: value
+                    for key, value in item.items()
+                    if not key.startswith("_")
+                    and key not in _TRANSIENT_KEYS
+                    and isinstance(value, _JSON_TYPES)
+                }
+                saved["status"] = "Paused" if status == "Paused" else "Queued"
+                suspended.append(saved)
+                item["status"] = "Paused"
+
+        if suspended:
+            logger.info("Suspended %d unfinished downloads", len(suspended))
+            self._notify_listeners_safe()
+
+        return suspended
+
     def pause_all(self) -> int:
         """Pause all queued downloads (prevents new downloads from starting)."""
         paused_count = 0
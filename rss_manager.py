@@ -2,26 +2,306 @@
 RSS Manager module for fetching and parsing RSS feeds.
 """
 
+import codecs
+import heapq
+import itertools
 import logging
+import re
 import sys
 import threading
+from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Any, Optional
 from xml.etree import ElementTree as ET
 
 import requests
 from dateutil import parser as date_parser
 
+from history_archive import archive_keys
 from ui_utils import safe_request_with_redirects, validate_url
 
 try:
     from defusedxml.ElementTree import fromstring as safe_fromstring
+    from defusedxml.ElementTree import iterparse as safe_iterparse
 except ImportError:
     safe_fromstring = None  # type: ignore
+    safe_iterparse = None  # type: ignore
+
+try:
+    from charset_normalizer import from_bytes as detect_charset
+except ImportError:
+    detect_charset = None  # type: ignore
 
 logger = logging.getLogger(__name__)
 MAX_FEED_BYTES = 5 * 1024 * 1024
+# Per-feed settings kept next to url/name, read by the feed poller
+FEED_OPTION_KEYS = ("auto_download", "include", "exclude", "video_format")
+# Response chunks fed to the parser; the first ones also decide the encoding
+_CHUNK_BYTES = 16 * 1024
+_HEAD_BYTES = 64 * 1024
+_ATOM_NS = "{http://www.w3.org/2005/Atom}"
+_YT_NS = "{http://www.youtube.com/xml/schemas/2015}"
+
+_BOMS = (
+    codecs.BOM_UTF8,
+    codecs.BOM_UTF32_LE,
+    codecs.BOM_UTF32_BE,
+    codecs.BOM_UTF16_LE,
+    codecs.BOM_UTF16_BE,
+)
+_PROLOG_ENCODING = re.compile(
+    rb"<\?xml[^>]*?\sencoding\s*=\s*[\"'][A-Za-z][\w.-]*[\"']"
+)
+_HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+# Sorts undated items last
+_NO_DATE = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _item_date_key(item: dict[str, Any]) -> datetime:
+    return item["date_obj"]
+
+
+class FeedError(Exception):
+    """A feed could not be fetched or parsed."""
+
+
+class FeedTooLarge(ValueError):
+    """The feed body exceeded MAX_FEED_BYTES."""
+
+
+def feed_time(value: str | None) -> datetime | None:
+    """Timezone-aware time of an Atom (ISO 8601) or RSS (RFC 822) date."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class _CachedFeed:
+    """Validators and parsed items of a feed's last full response."""
+
+    etag: str | None
+    last_modified: str | None
+    items: list[dict[str, Any]]
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Headers that turn the next fetch into a conditional GET."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def last_seen(self) -> tuple[str | None, datetime | None] | None:
+        """
+        Id and time of the newest item, where parsing the next response may
+        stop. None unless the feed lists its entries newest first.
+        """
+        times = [feed_time(item.get("published")) for item in self.items]
+        if not self.items or None in times:
+            return None
+        if any(a < b for a, b in zip(times, times[1:])):  # type: ignore[operator]
+            return None
+        return self.items[0].get("entry_id"), times[0]
+
+    def merge(self, fresh: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Items new since the last fetch followed by the cached ones."""
+        ids = {item.get("entry_id") for item in fresh}
+        older = [item for item in self.items if item.get("entry_id") not in ids]
+        # The feed's window does not grow with every fetch
+        return (fresh + [dict(item) for item in older])[
+            : max(len(self.items), len(fresh))
+        ]
+
+
+def _detected_encoding(head: bytes) -> str:
+    if detect_charset is not None:
+        best = detect_charset(head).best()
+        if best is not None:
+            return best.encoding
+    return "utf-8"  # decoded with replacement characters
+
+
+def _stream_encoding(head: bytes, response: Any) -> str | None:
+    """
+    How to decode the feed body, judged from its first bytes: None when a
+    BOM or the XML prolog declares the encoding (the parser decodes those
+    itself), else the Content-Type charset. Only a body declaring neither
+    that is not UTF-8 (XML's default) goes through charset detection.
+    """
+    if head.startswith(_BOMS) or _PROLOG_ENCODING.match(head):
+        return None
+    match = _HEADER_CHARSET.search(response.headers.get("Content-Type") or "")
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass  # unknown charset label
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+        return None
+    except UnicodeDecodeError:
+        return _detected_encoding(head)
+
+
+class _FeedStream:
+    """
+    File-like view of a streamed response body for iterparse: read in
+    chunks, decoded when the parser cannot do it, and capped at
+    MAX_FEED_BYTES.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], head: bytes, encoding: str | None):
+        self._chunks = chunks
+        self._pending: bytes | None = head
+        self._total = len(head)
+        self._decoder = (
+            codecs.getincrementaldecoder(encoding)("replace") if encoding else None
+        )
+
+    @classmethod
+    def open(cls, response: Any) -> Optional["_FeedStream"]:
+        """Stream for response's body, or None if it is (nearly) empty."""
+        chunks = iter(response.iter_content(chunk_size=_CHUNK_BYTES))
+        head = b""
+        for chunk in chunks:
+            head += chunk
+            if len(head) > MAX_FEED_BYTES:
+                raise FeedTooLarge("RSS feed content exceeded limit")
+            if len(head) >= _HEAD_BYTES:
+                break
+        # Clean potential XML junk before root if necessary (simple heuristic)
+        head = head.lstrip()
+        if len(head.rstrip()) < 10:
+            return None
+        return cls(chunks, head, _stream_encoding(head, response))
+
+    def read(self, _size: int = -1) -> bytes | str:
+        """The next chunk; empty at the end of the body."""
+        while True:
+            if self._pending is not None:
+                data, self._pending = self._pending, None
+            else:
+                data = next(self._chunks, b"")
+                self._total += len(data)
+                if self._total > MAX_FEED_BYTES:
+                    raise FeedTooLarge("RSS feed content exceeded limit")
+            if self._decoder is None:
+                return data
+            text = self._decoder.decode(data, final=not data)
+            if text or not data:
+                return text
+
+
+def _text(elem: ET.Element | None) -> str | None:
+    return elem.text.strip() if elem is not None and elem.text else None
+
+
+def _atom_item(entry: ET.Element) -> dict[str, Any] | None:
+    title = _text(entry.find(f"{_ATOM_NS}title"))
+    link = entry.find(f"{_ATOM_NS}link")
+    link_href = link.attrib.get("href") if link is not None else None
+    if not title or not link_href or not validate_url(link_href):
+        return None
+    published = _text(entry.find(f"{_ATOM_NS}published")) or _text(
+        entry.find(f"{_ATOM_NS}updated")
+    )
+    video_id = _text(entry.find(f"{_YT_NS}videoId"))
+    return {
+        "title": title,
+        "link": link_href,
+        "published": published,
+        "video_id": video_id,
+        "is_video": video_id is not None,
+        "entry_id": _text(entry.find(f"{_ATOM_NS}id")) or link_href,
+    }
+
+
+def _rss_item(item: ET.Element) -> dict[str, Any] | None:
+    title = _text(item.find("title"))
+    link = _text(item.find("link"))
+    if not title or not link or not validate_url(link):
+        return None
+    return {
+        "title": title,
+        "link": link,
+        "published": _text(item.find("pubDate")),
+        "is_video": False,  # RSS generic usually isn't video unless specific tags
+        "entry_id": _text(item.find("guid")) or link,
+    }
+
+
+class FeedReader:
+    """
+    Lazily yields the entries of an RSS 2.0 or Atom response, streamed
+    through defusedxml's iterparse. Each entry is converted and dropped from
+    the tree as soon as it is complete, so memory stays bounded however long
+    the feed is, and reading stops at stop_at: the (id, time) of the newest
+    entry seen by the previous fetch.
+    """
+
+    def __init__(
+        self,
+        response: Any,
+        stop_at: tuple[str | None, datetime | None] | None = None,
+    ):
+        self.response = response
+        self.stop_at = stop_at
+        self.title: str | None = None
+        self.empty = False
+        self.reached_stop = False
+
+    def _is_stop(self, item: dict[str, Any]) -> bool:
+        if self.stop_at is None:
+            return False
+        last_id, last_time = self.stop_at
+        if last_id and item.get("entry_id"):
+            return item["entry_id"] == last_id
+        published = feed_time(item.get("published"))
+        return bool(last_time and published and published <= last_time)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        if safe_iterparse is None:
+            raise RuntimeError("defusedxml not installed - cannot parse untrusted XML")
+        source = _FeedStream.open(self.response)
+        if source is None:
+            self.empty = True
+            return
+        parents: list[ET.Element] = []
+        for event, elem in safe_iterparse(source, events=("start", "end")):
+            if event == "start":
+                parents.append(elem)
+                continue
+            parents.pop()
+            parent = parents[-1] if parents else None
+            if elem.tag in (f"{_ATOM_NS}entry", "item"):
+                item = _atom_item(elem) if elem.tag != "item" else _rss_item(elem)
+                elem.clear()
+                if parent is not None:
+                    parent.remove(elem)
+                if item is None:
+                    continue
+                if self._is_stop(item):
+                    self.reached_stop = True
+                    return
+                yield item
+            elif (
+                elem.tag in (f"{_ATOM_NS}title", "title")
+                and parent is not None
+                and parent.tag in (f"{_ATOM_NS}feed", "channel")
+            ):
+                self.title = _text(elem)
 
 
 def safe_log_warning(msg, *args):
@@ -109,22 +389,30 @@ class RSSManager:
         # Config wrapper (should be dict-like or have set/get)
         self.config_manager = config_manager
         # Cache feeds locally from config
-        self.feeds: list[dict[str, str]] = self._normalize_feeds(
+        self.feeds: list[dict[str, Any]] = self._normalize_feeds(
             self.config_manager.get("rss_feeds", [])
         )
         self._lock = threading.RLock()
+        # Per-feed ETag/Last-Modified and items, so unchanged feeds cost a 304
+        self._feed_cache: dict[str, _CachedFeed] = {}
+        # Item store read by the view: each feed's items, newest first, with
+        # their dates parsed once; reads merge the feeds lazily
+        self._feed_items: dict[str, list[dict[str, Any]]] = {}
+        # Feed titles learned while fetching, saved once per refresh cycle
+        self._names_dirty = False
 
     @staticmethod
-    def _normalize_feeds(feeds: list[Any]) -> list[dict[str, str]]:
-        """Normalize feed entries into dicts with url/name."""
-        normalized = []
+    def _normalize_feeds(feeds: list[Any]) -> list[dict[str, Any]]:
+        """Normalize feed entries into dicts with url/name (and options)."""
+        normalized: list[dict[str, Any]] = []
         for f in feeds:
             if isinstance(f, str):
                 normalized.append({"url": f, "name": f})
             elif isinstance(f, dict) and f.get("url"):
                 url = str(f["url"])
                 name = str(f.get("name", url))
-                normalized.append({"url": url, "name": name})
+                options = {k: f[k] for k in FEED_OPTION_KEYS if k in f}
+                normalized.append({"url": url, "name": name, **options})
         return normalized
 
     def _save_feeds(self):
@@ -141,7 +429,7 @@ class RSSManager:
             if isinstance(self.config_manager, dict):
                 self.config_manager["rss_feeds"] = list(self.feeds)
 
-    def get_feeds(self) -> list[dict[str, str]]:
+    def get_feeds(self) -> list[dict[str, Any]]:
         """Return list of feeds."""
         with self._lock:
             return list(self.feeds)
@@ -163,77 +451,49 @@ class RSSManager:
         with self._lock:
             initial_len = len(self.feeds)
             self.feeds = [f for f in self.feeds if f["url"] != url]
+            self._feed_cache.pop(url, None)
+            self._feed_items.pop(url, None)
             if len(self.feeds) < initial_len:
                 self._save_feeds()
                 logger.info("Removed RSS feed: %s", url)
 
     def fetch_feed(self, url: str) -> list[dict[str, Any]]:
         """Fetch and parse a single RSS feed (Instance wrapper)."""
-        return RSSManager.parse_feed(url, self)
+        items = RSSManager.parse_feed(url, self)
+        self.flush_feed_names()
+        return items
+
+    def _cached_feed(self, url: str) -> _CachedFeed | None:
+        with self._lock:
+            return self._feed_cache.get(url)
+
+    def _store_feed(
+        self, url: str, headers: Any, items: list[dict[str, Any]]
+    ) -> None:
+        """Remember a full response's items and how to revalidate them."""
+        with self._lock:
+            self._feed_cache[url] = _CachedFeed(
+                headers.get("ETag"),
+                headers.get("Last-Modified"),
+                [dict(item) for item in items],
+            )
 
     @staticmethod
     def parse_feed(
         url: str, instance: Optional["RSSManager"] = None
     ) -> list[dict[str, Any]]:
-        """Fetch and parse a single RSS feed safely."""
+        """
+        Fetch and parse a single RSS feed safely (errors are logged and give
+        an empty list). With an instance, the request is conditional on the
+        feed's last ETag/Last-Modified and a 304 returns the items parsed
+        back then; a changed feed is only read up to the newest entry seen
+        last time.
+        """
         try:
-            if not validate_url(url, resolve_host=True):
-                safe_log_warning("Invalid RSS feed URL blocked: %s", url)
-                return []
-
-            logger.debug("Fetching RSS feed: %s", url)
-            # Strict timeout
-            response = safe_request_with_redirects("GET", url, timeout=(5, 10))
-            response.raise_for_status()
-            content_length = response.headers.get("Content-Length")
-            if content_length:
-                try:
-                    if int(content_length) > MAX_FEED_BYTES:
-                        safe_log_warning("RSS feed too large: %s", url)
-                        return []
-                except ValueError:
-                    pass
-
-            # Use apparent_encoding for robustness against misconfigured servers
-            response.encoding = response.apparent_encoding
-            content_text = response.text
-            if len(content_text.encode(response.encoding or "utf-8", "ignore")) > MAX_FEED_BYTES:
-                safe_log_warning("RSS feed content exceeded limit: %s", url)
-                return []
-
-            # Check for empty or excessively small content
-            if not content_text or len(content_text.strip()) < 10:
-                safe_log_warning("Empty or too short content for feed: %s", url)
-                return []
-
-            # Clean potential XML junk before root if necessary (simple heuristic)
-            content_text = content_text.strip()
-
-            root = None
-            # Safe XML parsing - SECURITY: Only use defusedxml for untrusted content
-            if safe_fromstring is not None:
-                try:
-                    root = safe_fromstring(content_text)
-                # pylint: disable=broad-exception-caught
-                except Exception as e:
-                    # Log error and fail securely - do NOT fall back to unsafe parsing
-                    safe_log_warning("XML parse error for %s: %s", url, e)
-                    return []
-            else:
-                # defusedxml not available - fail securely
-                safe_log_error(
-                    "defusedxml not installed - cannot parse untrusted XML from %s", url
-                )
-                return []
-
-            items: list[dict[str, Any]] = []
-            if "feed" in root.tag:  # Atom
-                RSSManager._parse_atom_feed(root, items, instance, url)
-            else:  # RSS
-                RSSManager._parse_rss_feed(root, items, instance, url)
-
-            return items
-
+            return RSSManager._fetch_items(url, instance)
+        except FeedError as e:
+            safe_log_warning("%s", e)
+            return []
         except requests.RequestException as e:
             safe_log_warning("Network error fetching feed %s: %s", url, e)
             return []
@@ -243,149 +503,194 @@ class RSSManager:
             return []
 
     @staticmethod
-    def _parse_atom_feed(
-        root: ET.Element,
-        items: list[dict[str, Any]],
-        instance: Optional["RSSManager"],
-        url: str,
-    ):
-        """Parse Atom feed entries."""
+    def _fetch_items(
+        url: str, instance: Optional["RSSManager"] = None
+    ) -> list[dict[str, Any]]:
+        """parse_feed without the error handling: failures raise."""
         # pylint: disable=protected-access
-        ns = {
-            "atom": "http://www.w3.org/2005/Atom",
-            "yt": "http://www.youtube.com/xml/schemas/2015",
-        }
+        if not validate_url(url, resolve_host=True):
+            raise FeedError(f"Invalid RSS feed URL blocked: {url}")
+        # Safe XML parsing - SECURITY: Only use defusedxml for untrusted content
+        if safe_iterparse is None:
+            raise FeedError(
+                f"defusedxml not installed - cannot parse untrusted XML from {url}"
+            )
+
+        logger.debug("Fetching RSS feed: %s", url)
+        cached = instance._cached_feed(url) if instance else None
+        # Strict timeout
+        response = safe_request_with_redirects(
+            "GET",
+            url,
+            timeout=(5, 10),
+            headers=cached.conditional_headers() if cached else {},
+            stream=True,
+        )
+        try:
+            if cached is not None and response.status_code == 304:
+                logger.debug("RSS feed not modified: %s", url)
+                return [dict(item) for item in cached.items]
+            response.raise_for_status()
+            content_length = response.headers.get("Content-Length")
+            if content_length:
+                try:
+                    if int(content_length) > MAX_FEED_BYTES:
+                        raise FeedError(f"RSS feed too large: {url}")
+                except ValueError:
+                    pass
 
-        # Update feed title
+            reader = FeedReader(response, cached.last_seen() if cached else None)
+            try:
+                items = list(reader)
+            except FeedTooLarge as e:
+                raise FeedError(f"RSS feed content exceeded limit: {url}") from e
+            # pylint: disable=broad-exception-caught
+            except Exception as e:
+                # Fail securely - do NOT fall back to unsafe parsing
+                raise FeedError(f"XML parse error for {url}: {e}") from e
+        finally:
+            response.close()
+
+        # Check for empty or excessively small content
+        if reader.empty:
+            raise FeedError(f"Empty or too short content for feed: {url}")
+
+        if cached is not None and reader.reached_stop:
+            items = cached.merge(items)
         if instance:
-            title_elem = root.find("atom:title", ns)
-            if title_elem is not None and title_elem.text:
-                instance._update_feed_name_safe(url, title_elem.text)
-
-        for entry in root.findall("atom:entry", ns):
-            title = entry.find("atom:title", ns)
-            link = entry.find("atom:link", ns)
-            published = entry.find("atom:published", ns)
-            if published is None:
-                published = entry.find("atom:updated", ns)
-
-            video_id = entry.find("yt:videoId", ns)
-
-            link_href = link.attrib.get("href") if link is not None else None
-
-            if (
-                title is not None
-                and title.text
-                and link_href
-                and validate_url(link_href)
-            ):
-                items.append(
-                    {
-                        "title": title.text,
-                        "link": link_href,
-                        "published": published.text if published is not None else None,
-                        "video_id": video_id.text if video_id is not None else None,
-                        "is_video": video_id is not None,
-                    }
-                )
+            if reader.title:
+                instance._update_feed_name_safe(url, reader.title)
+            instance._store_feed(url, response.headers, items)
+        return items
 
-    @staticmethod
-    def _parse_rss_feed(
-        root: ET.Element,
-        items: list[dict[str, Any]],
-        instance: Optional["RSSManager"],
-        url: str,
-    ):
-        """Parse RSS 2.0 feed items."""
-        # pylint: disable=protected-access
-        channel = root.find("channel")
-        if channel is None:
-            return
+    def refresh_feed(self, url: str) -> list[dict[str, Any]]:
+        """
+        Fetch a feed into the item store and return its items.
 
-        if instance:
-            title_elem = channel.find("title")
-            if title_elem is not None and title_elem.text:
-                instance._update_feed_name_safe(url, title_elem.text)
-
-        for item in channel.findall("item"):
-            title = item.find("title")
-            link = item.find("link")
-            pub_date = item.find("pubDate")
-
-            if (
-                title is not None
-                and title.text
-                and link is not None
-                and link.text
-                and validate_url(link.text)
-            ):
-                items.append(
-                    {
-                        "title": title.text,
-                        "link": link.text,
-                        "published": pub_date.text if pub_date is not None else None,
-                        "is_video": False,  # RSS generic usually isn't video unless specific tags
-                    }
-                )
+        Raises:
+            FeedError: If the feed is invalid, too large or unparsable.
+            requests.RequestException: On network errors.
+        """
+        items = RSSManager._fetch_items(url, self)
+        self._ingest(url, items)
+        return items
 
     def _update_feed_name_safe(self, url: str, name: str):
-        """Update feed name thread-safely."""
+        """
+        Name a feed after its title (if it has none yet); persisted by the
+        next flush_feed_names.
+        """
         with self._lock:
-            updated = False
             for feed in self.feeds:
                 if feed["url"] == url and feed["name"] == url:
                     feed["name"] = name
-                    updated = True
+                    self._names_dirty = True
                     break
-            if updated:
+
+    def flush_feed_names(self):
+        """Save feed names learned since the last flush (one config write)."""
+        with self._lock:
+            if self._names_dirty:
+                self._names_dirty = False
                 self._save_feeds()
 
+    def _feed_name(self, url: str) -> str:
+        with self._lock:
+            for feed in self.feeds:
+                if feed["url"] == url:
+                    return feed["name"]
+        return url
+
+    @staticmethod
+    def _item_date(item: dict[str, Any]) -> datetime:
+        if not item.get("published"):
+            return _NO_DATE
+        try:
+            date = date_parser.parse(item["published"])
+        except Exception:  # pylint: disable=broad-exception-caught
+            return _NO_DATE
+        return date if date.tzinfo else date.replace(tzinfo=timezone.utc)
+
+    def _ingest(self, url: str, items: list[dict[str, Any]]) -> None:
+        """
+        Replace a feed's items in the store, sorted newest first. Dates of
+        entries already stored (same id and publish time) are not parsed
+        again.
+        """
+        feed_name = self._feed_name(url)
+        with self._lock:
+            previous = {
+                (i.get("entry_id"), i.get("published")): i["date_obj"]
+                for i in self._feed_items.get(url, ())
+            }
+        stamped = []
+        for item in items:
+            item = {**item, "feed_name": feed_name, "feed_url": url}
+            date = previous.get((item.get("entry_id"), item.get("published")))
+            item["date_obj"] = date if date is not None else self._item_date(item)
+            stamped.append(item)
+        # Feeds list newest first already, so this is usually a linear pass
+        stamped.sort(key=_item_date_key, reverse=True)
+        with self._lock:
+            self._feed_items[url] = stamped
+
     def get_aggregated_items(self) -> list[dict[str, Any]]:
-        """Fetch all feeds concurrently and return combined items."""
-        all_items = []
+        """Fetch all feeds concurrently and return the combined items."""
         feeds_snapshot = self.get_feeds()
 
         with ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_feed = {
-                # Ensure we pass the URL string, not the dict, if it's a list of dicts
-                executor.submit(
-                    self.fetch_feed, f["url"] if isinstance(f, dict) else f
-                ): f
+            future_to_url = {
+                executor.submit(self.refresh_feed, f["url"]): f["url"]
                 for f in feeds_snapshot
             }
 
-            for future in as_completed(future_to_feed):
-                feed = future_to_feed[future]
-                # Handle string feed input gracefully if tests push strings
-                feed_url = feed["url"] if isinstance(feed, dict) else feed
-                feed_name = (
-                    feed.get("name", feed_url) if isinstance(feed, dict) else feed_url
-                )
-
+            for future in as_completed(future_to_url):
+                feed_url = future_to_url[future]
                 try:
-                    items = future.result()
-                    for item in items:
-                        item["feed_name"] = feed_name
-                        # Parse date
-                        try:
-                            item["date_obj"] = (
-                                date_parser.parse(item["published"])
-                                if item.get("published")
-                                else datetime.min
-                            )
-                        except Exception:  # pylint: disable=broad-exception-caught
-                            item["date_obj"] = datetime.min
-                        all_items.append(item)
+                    future.result()
                 except Exception as e:  # pylint: disable=broad-exception-caught
                     safe_log_error("Feed fetch failed for %s: %s", feed_url, e)
 
-        # Sort by date descending
-        all_items.sort(key=lambda x: x.get("date_obj", datetime.min), reverse=True)
-        return all_items
+        self.flush_feed_names()
+        return self.get_all_items()
+
+    @staticmethod
+    def unarchived_items(
+        items: list[dict[str, Any]], history_manager: Any
+    ) -> list[dict[str, Any]]:
+        """
+        Items not yet in the download archive, for auto-download.
+        Checked locally by video id / link, without touching the network.
+        """
+        if not history_manager:
+            return items
+        return history_manager.filter_unarchived(
+            items,
+            lambda item: archive_keys(
+                item.get("link"),
+                f"youtube:{item['video_id']}" if item.get("video_id") else None,
+            ),
+        )
 
-    def get_all_items(self) -> list[dict[str, Any]]:
-        """Alias for get_aggregated_items."""
-        return self.get_aggregated_items()
+    def iter_items(self) -> Iterator[dict[str, Any]]:
+        """
+        Items of every feed from the store, newest first, as of each feed's
+        last fetch (no network access). The per-feed lists are merged
+        lazily, so reading a page costs about the page size.
+        """
+        with self._lock:
+            feeds = list(self._feed_items.values())
+        return heapq.merge(*feeds, key=_item_date_key, reverse=True)
+
+    def get_all_items(
+        self, offset: int = 0, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Items from the store, newest first; with a limit, only the page of
+        up to limit items starting at offset.
+        """
+        stop = None if limit is None else offset + limit
+        return list(itertools.islice(self.iter_items(), offset, stop))
 
     @classmethod
     def get_latest_video(cls, url: str) -> dict[str, Any] | None:
@@ -0,0 +1,58 @@
+"""Benchmark YoutubeDL construction overhead with and without the pool."""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402  pylint: disable=wrong-import-position
+
+from downloader.engines.ydl_pool import (  # noqa: E402  pylint: disable=wrong-import-position
+    YoutubeDLPool,
+)
+
+
+def _options(job: int) -> dict:
+    return {
+        "quiet": True,
+        "no_warnings": True,
+        "outtmpl": f"/tmp/bench/{job}/%(title)s.%(ext)s",
+        "format": "bestvideo+bestaudio/best",
+        "merge_output_format": "mp4",
+        "writethumbnail": True,
+        "postprocessors": [
+            {"key": "FFmpegMetadata"},
+            {"key": "EmbedThumbnail"},
+        ],
+        "progress_hooks": [lambda d: None],
+    }
+
+
+def main() -> None:
+    """Run both variants and print per-job setup cost."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for job in range(args.jobs):
+        with yt_dlp.YoutubeDL(_options(job)):
+            pass
+    fresh = (time.perf_counter() - started) / args.jobs
+
+    pool = YoutubeDLPool(max_uses=args.jobs + 1)
+    started = time.perf_counter()
+    for job in range(args.jobs):
+        with pool.checkout(_options(job)):
+            pass
+    pooled = (time.perf_counter() - started) / args.jobs
+
+    print(f"fresh instance per job: {fresh * 1000:.2f} ms")
+    print(f"pooled instance per job: {pooled * 1000:.2f} ms")
+    print(f"pool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
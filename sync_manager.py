@@ -1,15 +1,24 @@
 """
 Synchronizes configuration and history to cloud storage.
+
+History is synced as deltas: each device uploads the rows added, changed or
+deleted since its last upload (from the history change log) as a numbered,
+gzip-compressed file, and a shared manifest records how many deltas every
+device has uploaded. Down-sync merges the deltas each device has not
+applied yet, so sync traffic follows activity rather than history size.
 """
 
+import gzip
 import json
 import logging
 import os
 import pathlib
+import re
 import shutil
 import tempfile
 import threading
 import zipfile
+from typing import Any
 
 # from ui_utils import is_safe_path  # Unused import
 
@@ -30,6 +39,15 @@ _SENSITIVE_CONFIG_KEYS = {
     "auth",
 }
 
+HISTORY_MANIFEST = "history_manifest.json"
+DELTA_VERSION = 1
+# Device ids come from the shared manifest and end up in file names
+_DEVICE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _delta_name(device_id: str, position: int) -> str:
+    return f"history_delta_{device_id}_{position}.json.gz"
+
 
 class SyncManager:
     """
@@ -116,14 +134,12 @@ class SyncManager:
                 config_data = self._get_config_snapshot()
                 config_file = self._write_temp_json(config_data, filename="config.json")
 
-                # 2. Export History (if available)
+                # 2. Upload history changes (if available)
                 if self.history:
                     try:
-                        db_path_str = self._resolve_history_db_path()
-                        if os.path.exists(db_path_str):
-                            self.cloud.upload_file(db_path_str)
+                        self._sync_history_up()
                     except Exception as e:  # pylint: disable=broad-exception-caught
-                        logger.warning("Failed to upload history DB: %s", e)
+                        logger.warning("Failed to upload history changes: %s", e)
 
                 # 3. Upload Config
                 if config_file:
@@ -167,16 +183,13 @@ class SyncManager:
                 else:
                     logger.warning("No remote config found")
 
-                # 2. Download History
+                # 2. Merge history changes from other devices
                 if self.history:
-                    local_history_path = os.path.join(
-                        tempfile.gettempdir(), "history_downloaded.db"
-                    )
-                    if self.cloud.download_file("history.db", local_history_path):
-                        self._replace_history_db(local_history_path)
-                        logger.info("History synced from cloud")
-                    else:
-                        logger.warning("No remote history DB found")
+                    try:
+                        merged = self._sync_history_down()
+                        logger.info("History synced from cloud (%d changes)", merged)
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        logger.warning("Failed to merge remote history: %s", e)
 
             except Exception as e:
                 logger.error("Sync DOWN failed: %s", e)
@@ -288,31 +301,133 @@ class SyncManager:
                 return resolved
         return fallback
 
-    def _replace_history_db(self, source_path: str) -> None:
-        """Replace the local history DB with a downloaded file."""
-        target_db_path = self._resolve_history_db_path()
-        parent = os.path.dirname(target_db_path)
-        if parent and not os.path.exists(parent):
-            os.makedirs(parent, exist_ok=True)
+    def _download_manifest(self, workdir: str) -> dict[str, int]:
+        """Deltas uploaded per device, from the shared manifest."""
+        path = os.path.join(workdir, HISTORY_MANIFEST)
+        if not self.cloud.download_file(HISTORY_MANIFEST, path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable history manifest: %s", e)
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            device: count
+            for device, count in data.items()
+            if isinstance(device, str)
+            and _DEVICE_ID_RE.match(device)
+            and isinstance(count, int)
+            and not isinstance(count, bool)
+        }
+
+    def _sync_history_up(self) -> None:
+        """Upload local history changes as the next delta of this device."""
+        rows, deleted, last_seq = self.history.pending_changes()
+        if not last_seq:
+            logger.debug("No history changes to sync")
+            return
+        device = self.history.sync_device_id()
+        uploaded = self.history.sync_position("uploaded")
+        if device is None or uploaded is None:
+            return
+        position = uploaded + 1
+        with tempfile.TemporaryDirectory(prefix="streamcatch_sync_") as workdir:
+            # Cloud files are named after the local file
+            delta_path = os.path.join(workdir, _delta_name(device, position))
+            with gzip.open(delta_path, "wt", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": DELTA_VERSION,
+                        "device": device,
+                        "position": position,
+                        "rows": rows,
+                        "deleted": deleted,
+                    },
+                    f,
+                    default=str,
+                )
+            self.cloud.upload_file(delta_path)
+
+            # Published only once the delta itself is uploaded
+            manifest = self._download_manifest(workdir)
+            manifest[device] = position
+            manifest_path = os.path.join(workdir, HISTORY_MANIFEST)
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            self.cloud.upload_file(manifest_path)
+        if not self.history.mark_uploaded(last_seq, position):
+            return
+        logger.info(
+            "Uploaded history delta %d (%d rows, %d deletions)",
+            position,
+            len(rows),
+            len(deleted),
+        )
 
+    def _download_delta(
+        self, workdir: str, device: str, position: int
+    ) -> dict[str, Any] | None:
+        name = _delta_name(device, position)
+        path = os.path.join(workdir, name)
+        if not self.cloud.download_file(name, path):
+            return None
         try:
-            os.replace(source_path, target_db_path)
-        except OSError as e:
-            logger.warning("Failed to replace history DB: %s", e)
-            try:
-                shutil.copy2(source_path, target_db_path)
-            except Exception as copy_exc:  # pylint: disable=broad-exception-caught
-                logger.error("Failed to copy history DB: %s", copy_exc)
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                delta = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable history delta %s: %s", name, e)
+            return None
         finally:
-            if os.path.exists(source_path):
-                try:
-                    os.remove(source_path)
-                except OSError as exc:
-                    logger.debug(
-                        "Failed to remove temporary history DB %s: %s",
-                        source_path,
-                        exc,
+            if os.path.exists(path):
+                os.remove(path)
+        if (
+            not isinstance(delta, dict)
+            or delta.get("version") != DELTA_VERSION
+            or not isinstance(delta.get("rows"), list)
+            or not isinstance(delta.get("deleted"), list)
+        ):
+            logger.warning("Ignoring invalid history delta %s", name)
+            return None
+        return delta
+
+    def _sync_history_down(self) -> int:
+        """
+        Merge the deltas other devices uploaded since they were last applied
+        here, in order. Returns the number of rows changed.
+        """
+        device = self.history.sync_device_id()
+        if device is None:
+            return 0
+        merged = 0
+        with tempfile.TemporaryDirectory(prefix="streamcatch_sync_") as workdir:
+            manifest = self._download_manifest(workdir)
+            for other, count in manifest.items():
+                if other == device:
+                    continue
+                applied = self.history.sync_position(f"applied:{other}")
+                if applied is None:
+                    continue
+                for position in range(applied + 1, count + 1):
+                    delta = self._download_delta(workdir, other, position)
+                    if delta is None:
+                        # Retried next time; later deltas must wait for it
+                        logger.warning(
+                            "History delta %d of device %s unavailable", position, other
+                        )
+                        break
+                    changed = self.history.apply_changes(
+                        other,
+                        position,
+                        [r for r in delta["rows"] if isinstance(r, dict)],
+                        [d for d in delta["deleted"] if isinstance(d, str)],
                     )
+                    if changed is None:
+                        break  # retried next time, like a missing delta
+                    merged += changed
+        return merged
 
     def export_data(self, export_path: str):
         """Exports all app data to a zip file."""
@@ -342,7 +457,7 @@ class SyncManager:
                         db_path_str = os.path.abspath(db_path_str)
 
                     if os.path.exists(db_path_str):
-                        zf.write(db_path_str, "history.db")
+                        self._write_history_snapshot(zf, db_path_str)
                 except Exception as e:  # pylint: disable=broad-exception-caught
                     logger.warning("Could not include history.db in export: %s", e)
 
@@ -351,6 +466,20 @@ class SyncManager:
             logger.error("Export failed: %s", e)
             raise  # Raise so UI can show error
 
+    def _write_history_snapshot(self, zf: zipfile.ZipFile, db_path: str) -> None:
+        """
+        Add the history database to an export. A backup snapshot is taken
+        so rows in the WAL are included and concurrent writes cannot leave
+        a torn copy; without a history manager the file is copied as is.
+        """
+        if not self.history or not hasattr(self.history, "snapshot"):
+            zf.write(db_path, "history.db")
+            return
+        with tempfile.TemporaryDirectory(prefix="streamcatch_export_") as workdir:
+            snapshot_path = os.path.join(workdir, "history.db")
+            self.history.snapshot(snapshot_path)
+            zf.write(snapshot_path, "history.db")
+
     def _import_history_db(self, zf: zipfile.ZipFile) -> None:
         """Helper to extract and replace history DB."""
         if "history.db" not in zf.namelist():
@@ -4,17 +4,30 @@ Handles background tasks like downloading, fetching info, etc.
 Executes operations that shouldn't block the UI thread.
 """
 
+import dataclasses
 import logging
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from typing import Any, cast
 
 import flet as ft
 
 import app_state
+from downloader.checkpoint import progress_checkpoint
 from downloader.core import download_video
+from downloader.dedup import deduplicate
+from downloader.disk_ledger import get_disk_ledger
+from downloader.engines.aria2 import aria2_settings, configure_aria2
+from downloader.engines.ytdlp import YTDLPWrapper
+from downloader.extractors.telegram import TelegramExtractor
 from downloader.info import get_video_info
+from downloader.metadata_cache import get_metadata_cache, media_key_from_info
+from downloader.playlist import PAGE_SIZE, close_enumerator, open_enumerator
+from downloader.postprocess import PostProcessJob, get_postprocess_stage
+from downloader.staging import StagedJob
 from downloader.types import DownloadOptions, DownloadStatus
+from history_archive import archive_keys
 from localization_manager import LocalizationManager as LM
 from queue_manager import CancelToken
 from ui_utils import get_default_download_path, run_on_ui_thread
@@ -28,6 +41,25 @@ _SUBMISSION_THROTTLE = threading.Semaphore(
 )  # Control task submission rate to executor
 _ACTIVE_COUNT_LOCK = threading.Lock()
 
+# Item options that playlist entries inherit from their parent
+_CHILD_OPTION_KEYS = (
+    "output_path",
+    "output_template",
+    "video_format",
+    "audio_format",
+    "audio_only",
+    "subtitle_lang",
+    "sponsorblock",
+    "use_aria2c",
+    "gpu_accel",
+    "cookies_from_browser",
+    "chapters",
+    "split_chapters",
+    "proxy",
+    "rate_limit",
+    "download_profile",
+)
+
 _executor_lock = threading.Lock()
 _executor: ThreadPoolExecutor | None = None  # pylint: disable=invalid-name
 
@@ -88,16 +120,21 @@ def configure_concurrency(max_workers: int) -> bool:
                 _executor.shutdown(wait=False)
                 _executor = None
 
+        # The shared aria2c daemon runs as many transfers as the queue
+        configure_aria2(
+            dataclasses.replace(aria2_settings(), max_concurrent_downloads=max_workers)
+        )
         return True
     except Exception as e:
         logger.error("Failed to configure concurrency: %s", e)
         return False
 
 
-def _log_to_history(item: dict, result: dict | None):
+def _log_to_history(item: dict, result: dict | None, elapsed: float | None = None):
     """Log download result to history database."""
     try:
         if app_state.state.history_manager:
+            size_bytes = result.get("size") if result else None
             entry = {
                 "url": item.get("url"),
                 "title": item.get("title", "Unknown"),
@@ -107,12 +144,78 @@ def _log_to_history(item: dict, result: dict | None):
                 "file_size": (
                     result.get("file_size") if result else item.get("file_size")
                 ),
+                "file_size_bytes": (
+                    size_bytes if isinstance(size_bytes, int | float) else None
+                ),
+                "duration": result.get("duration") if result else None,
+                "elapsed": elapsed,
+                "content_hash": result.get("content_hash") if result else None,
             }
             app_state.state.history_manager.add_entry(entry)
+            if result:
+                app_state.state.history_manager.add_to_archive(
+                    archive_keys(
+                        item.get("url"),
+                        result.get("media_key") or item.get("media_key"),
+                    ),
+                    url=item.get("url"),
+                    title=result.get("title") or item.get("title"),
+                    filepath=result.get("filepath"),
+                )
     except Exception as e:  # pylint: disable=broad-exception-caught
         logger.error("Failed to log history: %s", e)
 
 
+def _deduplicate(result: dict[str, Any]) -> dict[str, Any]:
+    """Link or drop a finished file identical to one already downloaded."""
+    history = getattr(app_state.state, "history_manager", None)
+    if not history or not result.get("content_hash"):
+        return result
+    mode = app_state.state.config.get("dedup_mode", "hardlink")
+    try:
+        return deduplicate(result, history.find_by_hash, mode)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.warning("Duplicate check failed for %s: %s", result.get("filepath"), e)
+        return result
+
+
+def _reserve_space(item: dict[str, Any]) -> bool:
+    """
+    Reserve the item's expected size on its output volume. False means it
+    must wait for running downloads there to finish; raises OSError if it
+    cannot fit at all.
+    """
+    if item.get("playlist") and not item.get("parent_id"):
+        return True  # the parent only enumerates; each entry reserves its own
+    info = item.get("prefetched_info")
+    if not info:
+        info = get_metadata_cache().get_streams(item.get("url", ""))
+        if info:
+            item["prefetched_info"] = info  # reused by the job
+    output_path = item.get("output_path") or get_default_download_path(
+        app_state.state.config.get("download_path")
+    )
+    return get_disk_ledger().reserve(str(item["id"]), output_path, info)
+
+
+def _release_space(item_id: Any) -> None:
+    """Return an item's reserved space and let waiting items be admitted."""
+    if get_disk_ledger().release(str(item_id)):
+        qm = app_state.state.queue_manager
+        if qm:
+            qm.notify_workers()
+
+
+def _drop_archived(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Remove playlist entries the download archive already has (no network)."""
+    history = getattr(app_state.state, "history_manager", None)
+    if not history:
+        return entries
+    return history.filter_unarchived(
+        entries, lambda e: archive_keys(e.get("url"), e.get("media_key"))
+    )
+
+
 class DownloadJob:
     """
     Encapsulates the state and logic for a single download task.
@@ -121,10 +224,12 @@ class DownloadJob:
     def __init__(self, item: dict, page: ft.Page | None):
         self.item = item
         self.page = page
-        self.item_id = item.get("id")
+        # "" for an item without an id; run() rejects it
+        self.item_id: str = str(item.get("id") or "")
         self.qm = app_state.state.queue_manager
         self.cancel_token = CancelToken()
         self.url = item.get("url", "")
+        self._started_at = time.monotonic()
 
     def run(self):
         """Execute the download job."""
@@ -132,38 +237,106 @@ class DownloadJob:
             logger.error("Invalid job item: %s", self.item)
             return
 
-        # Explicitly assert item_id is not None for mypy
-        assert self.item_id is not None
-
         # Check shutdown
         flag = getattr(app_state.state, "shutdown_flag", None)
         if flag and flag.is_set():
             self.qm.update_item_status(self.item_id, DownloadStatus.CANCELLED)
+            _release_space(self.item_id)
             return
 
         self.qm.register_cancel_token(self.item_id, self.cancel_token)
 
+        handed_off = False
         try:
-            self._execute_download()
+            handed_off = self._execute_download()
         except Exception as e:  # pylint: disable=broad-exception-caught
             self._handle_error(e)
         finally:
-            self.qm.unregister_cancel_token(self.item_id, self.cancel_token)
-
-    def _execute_download(self):
+            # A post-processing item stays cancellable (and keeps its disk
+            # reservation) until the stage is done
+            if not handed_off:
+                self.qm.unregister_cancel_token(self.item_id, self.cancel_token)
+                _release_space(self.item_id)
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._started_at
+
+    def _execute_download(self) -> bool:
+        """Download the item; True if it was handed to the post-processing stage."""
+        self._started_at = time.monotonic()
         self.qm.update_item_status(self.item_id, DownloadStatus.DOWNLOADING)
 
         options = self._build_options()
+        if self._is_playlist_parent(options) and self._expand_playlist(options):
+            return False
+        if self._merge_duplicate(options):
+            return False
         logger.info("Starting download for %s", self.url)
 
         result = download_video(options)
 
+        staged = result.pop("staging", None)
+        pending = result.pop("postprocess", None)
+        if isinstance(pending, PostProcessJob):
+            self._start_postprocessing(
+                pending, staged if isinstance(staged, StagedJob) else None
+            )
+            return True
+        self._complete(result)
+        return False
+
+    def _merge_duplicate(self, options: DownloadOptions) -> bool:
+        """Follow an in-flight download of the same media instead of fetching."""
+        media_key = media_key_from_info(options.prefetched_info) or self.item.get(
+            "media_key"
+        )
+        if not media_key:
+            return False  # the URL was already checked when it was queued
+        leader = self.qm.merge_duplicate(self.item_id, media_key)
+        if leader:
+            logger.info("%s is already being downloaded (item %s)", self.url, leader)
+        return bool(leader)
+
+    def _complete(self, result: dict[str, Any]) -> None:
+        result = _deduplicate(result)
         self.qm.update_item_status(self.item_id, DownloadStatus.COMPLETED, result)
-        _log_to_history(self.item, result)
+        _log_to_history(self.item, result, elapsed=self._elapsed())
 
         if self.page:
             self._notify_success()
 
+    def _start_postprocessing(
+        self, job: PostProcessJob, staged: StagedJob | None = None
+    ) -> None:
+        """Queue the ffmpeg work on its own stage and free the download slot."""
+        self.qm.start_postprocessing(self.item_id)
+        future = get_postprocess_stage().submit(job, self.cancel_token)
+        future.add_done_callback(lambda f: self._finish_postprocessing(f, job, staged))
+
+    def _finish_postprocessing(
+        self,
+        future: "Future[dict[str, Any]]",
+        job: PostProcessJob,
+        staged: StagedJob | None = None,
+    ) -> None:
+        try:
+            try:
+                info = future.result()
+            except CancelledError as e:  # stage shut down before it ran
+                raise InterruptedError("Download Cancelled by user") from e
+            final = info.get("filepath") or job.filepath  # e.g. after audio extraction
+            result = YTDLPWrapper.video_result(info, final)
+            if staged is not None:
+                result = staged.publish(result)
+            self._complete(result)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            if staged is not None:
+                staged.abandon(self.cancel_token)
+            self._handle_error(e)
+        finally:
+            self.qm.unregister_cancel_token(self.item_id, self.cancel_token)
+            _release_space(self.item_id)
+
     def _build_options(self) -> DownloadOptions:
         preferred_path = app_state.state.config.get("download_path")
         output_path = self.item.get("output_path") or get_default_download_path(
@@ -199,7 +372,8 @@ class DownloadJob:
             video_fmt = "audio"
             audio_fmt = audio_fmt or "mp3"
         elif profile == "archive":
-            self.item["playlist"] = True
+            # Entries fanned out from an archived playlist are single videos
+            self.item["playlist"] = "parent_id" not in self.item
             self.item["sponsorblock"] = False
             self.item["split_chapters"] = True
 
@@ -208,6 +382,12 @@ class DownloadJob:
         )
         split_chapters = self.item.get("split_chapters", self.item.get("chapters"))
 
+        # Reuse the resolved info from the metadata lookup so the engine can
+        # skip a second extraction while the cached stream URLs are valid
+        prefetched = self.item.pop("prefetched_info", None)
+        if not prefetched:
+            prefetched = get_metadata_cache().get_streams(self.url)
+
         return DownloadOptions(
             url=self.url,
             output_path=output_path,
@@ -231,7 +411,110 @@ class DownloadJob:
             download_profile=profile,
             download_item=self.item,
             filename=self.item.get("filename"),
+            prefetched_info=prefetched,
+            defer_postprocessing=True,
+        )
+
+    def _is_playlist_parent(self, options: DownloadOptions) -> bool:
+        if self.item.get("parent_id") or options.force_generic:
+            return False
+        if TelegramExtractor.is_telegram_url(self.url):
+            # A channel link is a batch of posts whatever the playlist option
+            return TelegramExtractor.channel_name(self.url) is not None
+        return options.playlist and YTDLPWrapper.supports(self.url)
+
+    def _child_item(self, entry: dict[str, Any]) -> dict[str, Any]:
+        child = {k: self.item[k] for k in _CHILD_OPTION_KEYS if k in self.item}
+        child.update(
+            url=entry["url"],
+            title=entry["title"],
+            media_key=entry.get("media_key"),
+            playlist=False,
+        )
+        return child
+
+    def _expand_playlist(self, options: DownloadOptions) -> bool:
+        """
+        Fan the playlist out into child queue items, one page at a time, until
+        PLAYLIST_WINDOW children are pending. Entries in the download archive
+        are skipped; with the "archive" profile a full page of them ends the
+        sync, since channels list newest first. Returns False if the URL
+        turned out not to be a playlist (the caller then downloads it directly).
+        """
+        flat_opts: dict[str, Any] = {"proxy": options.proxy}
+        if options.cookies_from_browser:
+            flat_opts["cookiesfrombrowser"] = (options.cookies_from_browser, None)
+
+        # Resume after entries already queued or skipped, should the
+        # enumerator have been evicted since the last pass
+        enumerator = open_enumerator(
+            self.item_id,
+            self.url,
+            flat_opts,
+            offset=self.item.get("playlist_offset", 0),
+        )
+        if not enumerator.is_playlist:
+            close_enumerator(self.item_id)
+            return False
+
+        title = self.item.get("title")
+        self.qm.start_expansion(
+            self.item_id,
+            enumerator.title if not title or title == self.url else None,
+        )
+        caught_up = False
+        try:
+            while True:
+                self.cancel_token.check()
+                room = self.qm.PLAYLIST_WINDOW - self.qm.pending_children(self.item_id)
+                if room <= 0:
+                    break
+                page = enumerator.next_page(min(PAGE_SIZE, room))
+                if not page:
+                    break
+                entries = _drop_archived(page)
+                if not entries:
+                    self._advance_playlist(len(page))
+                    caught_up = (
+                        len(page) >= PAGE_SIZE and options.download_profile == "archive"
+                    )
+                    if caught_up:
+                        logger.info("Playlist %s is up to date", self.url)
+                        break
+                    continue
+                added = self.qm.add_children(
+                    self.item_id, [self._child_item(e) for e in entries]
+                )
+                if added < len(entries):
+                    # The rest of the page (archived entries too) is offered
+                    # again, so the offset stays a position in the playlist
+                    first_left = entries[added]
+                    kept = next(i for i, e in enumerate(page) if e is first_left)
+                    self._advance_playlist(kept)
+                    enumerator.push_back(page[kept:])
+                    if not added and not self.qm.pending_children(self.item_id):
+                        raise ValueError("Queue is full")
+                    break  # resumed as children finish
+                self._advance_playlist(len(page))
+        except BaseException:
+            self.qm.finish_expansion(self.item_id, False, resume=False)
+            close_enumerator(self.item_id)
+            raise
+
+        finished = caught_up or enumerator.done
+        if finished:
+            close_enumerator(self.item_id)
+        logger.info(
+            "Playlist %s: %d entries queued so far",
+            self.url,
+            self.item.get("playlist_total", 0),
         )
+        self.qm.finish_expansion(self.item_id, finished)
+        return True
+
+    def _advance_playlist(self, consumed: int) -> None:
+        """Count enumerator entries that were queued or skipped as archived."""
+        self.item["playlist_offset"] = self.item.get("playlist_offset", 0) + consumed
 
     def _progress_hook(self, d):
         if self.cancel_token:
@@ -241,6 +524,10 @@ class DownloadJob:
             return
 
         if d["status"] == "downloading":
+            # Written bytes now show in the free space, not the reservation
+            get_disk_ledger().record_progress(
+                str(self.item_id), d.get("filename"), d.get("downloaded_bytes")
+            )
             try:
                 p = d.get("_percent_str", "0%").replace("%", "")
                 progress_val = float(p) / 100
@@ -253,6 +540,8 @@ class DownloadJob:
                     "speed": d.get("_speed_str", ""),
                     "eta": d.get("_eta_str", ""),
                     "size": d.get("_total_bytes_str", ""),
+                    # Saved if the app shuts down before the job is done
+                    "checkpoint": progress_checkpoint(d),
                 }
 
                 self.qm.update_item_status(
@@ -268,20 +557,26 @@ class DownloadJob:
 
     def _handle_error(self, e: Exception):
         err_str = str(e)
-        if "Cancelled" in err_str or (
+        if self.cancel_token and self.cancel_token.suspended:
+            # Shutting down: checkpointed for the next start, not a failure
+            logger.info("Download suspended for %s", self.url)
+            self.qm.update_item_status(
+                str(self.item_id), DownloadStatus.PAUSED  # type: ignore
+            )
+        elif "Cancelled" in err_str or (
             self.cancel_token and self.cancel_token.cancelled
         ):
             logger.info("Download cancelled for %s", self.url)
             self.qm.update_item_status(
                 str(self.item_id), DownloadStatus.CANCELLED  # type: ignore
             )
-            _log_to_history(self.item, None)
+            _log_to_history(self.item, None, elapsed=self._elapsed())
         else:
             logger.error("Download failed for %s: %s", self.url, e)
             self.qm.update_item_status(
                 str(self.item_id), DownloadStatus.ERROR, {"error": str(e)}  # type: ignore
             )
-            _log_to_history(self.item, None)
+            _log_to_history(self.item, None, elapsed=self._elapsed())
             if self.page:
                 self._notify_error()
 
@@ -356,6 +651,20 @@ def process_queue(page: ft.Page | None) -> None:
                 break
             claimed_markers.add(marker)
 
+            try:
+                admitted = _reserve_space(cast(dict, item))
+            except OSError as e:
+                logger.error("Cannot start %s: %s", item.get("url"), e)
+                qm.update_item_status(
+                    item["id"], DownloadStatus.ERROR, {"error": str(e)}
+                )
+                break
+            if not admitted:
+                # Strict queue order: wait until a download on the volume ends
+                logger.debug("Waiting for disk space: %s", item.get("url"))
+                qm.update_item_status(item["id"], DownloadStatus.QUEUED)
+                break
+
             logger.info(
                 "Submitting job for %s (ID: %s)", item.get("url"), item.get("id")
             )
@@ -368,6 +677,7 @@ def process_queue(page: ft.Page | None) -> None:
             # pylint: disable=unsupported-membership-test, unsubscriptable-object
             if item and "id" in item:
                 qm.update_item_status(item["id"], DownloadStatus.QUEUED)
+                _release_space(item["id"])
             raise
         finally:
             if not submitted:
@@ -470,6 +470,7 @@ def mock_dependencies():
         dxml_et = MagicMock()
         # Delegate parsing to real ET
         dxml_et.fromstring = ET.fromstring
+        dxml_et.iterparse = ET.iterparse
         dxml.ElementTree = dxml_et
         sys.modules["defusedxml"] = dxml
         sys.modules["defusedxml.ElementTree"] = dxml_et
@@ -537,3 +538,36 @@ if "keyring" not in sys.modules:
 
     sys.modules["keyring"] = keyring_mock
     sys.modules["keyring.errors"] = keyring_mock.errors
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _isolated_downloader_state(tmp_path, monkeypatch):
+    """Keep downloader caches and pools isolated per test (and out of ~)."""
+    import cloud_manager
+    import feed_poller
+    from downloader import checkpoint, cookie_cache, disk_ledger, metadata_cache
+    from downloader.engines import ydl_pool
+
+    # Pooled YoutubeDL instances would otherwise leak mocks between tests
+    monkeypatch.setattr(ydl_pool, "_POOL", ydl_pool.YoutubeDLPool())
+    monkeypatch.setattr(cookie_cache, "_CACHE", cookie_cache.BrowserCookieCache())
+    monkeypatch.setattr(disk_ledger, "_LEDGER", disk_ledger.DiskLedger())
+    monkeypatch.setattr(
+        checkpoint, "CHECKPOINT_FILE", str(tmp_path / "checkpoint.json")
+    )
+    monkeypatch.setattr(
+        feed_poller, "SEEN_INDEX_FILE", str(tmp_path / "feed_seen.json")
+    )
+    monkeypatch.setattr(
+        cloud_manager, "UPLOAD_STATE_FILE", str(tmp_path / "cloud_uploads.json")
+    )
+    monkeypatch.delenv("STREAMCATCH_CLOUD_DIR", raising=False)
+
+    monkeypatch.setattr(
+        metadata_cache,
+        "_CACHE",
+        metadata_cache.MetadataCache(db_file=str(tmp_path / "metadata_cache.db")),
+    )
@@ -0,0 +1,238 @@
+"""Tests for the shared aria2c RPC daemon engine."""
+
+import functools
+import http.server
+import json
+import os
+import shutil
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader.core import _configure_advanced_options, _download_direct
+from downloader.engines.aria2 import (
+    Aria2Daemon,
+    Aria2Downloader,
+    Aria2Error,
+    Aria2RPC,
+    Aria2Settings,
+)
+from downloader.types import DownloadOptions
+from utils import CancelToken
+
+
+class FakeAria2:
+    """In-memory aria2 RPC: each download advances one step per tellStatus."""
+
+    def __init__(self, out_dir, steps=3, fail=False):
+        self.out_dir = out_dir
+        self.steps = steps
+        self.fail = fail
+        self.downloads = {}
+        self.calls = []
+
+    def handle(self, method, params):
+        self.calls.append(method)
+        if params[0] != "token:secret":
+            return None, {"code": 1, "message": "Unauthorized"}
+        args = params[1:]
+        if method == "aria2.addUri":
+            gid = f"{len(self.downloads) + 1:016x}"
+            name = args[1].get("out") or os.path.basename(args[0][0])
+            path = os.path.join(args[1]["dir"], name)
+            self.downloads[gid] = {"path": path, "step": 0}
+            return gid, None
+        if method == "aria2.tellStatus":
+            d = self.downloads[args[0]]
+            d["step"] += 1
+            done = min(d["step"], self.steps) * 100
+            with open(d["path"], "wb") as f:
+                f.write(b"x" * done)
+            status = "active"
+            if d.get("removed"):
+                status = "removed"
+            elif d["step"] >= self.steps:
+                status = "error" if self.fail else "complete"
+            return {
+                "gid": args[0],
+                "status": status,
+                "totalLength": str(self.steps * 100),
+                "completedLength": str(done),
+                "downloadSpeed": "100",
+                "errorMessage": "404 Not Found" if self.fail else "",
+                "files": [{"path": d["path"]}],
+            }, None
+        if method == "aria2.forceRemove":
+            self.downloads[args[0]]["removed"] = True
+            return args[0], None
+        return "OK", None
+
+
+@pytest.fixture
+def fake_daemon(tmp_path):
+    fake = FakeAria2(str(tmp_path))
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            result, error = fake.handle(body["method"], body["params"])
+            reply = {"jsonrpc": "2.0", "id": body["id"]}
+            reply.update({"error": error} if error else {"result": result})
+            data = json.dumps(reply).encode()
+            self.send_response(400 if error else 200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    daemon = Aria2Daemon(Aria2Settings(), executable="aria2c")
+    daemon._rpc = Aria2RPC(f"http://127.0.0.1:{server.server_port}/jsonrpc", "secret")
+    with (
+        patch("downloader.engines.aria2.POLL_INTERVAL", 0.01),
+        patch("downloader.engines.aria2.validate_url", return_value=True),
+        patch.object(Aria2Downloader, "_resolve", side_effect=lambda url: url),
+    ):
+        yield fake, daemon
+    server.shutdown()
+
+
+def test_download_reports_progress_and_completes(fake_daemon, tmp_path):
+    fake, daemon = fake_daemon
+    seen = []
+    result = Aria2Downloader.download(
+        DownloadOptions(url="https://files.example/big.bin", progress_hook=seen.append),
+        str(tmp_path),
+        daemon=daemon,
+    )
+
+    assert result["filepath"] == str(tmp_path / "big.bin")
+    assert result["size"] == 300
+    downloading = [d for d in seen if d["status"] == "downloading"]
+    assert downloading[0]["_percent_str"] == "33.3%"
+    assert downloading[0]["total_bytes"] == 300
+    assert seen[-1]["status"] == "finished"
+    assert fake.calls[-1] == "aria2.removeDownloadResult"
+
+
+def test_cancel_removes_download_and_partial_files(fake_daemon, tmp_path):
+    fake, daemon = fake_daemon
+    fake.steps = 1000
+    token = CancelToken()
+
+    def hook(d):
+        if d["downloaded_bytes"] >= 200:
+            token.cancel()
+
+    with pytest.raises(InterruptedError):
+        Aria2Downloader.download(
+            DownloadOptions(
+                url="https://files.example/big.bin",
+                progress_hook=hook,
+                cancel_token=token,
+            ),
+            str(tmp_path),
+            daemon=daemon,
+        )
+
+    assert "aria2.forceRemove" in fake.calls
+    assert not (tmp_path / "big.bin").exists()
+
+
+def test_failed_download_raises_aria2_error(fake_daemon, tmp_path):
+    fake, daemon = fake_daemon
+    fake.fail = True
+    with pytest.raises(Aria2Error, match="404 Not Found"):
+        Aria2Downloader.download(
+            DownloadOptions(url="https://files.example/missing.bin"),
+            str(tmp_path),
+            daemon=daemon,
+        )
+
+
+def test_rpc_errors_are_raised(fake_daemon):
+    _, daemon = fake_daemon
+    bad = Aria2RPC(daemon._rpc.url, "wrong")
+    with pytest.raises(Aria2Error, match="Unauthorized"):
+        bad.call("getVersion")
+
+
+def test_settings_apply_globally():
+    settings = Aria2Settings.from_config(
+        {"max_concurrent_downloads": 5, "aria2_max_connections": 8}
+    )
+    assert "--max-connection-per-server=8" in settings.command_line()
+    assert settings.global_options()["max-concurrent-downloads"] == "5"
+
+    daemon = Aria2Daemon(settings, executable="aria2c")
+    daemon._rpc = MagicMock()
+    daemon.apply_settings(Aria2Settings(max_overall_download_limit="2M"))
+    daemon._rpc.call.assert_called_once_with(
+        "changeGlobalOption",
+        {"max-concurrent-downloads": "3", "max-overall-download-limit": "2M"},
+    )
+
+
+def test_ytdlp_aria2c_gets_the_configured_limits():
+    settings = Aria2Settings(
+        max_connections_per_server=4, max_overall_download_limit="2M"
+    )
+    ydl_opts = {}
+    with (
+        patch("downloader.core.shutil.which", return_value="/usr/bin/aria2c"),
+        patch("downloader.core.aria2_settings", return_value=settings),
+    ):
+        _configure_advanced_options(
+            ydl_opts, DownloadOptions(url="https://v.example/a", use_aria2c=True), False
+        )
+
+    args = ydl_opts["external_downloader_args"]
+    assert args[args.index("-x") + 1] == "4"
+    assert args[args.index("--max-overall-download-limit") + 1] == "2M"
+
+
+def test_direct_downloads_fall_back_when_aria2_fails(tmp_path):
+    options = DownloadOptions(url="https://files.example/a.bin", use_aria2c=True)
+    with (
+        patch("downloader.core.get_aria2_daemon", return_value=MagicMock()),
+        patch(
+            "downloader.core.Aria2Downloader.download",
+            side_effect=Aria2Error("daemon did not start"),
+        ),
+        patch("downloader.core.GenericDownloader.download") as generic,
+    ):
+        generic.return_value = {"filepath": "x"}
+        assert _download_direct(options, str(tmp_path), None) == {"filepath": "x"}
+
+
+@pytest.mark.skipif(shutil.which("aria2c") is None, reason="aria2c not installed")
+def test_real_daemon_downloads_from_local_server(tmp_path):
+    served = tmp_path / "served"
+    served.mkdir()
+    (served / "file.bin").write_bytes(os.urandom(256 * 1024))
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler, directory=str(served)
+    )
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    daemon = Aria2Daemon(Aria2Settings(max_connections_per_server=4, split=4))
+    try:
+        with (
+            patch("downloader.engines.aria2.validate_url", return_value=True),
+            patch.object(Aria2Downloader, "_resolve", side_effect=lambda url: url),
+        ):
+            result = Aria2Downloader.download(
+                DownloadOptions(url=f"http://127.0.0.1:{server.server_port}/file.bin"),
+                str(tmp_path / "out"),
+                daemon=daemon,
+            )
+        assert (
+            open(result["filepath"], "rb").read() == (served / "file.bin").read_bytes()
+        )
+    finally:
+        daemon.shutdown()
+        server.shutdown()
@@ -0,0 +1,178 @@
+"""Tests for parallel chapter splitting and clip extraction."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader.chapters import Cut, chapter_cuts, cut_command, extract_clip, run_cuts
+from downloader.core import _apply_time_range
+from downloader.postprocess import PostProcessJob
+from downloader.types import DownloadOptions
+
+
+def test_cut_is_a_stream_copy_with_input_seeking():
+    cmd = cut_command("ffmpeg", "in.mp4", Cut(61.5, 90.0, "out.mp4"))
+    assert cmd[cmd.index("-ss") + 1] == "61.500"
+    assert cmd[cmd.index("-t") + 1] == "28.500"
+    assert cmd.index("-ss") < cmd.index("-i")
+    assert cmd[cmd.index("-c") + 1] == "copy"
+    assert cmd[-1] == "out.mp4"
+
+    open_ended = cut_command("ffmpeg", "in.mp4", Cut(0.0, None, "out.mp4"))
+    assert "-ss" not in open_ended and "-t" not in open_ended
+
+
+def test_chapter_cuts_name_each_chapter():
+    chapters = [
+        {"start_time": 0, "end_time": 10, "title": "Intro"},
+        {"title": "no timing"},
+        {"start_time": 10, "title": "Rest"},
+    ]
+    cuts = chapter_cuts(chapters, lambda n, ch: f"/out/{n:03d} {ch['title']}.mp4")
+    assert cuts == [
+        Cut(0.0, 10.0, "/out/001 Intro.mp4"),
+        Cut(10.0, None, "/out/003 Rest.mp4"),
+    ]
+    assert chapters[0]["filepath"] == "/out/001 Intro.mp4"
+
+
+def test_cuts_run_concurrently_bounded_by_workers():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_run(cmd, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        barrier.wait()  # only passes if three cuts are in flight at once
+        with lock:
+            running -= 1
+        return MagicMock(returncode=0, stderr="")
+
+    cuts = [Cut(float(n), float(n + 1), f"c{n}.mp4") for n in range(6)]
+    with (
+        patch("downloader.chapters.subprocess.run", side_effect=fake_run),
+        patch("downloader.chapters._CUT_SLOTS", threading.BoundedSemaphore(8)),
+    ):
+        done = run_cuts("in.mp4", cuts, max_workers=3, ffmpeg="ffmpeg")
+
+    assert done == [c.destination for c in cuts]
+    assert peak == 3
+
+
+def test_concurrent_splits_share_one_cut_limit():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_run(cmd, **kwargs):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        threading.Event().wait(0.02)
+        with lock:
+            running -= 1
+        return MagicMock(returncode=0, stderr="")
+
+    def split(name):
+        cuts = [Cut(float(n), float(n + 1), f"{name}{n}.mp4") for n in range(4)]
+        run_cuts(f"{name}.mp4", cuts, max_workers=4, ffmpeg="ffmpeg")
+
+    with (
+        patch("downloader.chapters.subprocess.run", side_effect=fake_run),
+        patch("downloader.chapters._CUT_SLOTS", threading.BoundedSemaphore(2)),
+    ):
+        splits = [threading.Thread(target=split, args=(n,)) for n in "ab"]
+        for thread in splits:
+            thread.start()
+        for thread in splits:
+            thread.join(5)
+
+    assert peak == 2
+
+
+def test_cancelled_split_starts_no_more_cuts():
+    token = MagicMock()
+    token.check.side_effect = InterruptedError("cancelled")
+    with patch("downloader.chapters.subprocess.run") as run:
+        with pytest.raises(InterruptedError):
+            run_cuts(
+                "in.mp4", [Cut(0.0, 1.0, "c.mp4")], cancel_token=token, ffmpeg="ffmpeg"
+            )
+    run.assert_not_called()
+
+
+def test_failed_cut_raises():
+    with patch("downloader.chapters.subprocess.run") as run:
+        run.return_value = MagicMock(returncode=1, stderr="x\nInvalid data found")
+        with pytest.raises(RuntimeError, match="Invalid data found"):
+            run_cuts("in.mp4", [Cut(0.0, 1.0, "c.mp4")], ffmpeg="ffmpeg")
+
+
+def test_extract_clip_replaces_file(tmp_path):
+    media = tmp_path / "video.mp4"
+    media.write_bytes(b"full")
+
+    def fake_cuts(source, cuts, **kwargs):
+        (tmp_path / "video.clip.mp4").write_bytes(b"clip")
+        return [cuts[0].destination]
+
+    with patch("downloader.chapters.run_cuts", side_effect=fake_cuts):
+        extract_clip(str(media), 5.0, 9.0)
+
+    assert media.read_bytes() == b"clip"
+    assert not (tmp_path / "video.clip.mp4").exists()
+
+
+def test_direct_downloads_are_trimmed_to_requested_range(tmp_path):
+    media = tmp_path / "video.mp4"
+    media.write_bytes(b"data")
+    options = DownloadOptions(url="https://e.com/v.mp4", start_time="00:01:00")
+
+    with (
+        patch("downloader.core.shutil.which", return_value="/usr/bin/ffmpeg"),
+        patch("downloader.core.extract_clip") as clip,
+    ):
+        result = _apply_time_range({"filepath": str(media), "size": 99}, options)
+
+    clip.assert_called_once_with(str(media), 60.0, None, cancel_token=None)
+    assert result["size"] == 4
+
+
+def test_postprocess_job_splits_chapters_in_parallel():
+    info = {
+        "title": "v",
+        "filepath": "/tmp/v.mp4",
+        "chapters": [
+            {"start_time": 0, "end_time": 5, "title": "a"},
+            {"start_time": 5, "end_time": 9, "title": "b"},
+        ],
+    }
+    job = PostProcessJob(
+        filepath="/tmp/v.mp4",
+        info=info,
+        postprocessors=[{"key": "FFmpegMetadata"}, {"key": "FFmpegSplitChapters"}],
+    )
+    token = MagicMock()
+    with (
+        patch("downloader.postprocess.get_ydl_pool") as pool,
+        patch("downloader.postprocess.run_cuts") as cuts,
+    ):
+        ydl = pool.return_value.checkout.return_value.__enter__.return_value
+        ydl.post_process.return_value = info
+        ydl.prepare_filename.side_effect = lambda i, kind: (
+            f"/tmp/{i['section_number']:03d} {i['section_title']}.mp4"
+        )
+        job.run(token)
+
+    params = pool.return_value.checkout.call_args[0][0]
+    assert params["postprocessors"] == [{"key": "FFmpegMetadata"}]
+    source, planned = cuts.call_args[0]
+    assert source == "/tmp/v.mp4"
+    assert [c.destination for c in planned] == ["/tmp/001 a.mp4", "/tmp/002 b.mp4"]
+    assert cuts.call_args.kwargs["cancel_token"] is token
@@ -0,0 +1,90 @@
+"""Tests for suspending downloads at shutdown and resuming them."""
+
+import os
+from unittest.mock import MagicMock
+
+from downloader.checkpoint import load_checkpoint, progress_checkpoint, save_checkpoint
+from downloader.engines.aria2 import Aria2Downloader
+from downloader.staging import StagingArea
+from queue_manager import QueueManager
+from utils import CancelToken
+
+
+def test_suspend_all_checkpoints_unfinished_items(tmp_path):
+    qm = QueueManager()
+    qm.add_item({"id": "a", "url": "http://example.com/a.mp4", "title": "A"})
+    qm.add_item({"id": "b", "url": "http://example.com/b.mp4"})
+    qm.add_item({"id": "c", "url": "http://example.com/c.mp4"})
+    token = CancelToken()
+    qm.register_cancel_token("a", token)
+    qm.claim_next_downloadable()
+    checkpoint = progress_checkpoint(
+        {
+            "status": "downloading",
+            "filename": "/videos/a.mp4",
+            "tmpfilename": "/videos/a.mp4.part",
+            "downloaded_bytes": 512,
+            "total_bytes_estimate": 2048,
+            "fragment_index": 3,
+            "info_dict": {"url": "https://cdn.example.com/a"},
+        }
+    )
+    qm.update_item_status(
+        "a", "Downloading", {"speed": "1 MB/s", "checkpoint": checkpoint}
+    )
+    qm.update_item_status("c", "Completed")
+
+    suspended = qm.suspend_all()
+
+    assert token.cancelled and token.suspended
+    assert [item["id"] for item in suspended] == ["a", "b"]
+    saved = suspended[0]
+    assert saved["status"] == "Queued"
+    assert "speed" not in saved and "_allocated_at" not in saved
+    assert saved["checkpoint"] == {
+        "engine": "yt-dlp",
+        "url": "https://cdn.example.com/a",
+        "filename": "/videos/a.mp4",
+        "tmpfilename": "/videos/a.mp4.part",
+        "downloaded_bytes": 512,
+        "total_bytes": 2048,
+        "fragment_index": 3,
+    }
+
+    path = str(tmp_path / "checkpoint.json")
+    assert save_checkpoint(suspended, path)
+    restored = QueueManager()
+    for item in load_checkpoint(path):
+        restored.add_item(item)
+    assert not os.path.exists(path)
+    assert restored.claim_next_downloadable()["id"] == "a"
+    assert restored.get_item_by_id("a")["checkpoint"]["downloaded_bytes"] == 512
+
+
+def test_suspended_aria2_download_keeps_partial_files(tmp_path):
+    partial = tmp_path / "file.bin"
+    partial.write_bytes(b"abc")
+    (tmp_path / "file.bin.aria2").write_bytes(b"control")
+    rpc = MagicMock()
+
+    Aria2Downloader._discard(rpc, "gid", [str(partial)], keep_files=True)
+    assert partial.exists() and (tmp_path / "file.bin.aria2").exists()
+
+    Aria2Downloader._discard(rpc, "gid", [str(partial)])
+    assert not partial.exists() and not (tmp_path / "file.bin.aria2").exists()
+
+
+def test_suspended_staging_directory_is_reused(tmp_path):
+    area = StagingArea(str(tmp_path / "staging"))
+    staged = area.acquire(str(tmp_path / "out"), key="item-1")
+    (tmp_path / "staging" / "item-1" / "video.mp4.part").write_bytes(b"partial")
+    token = CancelToken()
+    token.suspend()
+    staged.abandon(token)
+
+    resumed = area.acquire(str(tmp_path / "out"), key="item-1")
+    assert resumed.directory == staged.directory
+    assert os.path.exists(os.path.join(resumed.directory, "video.mp4.part"))
+
+    resumed.abandon(CancelToken())
+    assert not os.path.exists(resumed.directory)
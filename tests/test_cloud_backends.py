@@ -0,0 +1,132 @@
+"""Tests for cloud backends, skipped unchanged uploads and history snapshots."""
+
+import sqlite3
+import zipfile
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from cloud_manager import CloudBackend, CloudManager, LocalFolderBackend
+from history_manager import HistoryManager
+from sync_manager import SyncManager
+
+
+class RecordingBackend(CloudBackend):
+    """Backend recording the cached ids it is given."""
+
+    def __init__(self):
+        self.uploads = []
+
+    def upload(self, file_path, name, file_id=None):
+        self.uploads.append((name, file_id))
+        return f"id-{name}"
+
+    def download(self, name, destination_path, file_id=None):
+        return None
+
+
+def test_local_backend_round_trip_skips_unchanged_uploads(tmp_path, monkeypatch):
+    monkeypatch.setenv("STREAMCATCH_CLOUD_DIR", str(tmp_path / "cloud"))
+    source = tmp_path / "config.json"
+    source.write_text('{"theme": "dark"}')
+
+    cloud = CloudManager()
+    assert isinstance(cloud.backends["local"], LocalFolderBackend)
+    assert cloud.upload_file(str(source))
+    assert not cloud.upload_file(str(source))
+    source.write_text('{"theme": "light"}')
+    assert cloud.upload_file(str(source))
+
+    restored = tmp_path / "restored" / "config.json"
+    assert cloud.download_file("config.json", str(restored))
+    assert restored.read_text() == '{"theme": "light"}'
+    assert not cloud.download_file("missing.json", str(restored))
+
+    # The upload state survives a restart
+    assert not CloudManager().upload_file(str(source))
+
+
+def test_remote_ids_are_cached_per_provider(tmp_path):
+    source = tmp_path / "history_manifest.json"
+    source.write_text("{}")
+    backend = RecordingBackend()
+    cloud = CloudManager(state_file=str(tmp_path / "state.json"))
+    cloud.register_backend("recording", backend)
+
+    cloud.upload_file(str(source), provider="recording")
+    source.write_text('{"a": 1}')
+    cloud.upload_file(str(source), provider="recording")
+    assert backend.uploads == [
+        ("history_manifest.json", None),
+        ("history_manifest.json", "id-history_manifest.json"),
+    ]
+
+
+def test_drive_upload_uses_cached_id_instead_of_query(tmp_path):
+    source = tmp_path / "config.json"
+    source.write_text("{}")
+    drive = MagicMock()
+    drive.ListFile.return_value.GetList.return_value = []
+    drive_file = MagicMock()
+    drive_file.__getitem__.side_effect = {"id": "drive-1"}.__getitem__
+    drive.CreateFile.return_value = drive_file
+    cloud = CloudManager(state_file=str(tmp_path / "state.json"))
+
+    with patch.object(cloud, "_get_google_drive_client", return_value=drive):
+        cloud.upload_file(str(source), provider="google_drive")
+        drive.ListFile.assert_called_once()
+        source.write_text('{"a": 1}')
+        cloud.upload_file(str(source), provider="google_drive")
+
+    drive.ListFile.assert_called_once()
+    drive.CreateFile.assert_called_with({"id": "drive-1"})
+
+
+def test_export_contains_consistent_history_snapshot(tmp_path):
+    db_file = str(tmp_path / "history.db")
+    HistoryManager._test_db_file = db_file
+    try:
+        history = HistoryManager()
+    finally:
+        del HistoryManager._test_db_file
+    history._test_db_file = db_file
+    history.add_entry({"url": "https://a/1", "title": "One", "status": "Completed"})
+
+    # Rows still in the WAL are part of the snapshot
+    sync = SyncManager(MagicMock(), {}, history)
+    export = tmp_path / "export.zip"
+    with patch.object(sync, "_resolve_history_db_path", return_value=db_file):
+        sync.export_data(str(export))
+
+    extracted = tmp_path / "extracted"
+    with zipfile.ZipFile(export) as zf:
+        zf.extract("history.db", extracted)
+    conn = sqlite3.connect(extracted / "history.db")
+    try:
+        urls = [row[0] for row in conn.execute("SELECT url FROM history")]
+    finally:
+        conn.close()
+    assert urls == ["https://a/1"]
+
+
+def test_drive_upload_without_id_is_an_error(tmp_path):
+    source = tmp_path / "config.json"
+    source.write_text("{}")
+    drive = MagicMock()
+    drive.ListFile.return_value.GetList.return_value = []
+    drive.CreateFile.return_value.__getitem__.side_effect = KeyError("id")
+    cloud = CloudManager(state_file=str(tmp_path / "state.json"))
+
+    with patch.object(cloud, "_get_google_drive_client", return_value=drive):
+        with pytest.raises(RuntimeError, match="no id"):
+            cloud.upload_file(str(source), provider="google_drive")
+    assert not (tmp_path / "state.json").exists()
+
+
+def test_backends_must_implement_upload_and_download():
+    class UploadOnly(CloudBackend):
+        def upload(self, file_path, name, file_id=None):
+            return name
+
+    with pytest.raises(TypeError):
+        UploadOnly()
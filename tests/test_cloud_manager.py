@@ -76,6 +76,7 @@ class TestCloudManagerPatched(unittest.TestCase):
         mock_drive_instance.ListFile.return_value = mock_list
 
         mock_drive_instance.CreateFile.return_value = mock_file
+        mock_file.__getitem__.return_value = "file-id"
 
         self.manager.upload_file("test.txt", provider="google_drive")
 
@@ -126,6 +127,9 @@ class TestCloudManagerPatched(unittest.TestCase):
         mock_gauth.credentials = MagicMock()
         # Force expired token
         mock_gauth.access_token_expired = True
+        mock_drive_instance = MockDrive.return_value
+        mock_drive_instance.ListFile.return_value.GetList.return_value = []
+        mock_drive_instance.CreateFile.return_value.__getitem__.return_value = "file-id"
 
         self.manager.upload_file("test.txt")
 
@@ -167,6 +171,9 @@ class TestCloudManagerPatched(unittest.TestCase):
         mock_gauth = MockAuth.return_value
         # Explicitly None to trigger auth flow
         mock_gauth.credentials = None
+        mock_drive_instance = MockDrive.return_value
+        mock_drive_instance.ListFile.return_value.GetList.return_value = []
+        mock_drive_instance.CreateFile.return_value.__getitem__.return_value = "file-id"
 
         # Ensure not headless and not CI to allow interactive auth
         with patch.dict(os.environ):
@@ -0,0 +1,96 @@
+"""Tests for the session-level browser cookie cache."""
+
+import http.cookiejar
+import os
+from unittest.mock import patch
+
+from downloader.cookie_cache import BrowserCookieCache
+
+
+def _jar(value):
+    jar = http.cookiejar.CookieJar()
+    jar.set_cookie(
+        http.cookiejar.Cookie(
+            0,
+            "sid",
+            value,
+            None,
+            False,
+            ".example.com",
+            True,
+            True,
+            "/",
+            True,
+            False,
+            None,
+            False,
+            None,
+            None,
+            {},
+        )
+    )
+    return jar
+
+
+def _values(jar):
+    return [c.value for c in jar]
+
+
+def test_extracts_once_and_refreshes_in_place_on_store_change(tmp_path):
+    store = tmp_path / "Cookies"
+    store.write_text("v1")
+    cache = BrowserCookieCache()
+
+    with (
+        patch("downloader.cookie_cache._cookie_store_paths", return_value=[str(store)]),
+        patch(
+            "downloader.cookie_cache.yt_dlp.cookies.extract_cookies_from_browser",
+            side_effect=[_jar("one"), _jar("two")],
+        ) as extract,
+    ):
+        first = cache.get_jar("chrome")
+        assert cache.get_jar("chrome") is first
+        assert extract.call_count == 1
+
+        os.utime(store, (1, 1))  # browser wrote its cookie store
+        refreshed = cache.get_jar("chrome")
+
+    assert refreshed is first  # holders of the jar see the new cookies
+    assert _values(first) == ["two"]
+    assert cache.stats() == {"hits": 1, "extractions": 2, "failures": 0, "browsers": 1}
+
+
+def test_ttl_and_invalidation_when_store_unknown():
+    cache = BrowserCookieCache(ttl=3600)
+    with (
+        patch("downloader.cookie_cache._cookie_store_paths", return_value=[]),
+        patch(
+            "downloader.cookie_cache.yt_dlp.cookies.extract_cookies_from_browser",
+            side_effect=[_jar("one"), _jar("two")],
+        ) as extract,
+    ):
+        jar = cache.get_jar("firefox", "default")
+        cache.get_jar("firefox", "default")
+        assert extract.call_count == 1
+
+        cache.invalidate("firefox")
+        cache.get_jar("firefox", "default")
+
+    assert extract.call_count == 2
+    assert _values(jar) == ["two"]
+
+
+def test_failed_extraction_keeps_previous_jar():
+    cache = BrowserCookieCache(ttl=0)
+    with (
+        patch("downloader.cookie_cache._cookie_store_paths", return_value=[]),
+        patch(
+            "downloader.cookie_cache.yt_dlp.cookies.extract_cookies_from_browser",
+            side_effect=[_jar("one"), OSError("locked")],
+        ),
+    ):
+        jar = cache.get_jar("edge")
+        assert cache.get_jar("edge") is jar
+
+    assert _values(jar) == ["one"]
+    assert cache.stats()["failures"] == 1
@@ -0,0 +1,159 @@
+"""Tests for content hashing, duplicate files and in-flight merging."""
+
+import hashlib
+import os
+from unittest.mock import MagicMock, patch
+
+from downloader.dedup import ContentHasher, deduplicate, hash_file
+from downloader.engines.generic import GenericDownloader
+from history_manager import HistoryManager
+from queue_manager import QueueManager
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def test_hasher_resumes_from_partial_file(tmp_path):
+    path = tmp_path / "partial.bin"
+    path.write_bytes(b"hello world")
+    hasher = ContentHasher.from_file(str(path), 5)
+    assert hasher.size == 5
+    hasher.update(b" there")
+    assert hasher.hexdigest() == _sha(b"hello there")
+    assert hash_file(str(path)) == _sha(b"hello world")
+    assert hash_file(str(tmp_path / "missing")) is None
+
+
+def test_generic_download_hashes_resumed_stream(tmp_path):
+    (tmp_path / "file.bin").write_bytes(b"abc")
+    head = MagicMock(url="http://example.com/file.bin", headers={"content-length": "6"})
+    get = MagicMock(status_code=206, headers={})
+    get.__enter__.return_value = get
+    get.iter_content.return_value = [b"de", b"f"]
+
+    def _request(method, *args, **kwargs):
+        return head if method == "head" else get
+
+    with (
+        patch("downloader.engines.generic.validate_url", return_value=True),
+        patch(
+            "downloader.engines.generic.GenericDownloader._request_with_safe_redirects",
+            side_effect=_request,
+        ),
+    ):
+        result = GenericDownloader.download(
+            "http://example.com/file.bin", str(tmp_path), filename="file.bin"
+        )
+
+    assert (tmp_path / "file.bin").read_bytes() == b"abcdef"
+    assert result["content_hash"] == _sha(b"abcdef")
+
+
+def test_duplicate_is_hardlinked_or_skipped(tmp_path):
+    first = tmp_path / "first.mp4"
+    first.write_bytes(b"same media")
+    digest = _sha(b"same media")
+
+    def _find(found_digest, exclude):
+        return str(first) if found_digest == digest and exclude != str(first) else None
+
+    second = tmp_path / "second.mp4"
+    second.write_bytes(b"same media")
+    result = deduplicate(
+        {"filepath": str(second), "content_hash": digest}, _find, "hardlink"
+    )
+    assert result["duplicate_of"] == str(first)
+    assert os.path.samefile(first, second)
+
+    third = tmp_path / "third.mp4"
+    third.write_bytes(b"same media")
+    result = deduplicate(
+        {"filepath": str(third), "content_hash": digest}, _find, "skip"
+    )
+    assert not third.exists()
+    assert result["filepath"] == str(first)
+    assert result["filename"] == "first.mp4"
+
+    fourth = tmp_path / "fourth.mp4"
+    fourth.write_bytes(b"same media")
+    result = deduplicate(
+        {"filepath": str(fourth), "content_hash": digest}, _find, "off"
+    )
+    assert "duplicate_of" not in result and fourth.exists()
+
+
+def test_history_finds_existing_file_by_hash(tmp_path):
+    HistoryManager._test_db_file = str(tmp_path / "history.db")
+    try:
+        manager = HistoryManager()
+        kept = tmp_path / "kept.mp4"
+        kept.write_bytes(b"x")
+        for path in (kept, tmp_path / "deleted.mp4"):
+            manager.add_entry(
+                {
+                    "url": f"http://example.com/{path.name}",
+                    "status": "Completed",
+                    "filepath": str(path),
+                    "content_hash": "abc",
+                }
+            )
+        assert manager.find_by_hash("abc") == str(kept)
+        assert manager.find_by_hash("abc", exclude=str(kept)) is None
+        assert manager.find_by_hash("other") is None
+    finally:
+        del HistoryManager._test_db_file
+
+
+def test_queue_merges_items_for_the_same_media():
+    qm = QueueManager()
+    qm.add_item({"id": "a", "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"})
+    qm.add_item({"id": "b", "url": "https://youtu.be/dQw4w9WgXcQ?si=share"})
+    qm.add_item({"id": "c", "url": "https://youtu.be/dQw4w9WgXcQ", "audio_only": True})
+
+    assert qm.get_item_by_id("b")["_merged_into"] == "a"
+    assert "_merged_into" not in qm.get_item_by_id("c")
+    claimed = [qm.claim_next_downloadable(), qm.claim_next_downloadable()]
+    assert [item["id"] for item in claimed] == ["a", "c"]
+    assert qm.claim_next_downloadable() is None
+
+    qm.update_item_status("a", "Completed", {"filepath": "/tmp/video.mp4"})
+    follower = qm.get_item_by_id("b")
+    assert follower["status"] == "Completed"
+    assert follower["filepath"] == "/tmp/video.mp4"
+
+
+def test_resolved_media_id_merges_in_flight_item():
+    qm = QueueManager()
+    qm.add_item({"id": "a", "url": "https://example.com/watch/1"})
+    qm.add_item({"id": "b", "url": "https://short.example/x"})
+    qm.claim_next_downloadable()
+    assert qm.merge_duplicate("a", "example:1") is None
+    qm.update_item_status("a", "Downloading")
+
+    qm.claim_next_downloadable()
+    assert qm.merge_duplicate("b", "example:1") == "a"
+    assert qm.get_active_count() == 1
+
+    # Cancelling the download hands the duplicate back to the queue
+    qm.cancel_item("a")
+    follower = qm.get_item_by_id("b")
+    assert follower["status"] == "Queued"
+    assert "_merged_into" not in follower
+
+
+def test_playlist_children_merge_with_queued_duplicates():
+    qm = QueueManager()
+    qm.add_item({"id": "solo", "url": "https://youtu.be/dQw4w9WgXcQ"})
+    qm.add_item({"id": "p", "url": "https://www.youtube.com/playlist?list=PL1"})
+    qm.add_children(
+        "p",
+        [
+            {"id": "c1", "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"},
+            {"id": "c2", "url": "https://www.youtube.com/watch?v=9bZkp7q19f0"},
+        ],
+    )
+
+    assert qm.get_item_by_id("c1")["_merged_into"] == "solo"
+    assert "_dedup_key" in qm.get_item_by_id("c2")
+    assert "_merged_into" not in qm.get_item_by_id("c2")
@@ -0,0 +1,87 @@
+"""Tests for the per-volume disk-space reservation ledger."""
+
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader.disk_ledger import MIB, DiskLedger, get_disk_ledger
+from tasks import DownloadStatus, process_queue
+
+_Usage = namedtuple("_Usage", "total used free")
+
+
+def _free(mib):
+    return patch(
+        "downloader.disk_ledger.shutil.disk_usage",
+        return_value=_Usage(0, 0, mib * MIB),
+    )
+
+
+def test_estimate_adds_merge_overhead_and_falls_back():
+    ledger = DiskLedger(unknown_size_bytes=300 * MIB)
+    merged = {
+        "requested_formats": [
+            {"filesize": 80 * MIB},
+            {"filesize_approx": 20 * MIB},
+        ]
+    }
+    assert ledger.estimate(merged) == (200 * MIB, True)
+    assert ledger.estimate({"final_url": "x", "filesize": "1048576"}) == (MIB, True)
+    assert ledger.estimate({"title": "no size"}) == (300 * MIB, False)
+    assert ledger.estimate(None) == (300 * MIB, False)
+
+
+def test_jobs_wait_until_reservations_fit(tmp_path):
+    ledger = DiskLedger(min_free_bytes=100 * MIB)
+    job = {"filesize": 400 * MIB}
+    with _free(1000):
+        assert ledger.reserve("a", str(tmp_path), job)
+        assert ledger.reserve("b", str(tmp_path), job)
+        assert not ledger.reserve("c", str(tmp_path), job)
+
+        # Bytes already written no longer count as outstanding
+        ledger.record_progress("a", "a.mp4", 300 * MIB)
+        assert ledger.reserved(str(tmp_path)) == 500 * MIB
+
+        assert ledger.release("b")
+        assert ledger.reserve("c", str(tmp_path), job)
+
+    with _free(550):
+        assert not ledger.has_room(str(tmp_path))
+        assert ledger.has_room(str(tmp_path), exclude="c")
+
+
+def test_job_larger_than_idle_volume_fails(tmp_path):
+    ledger = DiskLedger(min_free_bytes=100 * MIB, unknown_size_bytes=900 * MIB)
+    with _free(500):
+        with pytest.raises(OSError, match="Not enough disk space"):
+            ledger.reserve("big", str(tmp_path), {"filesize": 450 * MIB})
+        # Only an estimate: started as long as the minimum free space is there
+        assert ledger.reserve("unknown", str(tmp_path), None)
+
+
+def test_queue_requeues_item_until_space_is_released(tmp_path):
+    item = {"id": "2", "url": "http://example.com/f", "output_path": str(tmp_path)}
+    with (
+        patch("app_state.state") as state,
+        patch("tasks._get_max_workers", return_value=3),
+        patch("tasks._get_executor") as executor,
+        _free(1000),
+    ):
+        state.shutdown_flag.is_set.return_value = False
+        qm = state.queue_manager
+        qm.get_active_count.return_value = 0
+        qm.claim_next_downloadable.return_value = item
+        get_disk_ledger().reserve("1", str(tmp_path), {"filesize": 850 * MIB})
+
+        process_queue(None)
+        qm.update_item_status.assert_called_once_with("2", DownloadStatus.QUEUED)
+        assert not executor.return_value.submit.called
+
+        from tasks import _release_space
+
+        _release_space("1")
+        qm.notify_workers.assert_called_once()
+        process_queue(None)
+        assert executor.return_value.submit.called
@@ -13,6 +13,7 @@ from unittest.mock import ANY, MagicMock, patch
 import yt_dlp
 
 from downloader.core import _resolve_output_template, download_video
+from downloader.engines.extractor_index import ExtractorIndex
 from downloader.engines.ytdlp import YTDLPWrapper
 from downloader.info import get_video_info
 from downloader.types import DownloadOptions
@@ -373,22 +374,29 @@ class TestDownloaderExecution(unittest.TestCase):
         mock_ytdlp_wrapper.return_value.download.assert_called_once()
 
     def test_ytdlp_wrapper_supports_caching(self):
-        # Clear cache
-        YTDLPWrapper._SUPPORT_CACHE = {}
+        index = ExtractorIndex(cache_file=os.path.join(tempfile.mkdtemp(), "h.json"))
 
-        with patch("yt_dlp.extractor.gen_extractors") as mock_gen:
+        with (
+            patch("downloader.engines.ytdlp.get_extractor_index", return_value=index),
+            patch(
+                "downloader.engines.extractor_index.yt_dlp.extractor.gen_extractor_classes"
+            ) as mock_gen,
+        ):
             mock_ie = MagicMock()
             mock_ie.suitable.return_value = True
             mock_ie.IE_NAME = "Youtube"
+            mock_ie.ie_key.return_value = "Youtube"
             mock_gen.return_value = [mock_ie]
 
-            # First call
+            # First call builds the index
             self.assertTrue(YTDLPWrapper.supports("http://yt.com"))
             self.assertEqual(mock_gen.call_count, 1)
+            self.assertEqual(mock_ie.suitable.call_count, 1)
 
             # Second call should use cache
             self.assertTrue(YTDLPWrapper.supports("http://yt.com"))
             self.assertEqual(mock_gen.call_count, 1)
+            self.assertEqual(mock_ie.suitable.call_count, 1)
 
     def test_ytdlp_wrapper_download_cancel_token(self):
         wrapper = YTDLPWrapper({})
@@ -434,3 +442,65 @@ class TestDownloaderExecution(unittest.TestCase):
             )
 
             self.assertEqual(resolved, final_file)
+
+    def test_ytdlp_wrapper_reuses_prefetched_info(self):
+        wrapper = YTDLPWrapper({})
+        prefetched = {"id": "abc", "title": "Cached", "formats": [{"url": "u"}]}
+
+        with patch("yt_dlp.YoutubeDL") as mock_ydl:
+            ydl = mock_ydl.return_value.__enter__.return_value
+            ydl.process_ie_result.return_value = {"title": "Cached"}
+            ydl.prepare_filename.return_value = "/nonexistent/Cached.mp4"
+
+            result = wrapper.download("http://url", info=prefetched)
+
+        ydl.process_ie_result.assert_called_once_with(prefetched, download=True)
+        ydl.extract_info.assert_not_called()
+        self.assertEqual(result["title"], "Cached")
+
+    def test_ytdlp_wrapper_reextracts_when_prefetched_info_fails(self):
+        wrapper = YTDLPWrapper({})
+
+        with patch("yt_dlp.YoutubeDL") as mock_ydl:
+            ydl = mock_ydl.return_value.__enter__.return_value
+            ydl.process_ie_result.side_effect = yt_dlp.utils.DownloadError("403")
+            ydl.extract_info.return_value = {"title": "Fresh"}
+            ydl.prepare_filename.return_value = "/nonexistent/Fresh.mp4"
+
+            result = wrapper.download("http://url", info={"id": "abc", "url": "u"})
+
+        ydl.extract_info.assert_called_once_with("http://url", download=True)
+        self.assertEqual(result["title"], "Fresh")
+
+    @patch("downloader.core.YTDLPWrapper")
+    @patch("downloader.core.GenericDownloader")
+    @patch("downloader.core.TelegramExtractor")
+    @patch("downloader.core._check_disk_space", return_value=True)
+    def test_download_video_routes_prefetched_info(
+        self, _mock_disk, mock_telegram, mock_generic, mock_wrapper
+    ):
+        mock_telegram.is_telegram_url.return_value = False
+        head = {"webpage_url": "http://example.com/f.zip", "final_url": "http://x/f"}
+        download_video(
+            DownloadOptions(
+                url="http://example.com/f.zip",
+                output_path="/tmp",
+                force_generic=True,
+                prefetched_info=head,
+            )
+        )
+        self.assertIs(mock_generic.download.call_args.kwargs["head"], head)
+
+        info = {"extractor_key": "Youtube", "id": "abc", "formats": [{}]}
+        mock_wrapper.supports.return_value = True
+        for playlist, expected in ((False, info), (True, None)):
+            download_video(
+                DownloadOptions(
+                    url="http://youtube.com/watch?v=abc",
+                    output_path="/tmp",
+                    playlist=playlist,
+                    prefetched_info=info,
+                )
+            )
+            call = mock_wrapper.return_value.download.call_args
+            self.assertEqual(call.kwargs["info"], expected)
@@ -0,0 +1,101 @@
+"""Tests for the extractor routing index."""
+
+import re
+from unittest.mock import patch
+
+from downloader.engines.extractor_index import ExtractorIndex, _pattern_labels
+
+
+def _fake_ie(name, pattern):
+    compiled = re.compile(pattern)
+    calls = []
+
+    class FakeIE:
+        IE_NAME = name
+        _VALID_URL = pattern
+
+        @classmethod
+        def ie_key(cls):
+            return name
+
+        @classmethod
+        def suitable(cls, url):
+            calls.append(url)
+            return compiled.match(url) is not None
+
+    FakeIE.calls = calls
+    return FakeIE
+
+
+def _index(tmp_path, classes, **kwargs):
+    index = ExtractorIndex(cache_file=str(tmp_path / "hosts.json"), **kwargs)
+    patcher = patch(
+        "downloader.engines.extractor_index.yt_dlp.extractor.gen_extractor_classes",
+        return_value=classes,
+    )
+    patcher.start()
+    return index, patcher
+
+
+def test_pattern_labels_handles_alternations():
+    labels = _pattern_labels(r"https?://(?:www\.)?(?:youtube|youtu)\.be/x")
+    assert {"youtube", "youtu"} <= labels
+    assert "www" not in labels
+
+
+def test_narrowed_candidates_skip_unrelated_extractors(tmp_path):
+    vimeo = _fake_ie("Vimeo", r"https?://(?:www\.)?vimeo\.com/\d+")
+    other = _fake_ie("Other", r"https?://other\.example\.org/v/\d+")
+    generic = _fake_ie("generic", r".*")
+    index, patcher = _index(tmp_path, [other, vimeo, generic])
+    try:
+        assert index.supports("https://vimeo.com/42") is True
+        assert other.calls == []  # never consulted for a vimeo host
+        assert index.supports("https://unknown.example/file.zip") is False
+    finally:
+        patcher.stop()
+    assert index.stats()["first_classification_seconds"] is not None
+
+
+def test_full_scan_fallback_matches_unindexed_hosts(tmp_path):
+    # Label parsing cannot see "bilibili" in this pattern
+    bili = _fake_ie("Bili", r"https?://(?:www\.)?bili(?:bili\.tv|intl\.com)/\d+")
+    index, patcher = _index(tmp_path, [bili])
+    try:
+        assert index.supports("https://www.bilibili.tv/123") is True
+        assert index.stats()["full_scans"] == 1
+        # Host hint makes the next URL on the same host a direct hit
+        assert index.supports("https://www.bilibili.tv/456") is True
+        assert index.stats()["host_hits"] == 1
+    finally:
+        patcher.stop()
+
+
+def test_unsupported_host_is_fully_scanned_once(tmp_path):
+    vimeo = _fake_ie("Vimeo", r"https?://(?:www\.)?vimeo\.com/\d+")
+    other = _fake_ie("Other", r"https?://other\.example\.org/v/\d+")
+    index, patcher = _index(tmp_path, [other, vimeo])
+    try:
+        assert index.supports("https://cdn.mirror.net/a.zip") is False
+        assert index.supports("https://cdn.mirror.net/b.zip") is False
+    finally:
+        patcher.stop()
+    # The miss is remembered per host, so the second URL skips the scan
+    assert other.calls == ["https://cdn.mirror.net/a.zip"]
+    assert index.stats()["full_scans"] == 1
+    assert index.stats()["known_host_misses"] == 1
+
+
+def test_host_cache_is_bounded_and_persisted(tmp_path):
+    vimeo = _fake_ie("Vimeo", r"https?://[a-z0-9]+\.vimeo\.com/\d+")
+    index, patcher = _index(tmp_path, [vimeo], max_hosts=2)
+    try:
+        for sub in ("a", "b", "c"):
+            assert index.supports(f"https://{sub}.vimeo.com/1")
+        index.save()
+    finally:
+        patcher.stop()
+
+    reloaded = ExtractorIndex(cache_file=str(tmp_path / "hosts.json"))
+    reloaded.load()
+    assert list(reloaded._hosts) == ["b.vimeo.com", "c.vimeo.com"]
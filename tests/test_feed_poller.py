@@ -0,0 +1,102 @@
+"""Tests for background feed polling."""
+
+from unittest.mock import MagicMock
+
+from feed_poller import FeedPoller, SeenIndex, matches_filters, publish_interval
+
+
+def _entry(n, hour, title=None):
+    return {
+        "entry_id": f"yt:video:{n}",
+        "video_id": str(n),
+        "title": title or f"Video {n}",
+        "link": f"https://www.youtube.com/watch?v={n}",
+        "published": f"2024-01-01T{hour:02d}:00:00+00:00",
+    }
+
+
+def test_publish_interval_follows_feed_cadence():
+    items = [_entry(3, 12), _entry(2, 8), _entry(1, 4)]
+    # A four hour publishing gap is polled every hour
+    assert publish_interval(items, 600, 43200) == 3600
+    assert publish_interval(items, 7200, 43200) == 7200
+    assert publish_interval([_entry(1, 4)], 600, 43200) == 43200
+
+
+def test_failed_polls_back_off_up_to_the_maximum(monkeypatch):
+    monkeypatch.setattr("feed_poller.random.uniform", lambda a, b: 1.0)
+    monkeypatch.setattr("feed_poller.time.monotonic", lambda: 0.0)
+    rss = MagicMock()
+    rss.get_feeds.return_value = [{"url": "http://a"}]
+    rss.refresh_feed.side_effect = OSError("down")
+    poller = FeedPoller(
+        rss, config={"rss_poll_min_minutes": 10, "rss_poll_max_minutes": 60}
+    )
+    assert poller._due_feeds(0.0) == [{"url": "http://a"}]
+
+    delays = []
+    for _ in range(4):
+        poller.poll_feed({"url": "http://a"})
+        delays.append(poller._next_wait(0.0))
+    assert delays == [1200, 2400, 3600, 3600]
+
+    rss.refresh_feed.side_effect = None
+    rss.refresh_feed.return_value = [_entry(2, 8), _entry(1, 4)]
+    poller.poll_feed({"url": "http://a"})
+    assert poller._schedules["http://a"].failures == 0
+    assert poller._next_wait(0.0) == 3600
+    assert poller._due_feeds(0.0) == []
+
+
+def test_seen_index_records_backlog_then_reports_new_items(tmp_path):
+    path = str(tmp_path / "seen.json")
+    seen = SeenIndex(path)
+    assert seen.new_items("http://a", [_entry(1, 4)]) == []
+    assert seen.new_items("http://a", [_entry(2, 8), _entry(1, 4)]) == [_entry(2, 8)]
+    seen.save()
+
+    reloaded = SeenIndex(path)
+    assert reloaded.new_items("http://a", [_entry(2, 8), _entry(1, 4)]) == []
+    reloaded.forget(set())
+    assert reloaded.new_items("http://a", [_entry(3, 12)]) == []
+
+
+def test_new_items_are_filtered_and_queued_oldest_first(tmp_path):
+    feed = {
+        "url": "http://a",
+        "auto_download": True,
+        "include": "video",
+        "exclude": "live",
+        "video_format": "720p",
+    }
+    assert matches_filters(_entry(1, 4), feed)
+    assert not matches_filters(_entry(2, 8, "Video 2 (live)"), feed)
+
+    rss = MagicMock()
+    enqueue = MagicMock()
+    history = MagicMock()
+    history.filter_unarchived.side_effect = lambda items, keys: [
+        i for i in items if i["video_id"] != "4"
+    ]
+    poller = FeedPoller(
+        rss,
+        enqueue=enqueue,
+        history_manager=history,
+        config={"download_path": str(tmp_path)},
+        seen_index=SeenIndex(str(tmp_path / "seen.json")),
+    )
+    rss.refresh_feed.return_value = [_entry(1, 4)]
+    assert poller.poll_feed(feed) == []
+
+    rss.refresh_feed.return_value = [
+        _entry(5, 16),
+        _entry(4, 14),
+        _entry(3, 12, "Live stream"),
+        _entry(2, 8),
+        _entry(1, 4),
+    ]
+    assert len(poller.poll_feed(feed)) == 4
+    queued = [c.args[0] for c in enqueue.call_args_list]
+    assert [q["url"][-1] for q in queued] == ["2", "5"]
+    assert queued[0]["video_format"] == "720p"
+    assert queued[0]["output_path"] == str(tmp_path)
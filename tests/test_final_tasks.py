@@ -310,7 +310,13 @@ def test_progress_hook(mock_state):
     mock_state.queue_manager.update_item_status.assert_any_call(
         "123",
         DownloadStatus.DOWNLOADING,
-        {"progress": 0.5, "speed": "1M/s", "eta": "10s", "size": "100MB"},
+        {
+            "progress": 0.5,
+            "speed": "1M/s",
+            "eta": "10s",
+            "size": "100MB",
+            "checkpoint": {"engine": "generic", "url": None},
+        },
     )
 
     d_finished = {"status": "finished"}
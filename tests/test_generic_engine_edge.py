@@ -215,3 +215,20 @@ class TestGenericDownloaderEdge(unittest.TestCase):
             GenericDownloader._verify_path_security("path1", "path2")
 
         self.assertIn("Security violation", str(cm.exception))
+
+    @patch("downloader.engines.generic.validate_url", return_value=True)
+    def test_reuse_head_from_prefetched_metadata(self, _mock_validate):
+        """A prefetched HEAD result supplies final URL, size and filename."""
+        head = {
+            "webpage_url": "http://example.com/dl?id=1",
+            "final_url": "http://cdn.example.com/real.bin",
+            "filesize": "2048",
+            "content_disposition": 'attachment; filename="movie.mp4"',
+        }
+
+        self.assertEqual(
+            GenericDownloader._reuse_head(head, "http://example.com/dl?id=1"),
+            ("http://cdn.example.com/real.bin", 2048, "movie.mp4"),
+        )
+        # HEAD results for a different URL are never reused
+        self.assertIsNone(GenericDownloader._reuse_head(head, "http://other.com/x"))
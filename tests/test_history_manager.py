@@ -6,19 +6,20 @@ Tests for HistoryManager.
 
 import os
 import sqlite3
+import tempfile
 import unittest
 from pathlib import Path
 
-from history_manager import HistoryManager
+from history_archive import archive_keys
+from history_manager import SCHEMA_VERSION, HistoryManager
 
 
 class TestHistoryManager(unittest.TestCase):
 
     def setUp(self):
-        # Use a unique temporary DB file for testing to avoid collisions
-        import uuid
-
-        self.db_file = Path(f"test_history_{uuid.uuid4()}.db").resolve()
+        # A temporary directory per test also takes the WAL/SHM sidecar files
+        self._tmp = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.db_file = Path(self._tmp.name, "test_history.db").resolve()
 
         # Patch the class-level DB_FILE via a property or by patching the module level
         # HistoryManager._resolve_db_file uses _test_db_file if present
@@ -26,11 +27,7 @@ class TestHistoryManager(unittest.TestCase):
         self.manager = HistoryManager()
 
     def tearDown(self):
-        if self.db_file.exists():
-            try:
-                os.remove(self.db_file)
-            except OSError:
-                pass
+        self._tmp.cleanup()
         # Reset
         if hasattr(HistoryManager, "_test_db_file"):
             del HistoryManager._test_db_file
@@ -77,3 +74,147 @@ class TestHistoryManager(unittest.TestCase):
         self.manager.add_entry({})
 
         self.assertEqual(self.manager.get_history(), [])
+
+    def test_rollups_track_inserts_and_deletes(self):
+        self.manager.add_entry(
+            {
+                "url": "https://www.youtube.com/watch?v=1",
+                "status": "Completed",
+                "file_size": "10MB",
+                "duration": 60,
+            }
+        )
+        self.manager.add_entry(
+            {"url": "https://vimeo.com/2", "status": "Error", "file_size_bytes": 0}
+        )
+
+        stats = self.manager.get_stats()
+        self.assertEqual(stats["total_downloads"], 2)
+        self.assertEqual(stats["total_size_mb"], 10)
+
+        by_status = self.manager.get_history_stats()
+        self.assertEqual(by_status["total"], 2)
+        self.assertEqual(by_status["by_status"], {"Completed": 1, "Error": 1})
+
+        hosts = {h["host"]: h for h in self.manager.get_host_stats()}
+        self.assertEqual(hosts["youtube.com"]["total_bytes"], 10 * 1024 * 1024)
+        self.assertEqual(self.manager.get_download_activity(days=7)[-1]["count"], 2)
+
+        entry_id = self.manager.get_history(search_query="vimeo")[0]["id"]
+        self.manager.delete_entry(entry_id)
+        self.assertEqual(
+            self.manager.get_history_stats()["by_status"], {"Completed": 1}
+        )
+
+    def test_rollups_follow_updates_and_undated_rows(self):
+        self.manager.add_entry(
+            {"url": "https://a.com/1", "status": "Downloading", "file_size": "1MB"}
+        )
+        with sqlite3.connect(self.db_file) as conn:
+            conn.execute(
+                "UPDATE history SET status = 'Completed', file_size_bytes = ?, "
+                "timestamp = datetime('now', '-30 days')",
+                (2 * 1024 * 1024,),
+            )
+            # No day to roll up, but the row is still stored and counted
+            conn.execute(
+                "INSERT INTO history (url, status, timestamp) "
+                "VALUES ('https://a.com/2', 'Completed', NULL)"
+            )
+
+        by_status = self.manager.get_history_stats()["by_status"]
+        self.assertEqual(by_status, {"Completed": 2})
+        self.assertEqual(self.manager.get_stats()["total_size_mb"], 2)
+        self.assertEqual(self.manager.get_download_activity(days=7)[-1]["count"], 0)
+        with sqlite3.connect(self.db_file) as conn:
+            daily = conn.execute("SELECT downloads, total_bytes FROM history_daily")
+            self.assertEqual(daily.fetchall(), [(1, 2 * 1024 * 1024)])
+
+    def test_migration_backfills_legacy_rows(self):
+        os.remove(self.db_file)
+        with sqlite3.connect(self.db_file) as conn:
+            conn.execute("""
+                CREATE TABLE history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL,
+                    title TEXT, status TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    filename TEXT, filepath TEXT, file_size TEXT
+                )
+                """)
+            conn.execute(
+                "INSERT INTO history (url, status, file_size) VALUES (?, ?, ?)",
+                ("https://example.com/a", "Completed", "1.5 GB"),
+            )
+
+        HistoryManager.init_db()
+
+        with sqlite3.connect(self.db_file) as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            self.assertEqual(version, SCHEMA_VERSION)
+            row = conn.execute("SELECT file_size_bytes, host FROM history").fetchone()
+        self.assertEqual(row, (int(1.5 * 1024**3), "example.com"))
+        self.assertEqual(self.manager.get_stats()["total_downloads"], 1)
+        # Completed downloads seed the download archive
+        self.assertTrue(self.manager.is_archived("https://example.com/a/"))
+
+    def test_download_archive_lookup(self):
+        self.manager.add_to_archive(
+            archive_keys("https://youtu.be/dQw4w9WgXcQ", "Youtube:dQw4w9WgXcQ"),
+            title="Song",
+        )
+
+        self.assertTrue(
+            self.manager.is_archived("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5")
+        )
+        self.assertFalse(self.manager.is_archived(media_key="youtube:dqw4w9wgxcq"))
+        entries = [
+            {"url": "https://youtube.com/shorts/dQw4w9WgXcQ"},
+            {"url": "https://vimeo.com/1", "media_key": "Vimeo:1"},
+        ]
+        fresh = self.manager.filter_unarchived(
+            entries, lambda e: archive_keys(e["url"], e.get("media_key"))
+        )
+        self.assertEqual(fresh, entries[1:])
+
+        self.manager.remove_from_archive(["youtube:dQw4w9WgXcQ"])
+        self.assertEqual(self.manager.archive_size(), 0)
+
+    def test_new_database_uses_incremental_auto_vacuum(self):
+        with sqlite3.connect(self.db_file) as conn:
+            self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_apply_retention_in_batches(self):
+        from history_manager import RetentionPolicy
+
+        for i in range(5):
+            self.manager.add_entry({"url": f"https://a.com/{i}", "status": "Completed"})
+        self.manager.add_entry({"url": "https://a.com/f", "status": "Failed"})
+
+        with sqlite3.connect(self.db_file) as conn:
+            conn.execute(
+                "UPDATE history SET timestamp = datetime('now', '-30 days') "
+                "WHERE url IN ('https://a.com/0', 'https://a.com/f')"
+            )
+
+        self.manager.RETENTION_BATCH_PAUSE = 0
+        deleted = self.manager.apply_retention(
+            RetentionPolicy(max_age_days=14, max_entries=3), batch_size=1
+        )
+
+        self.assertEqual(deleted, 3)
+        urls = {e["url"] for e in self.manager.get_history()}
+        self.assertEqual(
+            urls, {"https://a.com/2", "https://a.com/3", "https://a.com/4"}
+        )
+        self.assertEqual(self.manager.get_stats()["total_downloads"], 3)
+        self.assertEqual(self.manager.get_download_activity(days=7)[-1]["count"], 3)
+
+    def test_retention_policy_from_config(self):
+        from history_manager import RetentionPolicy
+
+        policy = RetentionPolicy.from_config(
+            {"history_max_entries": 100, "history_prune_statuses": ["Failed"]}
+        )
+        self.assertTrue(policy.enabled)
+        self.assertEqual(policy.prune_statuses, ("Failed",))
+        self.assertFalse(RetentionPolicy.from_config({}).enabled)
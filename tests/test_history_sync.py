@@ -0,0 +1,148 @@
+"""Tests for delta-based history sync between devices."""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from history_manager import HistoryManager
+from sync_manager import SyncManager
+
+
+class FakeCloud:
+    """Cloud storage keeping files by name in a local directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self.uploads = []
+
+    def upload_file(self, file_path):
+        name = os.path.basename(file_path)
+        self.uploads.append(name)
+        shutil.copyfile(file_path, os.path.join(self.root, name))
+
+    def download_file(self, filename, destination_path):
+        source = os.path.join(self.root, filename)
+        if not os.path.exists(source):
+            return False
+        shutil.copyfile(source, destination_path)
+        return True
+
+
+def _history(path):
+    HistoryManager._test_db_file = str(path)
+    try:
+        manager = HistoryManager()
+    finally:
+        del HistoryManager._test_db_file
+    manager._test_db_file = str(path)
+    return manager
+
+
+def _urls(manager):
+    return sorted(row["url"] for row in manager.get_history(limit=100))
+
+
+@pytest.fixture
+def devices(tmp_path):
+    cloud = FakeCloud(tmp_path)
+    a = _history(tmp_path / "a.db")
+    b = _history(tmp_path / "b.db")
+    return cloud, a, b, SyncManager(cloud, {}, a), SyncManager(cloud, {}, b)
+
+
+def _entry(url):
+    return {"url": url, "title": url, "status": "Completed", "file_size": "1MB"}
+
+
+def test_only_changes_are_uploaded_and_merged(devices):
+    cloud, a, b, sync_a, sync_b = devices
+    a.add_entry(_entry("https://a/1"))
+    a.add_entry(_entry("https://a/2"))
+    b.add_entry(_entry("https://b/1"))
+
+    sync_a.sync_up()
+    device_a = a.sync_device_id()
+    assert f"history_delta_{device_a}_1.json.gz" in cloud.uploads
+    assert "history.db" not in cloud.uploads
+
+    cloud.uploads.clear()
+    sync_a.sync_up()
+    # Nothing changed: only the config is uploaded
+    assert len(cloud.uploads) == 1 and cloud.uploads[0].endswith("config.json")
+
+    # Down-sync merges instead of replacing the local database
+    sync_b.sync_down()
+    assert _urls(b) == ["https://a/1", "https://a/2", "https://b/1"]
+    assert b.get_stats()["total_downloads"] == 3
+    sync_b.sync_down()
+    assert len(_urls(b)) == 3
+
+    # Merged rows are not uploaded back as b's own changes
+    rows, deleted, _ = b.pending_changes()
+    assert [r["url"] for r in rows] == ["https://b/1"] and not deleted
+    sync_b.sync_up()
+    sync_a.sync_down()
+    assert _urls(a) == ["https://a/1", "https://a/2", "https://b/1"]
+    assert a.pending_changes() == ([], [], 0)
+
+
+def test_deletions_and_newer_rows_propagate(devices):
+    _, a, b, sync_a, sync_b = devices
+    a.add_entry(_entry("https://a/1"))
+    a.add_entry(_entry("https://a/2"))
+    sync_a.sync_up()
+    sync_b.sync_down()
+
+    doomed = next(r for r in a.get_history() if r["url"] == "https://a/1")
+    a.delete_entry(doomed["id"])
+    sync_a.sync_up()
+    sync_b.sync_down()
+    assert _urls(b) == ["https://a/2"]
+
+    assert a.pending_changes() == ([], [], 0)
+    kept = b.get_history()[0]
+    stale = {**kept, "title": "stale", "updated_at": kept["updated_at"] - 1}
+    newer = {**kept, "title": "renamed", "updated_at": kept["updated_at"] + 1}
+    assert b.apply_changes(a.sync_device_id(), 9, [stale], []) == 0
+    assert b.apply_changes(a.sync_device_id(), 10, [newer], []) == 1
+    assert b.get_history()[0]["title"] == "renamed"
+    assert b.sync_position(f"applied:{a.sync_device_id()}") == 10
+    assert b.get_stats()["total_downloads"] == 1
+
+
+def test_bad_remote_rows_are_skipped_individually(devices):
+    _, a, b, _, _ = devices
+    a.add_entry(_entry("https://a/1"))
+    good = a.pending_changes()[0][0]
+    undated = {**good, "sync_id": "0" * 32, "url": "https://a/2", "timestamp": "?"}
+    broken = {**good, "sync_id": "1" * 32, "title": {"not": "a value"}}
+    rejected = {**good, "sync_id": "2" * 32, "url": "https://rejected"}
+    with sqlite3.connect(b._test_db_file) as conn:
+        conn.execute(
+            "CREATE TRIGGER reject BEFORE INSERT ON history "
+            "WHEN NEW.url = 'https://rejected' BEGIN SELECT RAISE(ABORT, 'no'); END"
+        )
+
+    device = a.sync_device_id()
+    assert b.apply_changes(device, 1, [broken, rejected, undated, good], []) == 2
+    assert _urls(b) == ["https://a/1", "https://a/2"]
+    assert b.sync_position(f"applied:{device}") == 1
+
+
+def test_retention_purge_is_not_synced_as_deletions(devices):
+    from history_manager import RetentionPolicy
+
+    _, a, b, sync_a, sync_b = devices
+    for n in range(3):
+        a.add_entry(_entry(f"https://a/{n}"))
+    sync_a.sync_up()
+    sync_b.sync_down()
+
+    a.RETENTION_BATCH_PAUSE = 0
+    assert a.apply_retention(RetentionPolicy(max_entries=1)) == 2
+    assert a.pending_changes() == ([], [], 0)
+    sync_a.sync_up()
+    sync_b.sync_down()
+    assert len(_urls(b)) == 3
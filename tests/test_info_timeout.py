@@ -1,50 +1,69 @@
-from concurrent.futures import TimeoutError as FuturesTimeoutError
+import threading
+import time
 
-from downloader.info import get_video_info
+from downloader.info import ExtractionPool, get_video_info
 
 
-class FakeFuture:
-    def __init__(self):
-        self.cancelled = False
+def test_get_video_info_timeout_tracks_abandoned_worker(monkeypatch):
+    release = threading.Event()
+    pool = ExtractionPool(max_workers=1)
 
-    def result(self, timeout=None):
-        raise FuturesTimeoutError()
+    class HangingYDL:
+        def __init__(self, opts):
+            pass
 
-    def cancel(self):
-        self.cancelled = True
+        def __enter__(self):
+            return self
 
+        def __exit__(self, *args):
+            return False
 
-class FakeExecutor:
-    def __init__(self, max_workers=1):
-        self.max_workers = max_workers
-        self.future = FakeFuture()
-        self.shutdown_calls = []
+        def extract_info(self, url, download=False):
+            release.wait(5)
+            return {"title": "late"}
 
-    def submit(self, callback):
-        self.callback = callback
-        return self.future
+    monkeypatch.setattr("downloader.info._POOL", pool)
+    monkeypatch.setattr("downloader.info.yt_dlp.YoutubeDL", HangingYDL)
+    monkeypatch.setattr("downloader.info.INFO_EXTRACTION_TIMEOUT", 0.05)
+    monkeypatch.setattr(
+        "downloader.info.TelegramExtractor.is_telegram_url", lambda url: False
+    )
 
-    def shutdown(self, wait=True, cancel_futures=False):
-        self.shutdown_calls.append(
-            {"wait": wait, "cancel_futures": cancel_futures}
-        )
+    assert get_video_info("https://example.com/watch") is None
+    assert pool.stats()["abandoned"] == 1
+    assert pool.stats()["timeouts"] == 1
 
+    # Every worker is held by a hung extraction: fail fast instead of queueing
+    assert get_video_info("https://example.com/other") is None
+    assert pool.stats()["rejected"] == 1
 
-def test_get_video_info_timeout_cancels_without_waiting(monkeypatch):
-    fake_executor = FakeExecutor()
+    release.set()
+    deadline = time.time() + 2
+    while pool.stats()["abandoned"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert pool.stats()["abandoned"] == 0
+    pool.shutdown()
 
-    monkeypatch.setattr(
-        "downloader.info.ThreadPoolExecutor", lambda max_workers=1: fake_executor
-    )
-    monkeypatch.setattr("downloader.info.INFO_EXTRACTION_TIMEOUT", 0.01)
-    monkeypatch.setattr(
-        "downloader.info.TelegramExtractor.is_telegram_url", lambda url: False
-    )
 
-    result = get_video_info("https://example.com/watch")
+def test_extraction_pool_shares_inflight_requests():
+    pool = ExtractionPool(max_workers=2)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return {"title": "shared"}
+
+    first = pool.submit("key", work)
+    started.wait(1)
+    second = pool.submit("key", work)
+    release.set()
 
-    assert result is None
-    assert fake_executor.future.cancelled is True
-    assert fake_executor.shutdown_calls == [
-        {"wait": False, "cancel_futures": True}
-    ]
+    assert first is second
+    assert pool.result("key", second, 1) == {"title": "shared"}
+    assert len(calls) == 1
+    assert pool.stats()["shared"] == 1
+    pool.shutdown()
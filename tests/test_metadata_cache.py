@@ -0,0 +1,123 @@
+"""Tests for the persistent metadata cache."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from downloader import metadata_cache
+from downloader.metadata_cache import MetadataCache, canonical_url_key
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ",
+        "https://youtube.com/watch?v=dQw4w9WgXcQ&t=5",
+        "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ?si=abc",
+        "http://youtu.be/dQw4w9WgXcQ?si=tracking",
+    ],
+)
+def test_youtube_variants_share_key(url):
+    assert canonical_url_key(url) == "youtube:dQw4w9WgXcQ"
+
+
+def test_generic_url_drops_tracking_and_sorts_query():
+    a = canonical_url_key("https://www.Example.com/v/1/?b=2&a=1&utm_source=x#frag")
+    b = canonical_url_key("http://example.com/v/1?fbclid=zz&a=1&b=2")
+    assert a == b == "url:example.com/v/1?a=1&b=2"
+
+
+def test_share_params_are_only_dropped_where_they_are_tracking():
+    assert (
+        canonical_url_key("https://open.spotify.com/episode/1?si=abc")
+        == "url:open.spotify.com/episode/1"
+    )
+    assert (
+        canonical_url_key("https://youtube.com/playlist?list=PL1&si=x&pp=y")
+        == "url:youtube.com/playlist?list=PL1"
+    )
+    assert (
+        canonical_url_key("https://git.example/archive?ref=v2&si=1")
+        == "url:git.example/archive?ref=v2&si=1"
+    )
+
+
+def test_non_url_targets_are_kept():
+    assert canonical_url_key(" ytsearch1:cats ") == "ytsearch1:cats"
+
+
+def test_hit_via_alias_after_extractor_id_learned(tmp_path):
+    cache = MetadataCache(db_file=str(tmp_path / "c.db"), memory_entries=1)
+    raw = {"extractor_key": "Vimeo", "id": "42", "formats": []}
+    cache.put("https://vimeo.com/42?utm_medium=x", {"title": "T"}, raw=raw)
+    cache.put("https://other.example/a", {"title": "other"})  # evict memory tier
+
+    assert cache.get("https://vimeo.com/42")["title"] == "T"
+    assert cache.get_streams("https://vimeo.com/42")["id"] == "42"
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["stream_hits"] == 1
+    assert stats["entries"] == 2
+
+
+def test_stream_ttl_is_shorter_than_static(tmp_path):
+    cache = MetadataCache(db_file=str(tmp_path / "c.db"), stream_ttl=10)
+    raw = {"extractor_key": "Youtube", "id": "dQw4w9WgXcQ"}
+    cache.put("https://youtu.be/dQw4w9WgXcQ", {"title": "T"}, raw=raw)
+
+    later = time.time() + 60
+    with patch("downloader.metadata_cache.time.time", return_value=later):
+        assert cache.get_streams("https://youtu.be/dQw4w9WgXcQ") is None
+        cache._memory.clear()
+        assert cache.get("https://youtu.be/dQw4w9WgXcQ") == {"title": "T"}
+
+
+def test_signed_expire_param_caps_stream_ttl(tmp_path):
+    cache = MetadataCache(db_file=str(tmp_path / "c.db"))
+    raw = {
+        "extractor_key": "Youtube",
+        "id": "dQw4w9WgXcQ",
+        "formats": [{"url": f"https://cdn/x?expire={int(time.time()) + 30}"}],
+    }
+    cache.put("https://youtu.be/dQw4w9WgXcQ", {"title": "T"}, raw=raw)
+    assert cache.get_streams("https://youtu.be/dQw4w9WgXcQ") is None
+
+
+def test_lru_eviction_bounds_disk_entries(tmp_path):
+    cache = MetadataCache(db_file=str(tmp_path / "c.db"), max_entries=3)
+    for i in range(5):
+        cache.put(f"https://example.com/{i}", {"title": str(i)})
+    assert cache.stats()["entries"] <= 3
+    cache._memory.clear()
+    assert cache.get("https://example.com/4")["title"] == "4"
+    assert cache.get("https://example.com/0") is None
+
+
+def test_get_video_info_reads_through_cache():
+    info = {
+        "title": "Cached",
+        "extractor_key": "Youtube",
+        "id": "dQw4w9WgXcQ",
+        "formats": [],
+    }
+    with patch("downloader.info.yt_dlp.YoutubeDL") as mock_ydl:
+        mock_ydl.return_value.__enter__.return_value.extract_info.return_value = info
+        from downloader.info import get_video_info
+
+        first = get_video_info("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        second = get_video_info("https://youtu.be/dQw4w9WgXcQ?t=12")
+
+    assert first["title"] == second["title"] == "Cached"
+    assert "_raw" not in first
+    assert mock_ydl.call_count == 1
+    assert metadata_cache.get_metadata_cache().stats()["hits"] == 1
+
+
+def test_unwritable_cache_degrades_to_miss(tmp_path):
+    cache = MetadataCache(db_file=str(tmp_path / "missing" / "c.db"))
+    cache.put("https://example.com/a", {"title": "x"})
+    cache._memory.clear()
+    assert cache.get("https://example.com/a") is None
+    assert isinstance(cache.stats(), dict)
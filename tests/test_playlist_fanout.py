@@ -0,0 +1,244 @@
+"""Tests for lazy playlist enumeration and queue fan-out."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader import playlist
+from downloader.playlist import PAGE_SIZE, PlaylistEnumerator
+from queue_manager import QueueManager
+from tasks import DownloadJob
+
+
+class FakeFlatYDL:
+    """Serves a flat playlist whose entries are produced lazily."""
+
+    def __init__(self, params):
+        self.params = params
+        self.produced = 0
+
+    def _entries(self, count):
+        for n in range(count):
+            self.produced += 1
+            yield {"_type": "url", "url": f"https://v.example/{n}", "title": f"v{n}"}
+
+    def extract_info(self, url, download=False, process=True, ie_key=None):
+        assert not download and not process
+        if url == "https://chan.example":
+            return {"_type": "url", "url": "https://chan.example/videos"}
+        if url == "https://chan.example/videos":
+            return {
+                "_type": "playlist",
+                "title": "Channel",
+                "entries": iter(
+                    [
+                        {"_type": "playlist", "entries": self._entries(3)},
+                        {"_type": "url", "url": "https://v.example/extra"},
+                    ]
+                ),
+            }
+        return {"_type": "playlist", "title": "Big", "entries": self._entries(5000)}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_ydl():
+    with patch("downloader.playlist.yt_dlp.YoutubeDL", FakeFlatYDL):
+        yield
+
+
+def test_enumerator_pages_lazily(fake_ydl):
+    enumerator = PlaylistEnumerator("https://pl.example", {})
+    page = enumerator.next_page(50)
+
+    assert enumerator.is_playlist and enumerator.title == "Big"
+    assert [e["url"] for e in page[:2]] == [
+        "https://v.example/0",
+        "https://v.example/1",
+    ]
+    assert enumerator._ydl.produced == 50  # nothing beyond the page was fetched
+
+    enumerator.push_back(page[-2:])
+    assert enumerator.next_page(3)[0]["url"] == "https://v.example/48"
+
+
+def test_enumerator_resolves_channel_tabs_and_resumes_at_offset(fake_ydl):
+    enumerator = PlaylistEnumerator("https://chan.example", {})
+    urls = [e["url"] for e in enumerator.next_page(10)]
+    assert enumerator.title == "Channel"
+    assert urls[-1] == "https://v.example/extra" and len(urls) == 4
+    assert enumerator.done
+
+    reopened = PlaylistEnumerator("https://chan.example", {}, offset=2)
+    assert [e["url"] for e in reopened.next_page(10)] == [
+        "https://v.example/2",
+        "https://v.example/extra",
+    ]
+
+
+def _parent(qm):
+    parent = {"id": "p", "url": "https://pl.example", "playlist": True}
+    qm.add_item(parent)
+    parent["status"] = "Downloading"
+    qm.start_expansion("p")
+    return parent
+
+
+def test_children_aggregate_into_parent():
+    qm = QueueManager()
+    parent = _parent(qm)
+    qm.add_children("p", [{"url": f"u{n}", "title": str(n)} for n in range(3)])
+    assert qm.get_active_count() == 1  # enumerating parent holds a worker
+
+    qm.finish_expansion("p", enumerated=True)
+    assert qm.get_active_count() == 0  # ...but not while its children run
+
+    child_ids = [i["id"] for i in qm.get_all() if i.get("parent_id") == "p"]
+    qm.update_item_status(child_ids[0], "Completed")
+    qm.update_item_status(child_ids[1], "Error", {"error": "x"})
+    assert parent["progress"] == pytest.approx(2 / 3)
+    assert len(qm.get_all()) == 3  # completed child dropped, failed child kept
+
+    qm.cancel_item(child_ids[2])
+    assert parent["status"] == "Error"
+    assert parent["error"] == "2 of 3 entries failed"
+
+    assert qm.retry_item("p")
+    assert parent["status"] == "Downloading"
+    assert qm.pending_children("p") == 2
+
+    qm.cancel_item("p")
+    assert all(i["status"] == "Cancelled" for i in qm.get_all())
+
+
+def test_parent_requeued_for_next_page_when_window_drains():
+    qm = QueueManager()
+    parent = _parent(qm)
+    qm.add_children("p", [{"url": f"u{n}"} for n in range(qm.PLAYLIST_WINDOW)])
+    qm.finish_expansion("p", enumerated=False)
+    assert parent["status"] == "Downloading"
+
+    children = [i["id"] for i in qm.get_all() if i.get("parent_id") == "p"]
+    for child_id in children[: qm.PLAYLIST_WINDOW // 2]:
+        qm.update_item_status(child_id, "Completed")
+
+    assert parent["status"] == "Queued"
+    assert parent["size"] == f"100/{qm.PLAYLIST_WINDOW}"
+
+
+def test_download_job_fans_out_playlist():
+    qm = QueueManager()
+    item = {
+        "id": "p",
+        "url": "https://pl.example",
+        "playlist": True,
+        "video_format": "720p",
+        "start_time": "00:10",
+    }
+    qm.add_item(item)
+    enumerator = MagicMock(is_playlist=True, title="Big", done=True)
+    enumerator.next_page.side_effect = [
+        [{"url": "https://v.example/0", "title": "v0"}],
+        [],
+    ]
+
+    with (
+        patch("app_state.state") as state,
+        patch("tasks.YTDLPWrapper.supports", return_value=True),
+        patch("tasks.open_enumerator", return_value=enumerator),
+        patch("tasks.close_enumerator") as close,
+        patch("tasks.download_video") as download,
+    ):
+        state.queue_manager = qm
+        state.history_manager = None
+        state.config.get.side_effect = lambda k, default=None: default
+        state.shutdown_flag.is_set.return_value = False
+        DownloadJob(item, None).run()
+
+    download.assert_not_called()
+    close.assert_called_once_with("p")
+    child = next(i for i in qm.get_all() if i.get("parent_id") == "p")
+    assert child["video_format"] == "720p" and not child["playlist"]
+    assert "start_time" not in child
+    assert item["title"] == "Big" and item["playlist_enumerated"]
+
+
+def test_archive_sync_skips_known_entries_and_stops_early():
+    qm = QueueManager()
+    item = {
+        "id": "p",
+        "url": "https://chan.example",
+        "playlist": True,
+        "download_profile": "archive",
+    }
+    qm.add_item(item)
+    page = [
+        {"url": f"https://v.example/{n}", "title": str(n), "media_key": f"x:{n}"}
+        for n in range(PAGE_SIZE)
+    ]
+    enumerator = MagicMock(is_playlist=True, title="Chan", done=False)
+    enumerator.next_page.side_effect = [page, page]
+    history = MagicMock()
+    # First page: only entry 0 is new; second page: everything archived
+    history.filter_unarchived.side_effect = [page[:1], []]
+
+    with (
+        patch("app_state.state") as state,
+        patch("tasks.YTDLPWrapper.supports", return_value=True),
+        patch("tasks.open_enumerator", return_value=enumerator),
+        patch("tasks.close_enumerator"),
+    ):
+        state.queue_manager = qm
+        state.history_manager = history
+        state.config.get.side_effect = lambda k, default=None: default
+        state.shutdown_flag.is_set.return_value = False
+        DownloadJob(item, None).run()
+
+    assert enumerator.next_page.call_count == 2  # stopped before a third page
+    assert item["playlist_total"] == 1 and item["playlist_enumerated"]
+
+
+def test_evicted_enumerator_resumes_after_skipped_and_removed_entries(fake_ydl):
+    qm = QueueManager()
+    qm.PLAYLIST_WINDOW = 3
+    item = {"id": "p", "url": "https://pl.example", "playlist": True}
+    qm.add_item(item)
+    archived = {"https://v.example/0", "https://v.example/2"}
+    history = MagicMock()
+    history.filter_unarchived.side_effect = lambda entries, keys: [
+        e for e in entries if e["url"] not in archived
+    ]
+
+    def expand():
+        with (
+            patch("app_state.state") as state,
+            patch("tasks.YTDLPWrapper.supports", return_value=True),
+            patch.object(playlist, "MAX_OPEN_ENUMERATORS", 1),
+        ):
+            state.queue_manager = qm
+            state.history_manager = history
+            state.config.get.side_effect = lambda k, default=None: default
+            state.shutdown_flag.is_set.return_value = False
+            DownloadJob(item, None).run()
+
+    def children():
+        return [i for i in qm.get_all() if i.get("parent_id") == "p"]
+
+    try:
+        expand()
+        assert [c["url"][-1] for c in children()] == ["1", "3", "4"]
+        assert item["playlist_offset"] == 5
+
+        # Another playlist evicts this one's enumerator
+        with patch.object(playlist, "MAX_OPEN_ENUMERATORS", 1):
+            playlist.open_enumerator("other", "https://other.example", {})
+        # One entry removed by the user, one finished: the queue count drops
+        qm.remove_item(children()[0])
+        qm.update_item_status(children()[0]["id"], "Completed")
+        assert item["playlist_total"] == 2
+        expand()
+        assert [c["url"][-1] for c in children()] == ["4", "5", "6"]
+    finally:
+        playlist.close_all_enumerators()
@@ -0,0 +1,94 @@
+"""Tests for the separate post-processing stage."""
+
+from unittest.mock import MagicMock, patch
+
+from downloader.postprocess import (
+    PostProcessJob,
+    PostProcessStage,
+    split_deferred_postprocessors,
+)
+from queue_manager import QueueManager
+from tasks import DownloadJob
+from utils import CancelToken
+
+
+def test_only_file_postprocessors_are_deferred():
+    opts = {
+        "postprocessors": [
+            {"key": "FFmpegMetadata"},
+            {"key": "SponsorBlock", "when": "after_filter"},
+            {"key": "FFmpegExtractAudio", "when": "post_process"},
+        ]
+    }
+    deferred = split_deferred_postprocessors(opts)
+    assert [pp["key"] for pp in deferred] == ["FFmpegMetadata", "FFmpegExtractAudio"]
+    assert opts["postprocessors"] == [{"key": "SponsorBlock", "when": "after_filter"}]
+
+
+def test_job_runs_postprocessors_without_per_job_hooks():
+    job = PostProcessJob(
+        filepath="/tmp/v.mp4",
+        info={"title": "v"},
+        postprocessors=[{"key": "FFmpegMetadata"}],
+        params={"outtmpl": "/tmp/%(title)s.%(ext)s", "progress_hooks": [print]},
+    )
+    with patch("downloader.postprocess.get_ydl_pool") as pool:
+        ydl = pool.return_value.checkout.return_value.__enter__.return_value
+        ydl.post_process.return_value = {"title": "v", "filepath": "/tmp/v.mp4"}
+        assert job.run()["filepath"] == "/tmp/v.mp4"
+
+    params = pool.return_value.checkout.call_args[0][0]
+    assert "progress_hooks" not in params
+    assert params["postprocessors"] == [{"key": "FFmpegMetadata"}]
+    ydl.post_process.assert_called_once_with("/tmp/v.mp4", {"title": "v"})
+
+
+def test_cancelled_job_does_not_start():
+    stage = PostProcessStage(max_workers=1)
+    job = MagicMock()
+    token = CancelToken()
+    token.cancel()
+    future = stage.submit(job, token)
+    assert isinstance(future.exception(timeout=5), InterruptedError)
+    job.run.assert_not_called()
+    stage.shutdown()
+
+
+def test_download_slot_is_released_while_postprocessing():
+    qm = QueueManager()
+    item = {"id": "a", "url": "https://v.example/a", "title": "a"}
+    qm.add_item(item)
+    job = MagicMock(spec=PostProcessJob, filepath="/tmp/a.webm")
+    job.run.return_value = {"title": "a", "filepath": "/tmp/a.mp3"}
+
+    stage = MagicMock()
+    finish = []
+    stage.submit.side_effect = lambda j, token: finish.append(j) or MagicMock(
+        add_done_callback=finish.append
+    )
+
+    with (
+        patch("app_state.state") as state,
+        patch("tasks.download_video", return_value={"postprocess": job}) as download,
+        patch("tasks.get_postprocess_stage", return_value=stage),
+        patch("tasks._log_to_history") as log,
+    ):
+        state.queue_manager = qm
+        state.config.get.side_effect = lambda k, default=None: default
+        state.shutdown_flag.is_set.return_value = False
+        DownloadJob(item, None).run()
+
+        assert download.call_args[0][0].defer_postprocessing
+        assert item["status"] == "Processing"
+        assert qm.get_active_count() == 0  # slot free for the next download
+        assert "a" in qm._cancel_tokens  # still cancellable
+
+        submitted, callback = finish
+        future = MagicMock()
+        future.result.return_value = submitted.run()
+        callback(future)
+
+    assert item["status"] == "Completed" and not item.get("_postprocessing")
+    assert item["filepath"] == "/tmp/a.mp3"
+    log.assert_called_once()
+    assert "a" not in qm._cancel_tokens
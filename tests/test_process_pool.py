@@ -0,0 +1,158 @@
+"""Tests for the process-pool execution backend (workers run in threads here)."""
+
+import multiprocessing
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader import process_pool
+from downloader.core import _download_in_worker, download_video
+from downloader.info import _fetch_in_worker
+from downloader.process_pool import ProcessBackend
+from downloader.types import DownloadOptions
+from utils import CancelToken
+
+
+class ThreadProcess:
+    """Stands in for a spawned worker process, running the loop in a thread."""
+
+    def __init__(self, target, args):
+        self._thread = threading.Thread(target=target, args=args, daemon=True)
+        self.killed = False
+        self.exitcode = None
+
+    def start(self):
+        self._thread.start()
+
+    def is_alive(self):
+        return not self.killed and self._thread.is_alive()
+
+    def kill(self):
+        self.killed = True
+
+    def join(self, timeout=None):
+        if not self.killed:
+            self._thread.join(timeout)
+
+
+class ThreadBackend(ProcessBackend):
+    def _spawn(self):
+        parent_conn, child_conn = multiprocessing.Pipe(duplex=True)
+        process = ThreadProcess(
+            process_pool._worker_main, (child_conn, self.max_jobs_per_worker)
+        )
+        process.start()
+        with self._cond:
+            self._stats["spawned"] += 1
+        return process_pool._Worker(process, parent_conn)
+
+
+@pytest.fixture(autouse=True)
+def _reset_worker_flag():
+    yield
+    process_pool._IN_WORKER = False
+
+
+def _job(url):
+    return (DownloadOptions(url=url), "/downloads", None)
+
+
+def _fake_download(options, output_path, prefetched):
+    options.progress_hook(
+        {"status": "downloading", "_percent_str": "50%", "info_dict": {"big": 1}}
+    )
+    for _ in range(100):
+        options.cancel_token.check()
+        if options.url.endswith("slow"):
+            time.sleep(0.02)
+        else:
+            break
+    if options.url.endswith("bad"):
+        raise ValueError("bad url")
+    return {"filename": "a.mp4", "url": options.url}
+
+
+def test_download_round_trip_relays_progress_and_recycles():
+    backend = ThreadBackend(max_workers=1, max_jobs_per_worker=2)
+    seen = []
+    with patch("downloader.core._download_to", side_effect=_fake_download):
+        for n in range(3):
+            result = backend.run(
+                _download_in_worker,
+                _job(f"https://e.com/{n}"),
+                progress_hook=seen.append,
+            )
+            assert result == {"filename": "a.mp4", "url": f"https://e.com/{n}"}
+
+        with pytest.raises(ValueError, match="bad url"):
+            backend.run(_download_in_worker, _job("https://e.com/bad"))
+
+    # info_dict is not sent over the pipe
+    assert seen[0] == {"status": "downloading", "_percent_str": "50%"}
+    stats = backend.stats()
+    assert stats["spawned"] == 2 and stats["recycled"] == 2
+    backend.shutdown()
+
+
+def test_cancel_is_forwarded_to_worker():
+    backend = ThreadBackend(max_workers=1)
+    token = CancelToken()
+    with patch("downloader.core._download_to", side_effect=_fake_download):
+        with pytest.raises(InterruptedError):
+            backend.run(
+                _download_in_worker,
+                _job("https://e.com/slow"),
+                progress_hook=lambda d: token.cancel(),
+                cancel_token=token,
+            )
+        # The worker survived the cancel and is reused
+        assert backend.run(_download_in_worker, _job("https://e.com/1"))
+    assert backend.stats()["spawned"] == 1
+    backend.shutdown()
+
+
+def test_hung_job_times_out_and_worker_is_killed():
+    backend = ThreadBackend(max_workers=1)
+
+    def _hang(*args):
+        time.sleep(0.5)
+
+    with patch("downloader.info._fetch_video_info", side_effect=_hang):
+        with pytest.raises(TimeoutError):
+            backend.run(_fetch_in_worker, ("https://e.com", None, None), timeout=0.1)
+
+    assert backend.stats()["killed"] == 1
+    assert backend.stats()["busy"] == 0
+
+
+def test_workers_run_entry_points_locally():
+    backend = ThreadBackend()
+    with patch.object(process_pool, "_BACKEND", backend):
+        assert process_pool.get_process_backend() is backend
+        process_pool._IN_WORKER = True
+        assert process_pool.get_process_backend() is None
+
+
+def test_space_checks_and_staging_stay_in_the_app_process(tmp_path):
+    backend = MagicMock()
+    backend.run.return_value = {"filepath": str(tmp_path / "a.mp4")}
+    staging = MagicMock()
+    staging.acquire.return_value.directory = str(tmp_path / "stage")
+    staging.acquire.return_value.publish.side_effect = lambda result: result
+    with (
+        patch("downloader.core.get_process_backend", return_value=backend),
+        patch("downloader.core._check_disk_space", return_value=True) as space,
+        patch("downloader.core.get_staging_area", return_value=staging),
+    ):
+        download_video(
+            DownloadOptions(url="https://e.com/a", output_path=str(tmp_path))
+        )
+
+    space.assert_called_once()
+    job, (options, output_path, _) = backend.run.call_args[0]
+    assert job is _download_in_worker
+    assert options.url == "https://e.com/a" and options.progress_hook is None
+    assert output_path == str(tmp_path / "stage")
+    staging.acquire.return_value.publish.assert_called_once()
@@ -1,6 +1,7 @@
 # pylint: disable=line-too-long, wrong-import-position, too-many-instance-attributes, too-many-public-methods, invalid-name, unused-variable, import-outside-toplevel
 # pylint: disable=missing-module-docstring, missing-class-docstring, missing-function-docstring, too-many-arguments, too-many-positional-arguments, unused-argument, unused-import, protected-access
 import unittest
+from datetime import datetime
 from unittest.mock import MagicMock, patch
 
 from rss_manager import RSSManager
@@ -26,10 +27,8 @@ class TestRSSManager(unittest.TestCase):
         </feed>
         """
         mock_response = MagicMock()
-        # RSSManager now uses response.text, not response.content
-        mock_response.text = xml_content
-        # Set apparent_encoding
-        mock_response.apparent_encoding = "utf-8"
+        # The parser decodes the bytes itself (the prolog names the encoding)
+        mock_response.iter_content.return_value = [xml_content.encode("utf-8")]
         mock_response.raise_for_status.return_value = None
         mock_response.headers = {}
         mock_request.return_value = mock_response
@@ -59,6 +58,131 @@ class TestRSSManager(unittest.TestCase):
 
         self.assertEqual(RSSManager.parse_feed("http://fake.url"), [])
 
+    @patch("rss_manager.validate_url", return_value=True)
+    @patch("rss_manager.safe_request_with_redirects")
+    def test_unchanged_feed_reuses_cached_items(self, mock_request, _mock_validate):
+        rss = b"""<rss><channel><title>Feed</title>
+            <item><title>Episode</title><link>http://example.com/1</link></item>
+        </channel></rss>"""
+        full = MagicMock(status_code=200)
+        full.iter_content.return_value = [rss]
+        full.headers = {
+            "ETag": '"v1"',
+            "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+        not_modified = MagicMock(status_code=304, headers={})
+        mock_request.side_effect = [full, not_modified]
+        manager = RSSManager({"rss_feeds": []})
+
+        first = manager.fetch_feed("http://fake.url")
+        first[0]["feed_name"] = "mutated by the caller"
+        second = manager.fetch_feed("http://fake.url")
+
+        self.assertEqual(mock_request.call_args_list[0].kwargs["headers"], {})
+        self.assertEqual(
+            mock_request.call_args_list[1].kwargs["headers"],
+            {
+                "If-None-Match": '"v1"',
+                "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+            },
+        )
+        self.assertEqual(second[0]["title"], "Episode")
+        self.assertNotIn("feed_name", second[0])
+        not_modified.iter_content.assert_not_called()
+
+    @patch("rss_manager.validate_url", return_value=True)
+    @patch("rss_manager.safe_request_with_redirects")
+    def test_feed_encoding_detected_only_when_undeclared(
+        self, mock_request, _mock_validate
+    ):
+        body = "<rss><channel><item><title>Café</title>"
+        body += "<link>http://example.com/1</link></item></channel></rss>"
+        declared = MagicMock()
+        declared.iter_content.return_value = [body.encode("latin-1")]
+        declared.headers = {"Content-Type": "application/rss+xml; charset=ISO-8859-1"}
+        undeclared = MagicMock()
+        undeclared.iter_content.return_value = [body.encode("cp1252")]
+        undeclared.headers = {"Content-Type": "application/rss+xml"}
+        mock_request.side_effect = [declared, undeclared]
+        detected = MagicMock()
+        detected.return_value.best.return_value.encoding = "cp1252"
+
+        with patch("rss_manager.detect_charset", detected):
+            self.assertEqual(
+                RSSManager.parse_feed("http://fake.url")[0]["title"], "Café"
+            )
+            # Detection must not run when the headers name the charset
+            detected.assert_not_called()
+            self.assertEqual(
+                RSSManager.parse_feed("http://fake.url")[0]["title"], "Café"
+            )
+            detected.assert_called_once()
+
+    @patch("rss_manager.validate_url", return_value=True)
+    @patch("rss_manager.safe_request_with_redirects")
+    def test_changed_feed_is_read_up_to_last_seen_entry(
+        self, mock_request, _mock_validate
+    ):
+        def _atom(*entries):
+            body = '<feed xmlns="http://www.w3.org/2005/Atom"><title>Channel</title>'
+            for n, day in entries:
+                body += (
+                    f"<entry><id>urn:{n}</id><title>Video {n}</title>"
+                    f'<link href="http://example.com/{n}"/>'
+                    f"<published>2024-01-{day:02d}T00:00:00+00:00</published></entry>"
+                )
+            return body + "</feed>"
+
+        first = MagicMock(status_code=200, headers={})
+        first.iter_content.return_value = [_atom((3, 3), (2, 2)).encode()]
+        # Entry 3 ends the new part; the broken rest must never be read
+        changed = _atom((5, 5), (4, 4), (3, 3)).encode()
+        cut = changed.index(b"<entry><id>urn:3")
+        read = []
+
+        def _chunks():
+            for chunk in (changed[:cut], changed[cut:], b"<<broken"):
+                read.append(chunk)
+                yield chunk
+
+        second = MagicMock(status_code=200, headers={})
+        second.iter_content.return_value = _chunks()
+        mock_request.side_effect = [first, second]
+        manager = RSSManager({"rss_feeds": []})
+
+        self.assertEqual(
+            [i["title"] for i in manager.fetch_feed("http://f")], ["Video 3", "Video 2"]
+        )
+        with patch("rss_manager._HEAD_BYTES", 1):
+            items = manager.fetch_feed("http://f")
+
+        # New entries first, then the cached ones, within the feed's window
+        self.assertEqual([i["entry_id"] for i in items], ["urn:5", "urn:4"])
+        self.assertEqual(len(read), 2)
+        second.close.assert_called_once()
+
+        with patch("rss_manager._HEAD_BYTES", 1):
+            second.iter_content.return_value = iter([changed[:cut], b"</feed>"])
+            mock_request.side_effect = [second]
+            manager._feed_cache["http://f"].items = [
+                {"entry_id": "urn:5", "published": "2024-01-05T00:00:00+00:00"},
+                {"entry_id": "urn:9", "published": "2024-01-09T00:00:00+00:00"},
+            ]
+            # Not listed newest first: the whole feed is read again
+            items = manager.fetch_feed("http://f")
+        self.assertEqual([i["entry_id"] for i in items], ["urn:5", "urn:4"])
+
+    @patch("rss_manager.validate_url", return_value=True)
+    @patch("rss_manager.safe_request_with_redirects")
+    @patch("rss_manager.MAX_FEED_BYTES", 1024)
+    def test_streamed_feed_over_limit_is_rejected(self, mock_request, _mock_validate):
+        response = MagicMock(headers={})
+        chunk = b"<rss><channel>" + b"<item><title>x</title></item>" * 40
+        response.iter_content.return_value = [chunk, chunk + b"</channel></rss>"]
+        mock_request.return_value = response
+
+        self.assertEqual(RSSManager.parse_feed("http://fake.url"), [])
+
     @patch("rss_manager.RSSManager.parse_feed")
     def test_get_latest_video(self, mock_parse):
         mock_parse.return_value = [{"title": "Latest", "link": "http://link"}]
@@ -71,3 +195,49 @@ class TestRSSManager(unittest.TestCase):
         mock_parse.return_value = []
         video = RSSManager.get_latest_video("http://fake.url")
         self.assertIsNone(video)
+
+    def test_aggregated_items_merge_feeds_in_pages(self):
+        manager = RSSManager({"rss_feeds": ["http://a", "http://b"]})
+        feeds = {
+            url: [
+                {
+                    "entry_id": f"{url}/{day}",
+                    "title": f"{url[-1]}{day}",
+                    "published": f"2024-01-{day:02d}T00:00:00+00:00",
+                }
+                for day in days
+            ]
+            for url, days in (("http://a", (9, 5, 1)), ("http://b", (8, 6, 2)))
+        }
+
+        def fetch(url, instance):
+            instance._update_feed_name_safe(url, f"Feed {url[-1]}")
+            return feeds[url]
+
+        with (
+            patch.object(RSSManager, "_fetch_items", side_effect=fetch),
+            patch.object(manager, "_save_feeds") as mock_save,
+            patch(
+                "rss_manager.date_parser.parse", side_effect=datetime.fromisoformat
+            ) as mock_parse,
+        ):
+            items = manager.get_aggregated_items()
+            self.assertEqual(
+                [i["title"] for i in items], ["a9", "b8", "b6", "a5", "b2", "a1"]
+            )
+            self.assertEqual(items[1]["feed_name"], "Feed b")
+            # Both new titles are saved together
+            mock_save.assert_called_once()
+            self.assertEqual(mock_parse.call_count, 6)
+
+            manager.get_aggregated_items()
+            # Dates of stored entries are not parsed again
+            self.assertEqual(mock_parse.call_count, 6)
+            mock_save.assert_called_once()
+
+        self.assertEqual(
+            [i["title"] for i in manager.get_all_items(offset=2, limit=3)],
+            ["b6", "a5", "b2"],
+        )
+        manager.remove_feed("http://b")
+        self.assertEqual([i["title"] for i in manager.iter_items()], ["a9", "a5", "a1"])
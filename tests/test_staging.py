@@ -0,0 +1,120 @@
+"""Tests for the local staging area."""
+
+import errno
+import os
+from unittest.mock import patch
+
+import pytest
+
+from downloader import staging
+from downloader.core import download_video
+from downloader.disk_ledger import MIB
+from downloader.staging import StagingArea, configure_staging, move_file
+from downloader.types import DownloadOptions
+
+
+def test_move_across_volumes_copies_then_renames(tmp_path):
+    source = tmp_path / "staged.mp4"
+    source.write_bytes(b"video")
+    destination = tmp_path / "share" / "sub" / "video.mp4"
+    real_replace = os.replace
+    calls = []
+
+    def _replace(src, dst):
+        calls.append((src, dst))
+        if len(calls) == 1:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        real_replace(src, dst)
+
+    with patch("downloader.staging.os.replace", side_effect=_replace):
+        move_file(str(source), str(destination))
+
+    assert destination.read_bytes() == b"video"
+    assert not source.exists()
+    assert calls[1] == (f"{destination}.staging", str(destination))
+
+
+def test_publish_moves_finished_files_and_frees_capacity(tmp_path):
+    area = StagingArea(str(tmp_path / "stage"), capacity_bytes=150 * MIB)
+    staged = area.acquire(str(tmp_path / "out"), {"filesize": 100 * MIB})
+    assert staged is not None
+    assert area.acquire(str(tmp_path / "out"), {"filesize": 100 * MIB}) is None
+
+    os.makedirs(os.path.join(staged.directory, "Channel"))
+    video = os.path.join(staged.directory, "Channel", "clip.mp4")
+    with open(video, "wb") as f:
+        f.write(b"data")
+    with open(os.path.join(staged.directory, "clip.f137.mp4.part"), "wb") as f:
+        f.write(b"partial")
+
+    result = staged.publish({"filepath": video, "filename": "clip.mp4"})
+
+    assert result["filepath"] == str(tmp_path / "out" / "Channel" / "clip.mp4")
+    assert os.listdir(tmp_path / "out") == ["Channel"]
+    assert not os.path.exists(staged.directory)
+    assert area.acquire(str(tmp_path / "out"), {"filesize": 100 * MIB}) is not None
+
+
+def test_failed_publish_keeps_unmoved_files(tmp_path):
+    area = StagingArea(str(tmp_path / "stage"), capacity_bytes=150 * MIB)
+    staged = area.acquire(str(tmp_path / "out"), {"filesize": 100 * MIB})
+    video = os.path.join(staged.directory, "clip.mp4")
+    with open(video, "wb") as f:
+        f.write(b"data")
+
+    with patch("downloader.staging.move_file", side_effect=OSError("share went away")):
+        with pytest.raises(OSError):
+            staged.publish({"filepath": video})
+    staged.abandon()
+
+    assert os.path.exists(video)
+    assert area.acquire(str(tmp_path / "out"), {"filesize": 100 * MIB}) is not None
+
+
+def test_download_video_works_in_staging(tmp_path, monkeypatch):
+    monkeypatch.setattr(staging, "_AREA", None)
+    configure_staging(str(tmp_path / "stage"))
+    seen = {}
+
+    def _direct(options, output_path, head):
+        seen["path"] = output_path
+        target = os.path.join(output_path, "file.bin")
+        with open(target, "wb") as f:
+            f.write(b"payload")
+        return {"filename": "file.bin", "filepath": target}
+
+    with patch("downloader.core._download_direct", side_effect=_direct):
+        result = download_video(
+            DownloadOptions(
+                url="https://example.com/file.bin",
+                output_path=str(tmp_path / "out"),
+                force_generic=True,
+            )
+        )
+
+    assert seen["path"].startswith(str(tmp_path / "stage"))
+    assert result["filepath"] == str(tmp_path / "out" / "file.bin")
+    assert (tmp_path / "out" / "file.bin").read_bytes() == b"payload"
+    assert os.listdir(tmp_path / "stage") == []
+
+
+def test_failed_download_discards_staged_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(staging, "_AREA", None)
+    configure_staging(str(tmp_path / "stage"))
+
+    def _direct(options, output_path, head):
+        with open(os.path.join(output_path, "file.bin.part"), "wb") as f:
+            f.write(b"half")
+        raise OSError("connection reset")
+
+    with patch("downloader.core._download_direct", side_effect=_direct):
+        with pytest.raises(OSError, match="connection reset"):
+            download_video(
+                DownloadOptions(
+                    url="https://example.com/file.bin",
+                    output_path=str(tmp_path / "out"),
+                    force_generic=True,
+                )
+            )
+
+    assert os.listdir(tmp_path / "stage") == []
@@ -178,6 +178,7 @@ class TestCloudManagerCoverage(unittest.TestCase):
         mock_file = MagicMock()
         mock_drive.ListFile.return_value.GetList.return_value = []  # New file
         mock_drive.CreateFile.return_value = mock_file
+        mock_file.__getitem__.return_value = "file-id"
 
         self.manager.upload_file("test.zip")
 
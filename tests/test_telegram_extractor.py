@@ -0,0 +1,134 @@
+"""Tests for Telegram post scanning and channel batch enumeration."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader.extractors.telegram import TelegramChannelEnumerator, TelegramExtractor
+
+POST_HEAD = (
+    b"<html><head>"
+    b'<meta property="og:description" content="Clip &amp; more">'
+    b'<meta property="og:image" content="https://cdn.example/thumb.jpg">'
+    b'<meta property="og:video" content="https://cdn.example/video.mp4">'
+)
+
+
+def _response(chunks):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.return_value = chunks
+    return response
+
+
+def _listing(posts, title="Channel"):
+    html = f'<html><head><meta property="og:title" content="{title}"></head><body>'
+    for number, video in posts:
+        html += f'<div class="tgme_widget_message" data-post="chan/{number}">'
+        if video:
+            html += f'<video src="https://cdn.example/{number}.mp4"></video>'
+        html += "</div>"
+    return (html + "</body></html>").encode()
+
+
+@pytest.fixture
+def valid_urls():
+    with patch("downloader.extractors.telegram.validate_url", return_value=True):
+        yield
+
+
+def test_post_scan_stops_once_og_tags_are_found(valid_urls):
+    read = []
+
+    def chunks():
+        for chunk in (POST_HEAD, b"</head><body>" + b"x" * 100_000, b"</body>"):
+            read.append(chunk)
+            yield chunk
+
+    with patch(
+        "downloader.extractors.telegram.safe_request_with_redirects",
+        return_value=_response(chunks()),
+    ):
+        meta = TelegramExtractor.get_metadata("https://t.me/chan/5")
+
+    assert meta == {
+        "url": "https://cdn.example/video.mp4",
+        "title": "Clip & more",
+        "thumbnail": "https://cdn.example/thumb.jpg",
+    }
+    assert len(read) == 1
+
+
+def test_video_player_is_used_without_og_video(valid_urls):
+    page = (
+        b'<html><head><meta property="og:description" content="Post">'
+        b"</head><body><video src='/file/v.mp4'></video></body></html>"
+    )
+    with patch(
+        "downloader.extractors.telegram.safe_request_with_redirects",
+        return_value=_response([page]),
+    ):
+        meta = TelegramExtractor.get_metadata("https://t.me/chan/5")
+    assert meta["url"] == "https://t.me/file/v.mp4"
+
+    with patch(
+        "downloader.extractors.telegram.safe_request_with_redirects",
+        return_value=_response([b"x" * 8192] * 300),
+    ):
+        assert TelegramExtractor.get_metadata("https://t.me/chan/5") is None
+
+
+def test_channel_links_are_recognised():
+    assert TelegramExtractor.channel_name("https://t.me/s/durov") == "durov"
+    assert TelegramExtractor.channel_name("https://t.me/durov/") == "durov"
+    assert TelegramExtractor.channel_name("https://t.me/durov/12") is None
+    assert TelegramExtractor.channel_name("https://t.me/joinchat") is None
+    assert TelegramExtractor.channel_name("https://example.com/durov") is None
+
+
+def test_channel_enumerator_pages_listing_newest_first(valid_urls):
+    pages = {
+        "https://t.me/s/chan": _listing([(8, True), (9, False), (10, True)]),
+        "https://t.me/s/chan?before=8": _listing([(1, False), (7, True)]),
+    }
+    requested = []
+
+    def request(method, url, **kwargs):
+        requested.append(url)
+        if url in pages:
+            return _response([pages[url]])
+        if url == "https://t.me/chan/7":
+            return _response([b"<html><head></head><body>No video</body>"])
+        number = url.rsplit("/", 1)[1]
+        return _response(
+            [
+                f'<meta property="og:description" content="Post {number}">'
+                f'<video src="https://cdn.example/{number}.mp4">'.encode()
+            ]
+        )
+
+    with patch(
+        "downloader.extractors.telegram.safe_request_with_redirects",
+        side_effect=request,
+    ) as mock_request:
+        enumerator = TelegramChannelEnumerator("https://t.me/chan", {})
+        assert enumerator.is_playlist and enumerator.title == "Channel"
+
+        first = enumerator.next_page(1)
+        assert [e["url"] for e in first] == ["https://t.me/chan/10"]
+        assert first[0]["title"] == "Post 10"
+        assert first[0]["media_key"] == "telegram:chan/10"
+        # Post 7 has no video and the listing ends at post 1
+        assert [e["url"] for e in enumerator.next_page(5)] == ["https://t.me/chan/8"]
+        assert enumerator.done
+
+    sessions = {c.kwargs["session"] for c in mock_request.call_args_list}
+    assert sessions == {enumerator._session}
+    assert requested.count("https://t.me/s/chan") == 1
+
+    with patch(
+        "downloader.extractors.telegram.safe_request_with_redirects",
+        side_effect=request,
+    ):
+        reopened = TelegramChannelEnumerator("https://t.me/s/chan", {}, offset=1)
+        assert [e["url"] for e in reopened.next_page(5)] == ["https://t.me/chan/8"]
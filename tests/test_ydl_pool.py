@@ -0,0 +1,125 @@
+"""Tests for the pooled YoutubeDL instances."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from downloader.engines.ydl_pool import YoutubeDLPool, options_fingerprint
+
+
+class FakePP:
+    """Postprocessor stand-in: its own hook plus the builder's, like yt-dlp's."""
+
+    def __init__(self, hooks):
+        self._progress_hooks = [self.report_progress, *hooks]
+
+    def report_progress(self, d):
+        pass
+
+
+class FakeYDL:
+    """Minimal YoutubeDL stand-in tracking construction and per-job state."""
+
+    instances = []
+
+    def __init__(self, params):
+        self.params = dict(params)
+        self._progress_hooks = list(params.get("progress_hooks", []))
+        self._postprocessor_hooks = list(params.get("postprocessor_hooks", []))
+        self._pps = {"post_process": [FakePP(self._postprocessor_hooks)]}
+        self.closed = False
+        FakeYDL.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _fake_youtube_dl():
+    FakeYDL.instances = []
+    with patch("downloader.engines.ydl_pool.yt_dlp.YoutubeDL", FakeYDL):
+        yield
+
+
+def test_reuse_rebinds_postprocessor_hooks():
+    pool = YoutubeDLPool()
+    hook_a, hook_b = MagicMock(), MagicMock()
+
+    with pool.checkout({"format": "best", "postprocessor_hooks": [hook_a]}):
+        pass
+    with pool.checkout({"format": "best", "postprocessor_hooks": [hook_b]}) as ydl:
+        pp = ydl._pps["post_process"][0]
+        assert pp._progress_hooks == [pp.report_progress, hook_b]
+
+    assert pp._progress_hooks == [pp.report_progress]
+
+
+def test_fingerprint_ignores_per_job_options():
+    base = {"format": "best", "quiet": True}
+    a = {**base, "outtmpl": "/a/%(title)s", "progress_hooks": [MagicMock()]}
+    b = {**base, "outtmpl": "/b/%(title)s", "progress_hooks": [MagicMock()]}
+    assert options_fingerprint(a) == options_fingerprint(b)
+    assert options_fingerprint(a) != options_fingerprint({**a, "proxy": "http://p"})
+
+
+def test_reuse_swaps_per_job_hooks_and_template():
+    pool = YoutubeDLPool()
+    hook_a, hook_b = MagicMock(), MagicMock()
+
+    with pool.checkout({"format": "best", "outtmpl": "/a", "progress_hooks": [hook_a]}):
+        pass
+    with pool.checkout(
+        {"format": "best", "outtmpl": "/b", "progress_hooks": [hook_b]}
+    ) as ydl:
+        assert ydl._progress_hooks == [hook_b]
+        assert ydl.params["outtmpl"] == {"default": "/b"}
+
+    assert len(FakeYDL.instances) == 1
+    assert ydl._progress_hooks == []  # released instance holds no job callbacks
+    assert pool.stats()["reused"] == 1
+
+
+def test_failed_job_discards_instance():
+    pool = YoutubeDLPool()
+    with pytest.raises(RuntimeError):
+        with pool.checkout({"format": "best"}):
+            raise RuntimeError("boom")
+    with pool.checkout({"format": "best"}):
+        pass
+
+    assert len(FakeYDL.instances) == 2
+    assert FakeYDL.instances[0].closed
+
+
+def test_pool_is_bounded_and_ages_out():
+    pool = YoutubeDLPool(max_idle=1, max_uses=2)
+    with pool.checkout({"format": "a"}):
+        pass
+    with pool.checkout({"format": "b"}):
+        pass
+    assert pool.stats()["idle"] == 1
+    assert FakeYDL.instances[0].closed  # evicted to respect max_idle
+
+    with pool.checkout({"format": "b"}):
+        pass  # second use reaches max_uses
+    assert FakeYDL.instances[1].closed
+    assert pool.stats()["idle"] == 0
+
+
+def test_browser_cookies_come_from_shared_cache():
+    pool = YoutubeDLPool()
+    jar = object()
+    with patch("downloader.engines.ydl_pool.get_cookie_cache") as get_cache:
+        get_cache.return_value.get_jar.return_value = jar
+        with pool.checkout({"cookiesfrombrowser": ("chrome", None)}) as ydl:
+            assert ydl.cookiejar is jar
+            assert "cookiesfrombrowser" not in ydl.params
+        with pool.checkout({"cookiesfrombrowser": ("chrome", None)}):
+            pass
+
+    # Reuse re-validates the shared jar instead of re-extracting per instance
+    assert get_cache.return_value.get_jar.call_count == 2
+    assert len(FakeYDL.instances) == 1
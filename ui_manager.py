@@ -102,7 +102,12 @@ class UIManager:
         self.queue_view.on_retry = on_retry_item_callback
 
         self.history_view = HistoryView()
-        self.rss_view = RSSView(state.config, on_add_to_queue_callback)
+        self.rss_view = RSSView(
+            state.config,
+            on_add_to_queue_callback,
+            rss_manager=state.rss_manager,
+            feed_poller=state.feed_poller,
+        )
         self.settings_view = SettingsView(state.config, on_toggle_clipboard_callback)
 
         # Match the order in AppLayout.destinations:
@@ -207,6 +207,7 @@ def safe_request_with_redirects(
     url: str,
     *,
     max_redirects: int = 5,
+    session: requests.Session | None = None,
     **kwargs,
 ) -> requests.Response:
     """
@@ -215,7 +216,7 @@ def safe_request_with_redirects(
     requests' built-in redirect handling resolves the next URL after the first
     outbound request has already been made. This helper checks the initial
     target and each Location header with DNS-aware URL validation before making
-    the next hop.
+    the next hop. With a session, its pooled connections are reused.
     """
     if max_redirects < 0:
         raise ValueError("max_redirects must be non-negative")
@@ -225,7 +226,7 @@ def safe_request_with_redirects(
         if not validate_url(current_url, resolve_host=True):
             raise ValueError(f"Unsafe URL blocked: {current_url}")
 
-        response = requests.request(
+        response = (session or requests).request(
             method,
             current_url,
             allow_redirects=False,
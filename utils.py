@@ -19,6 +19,7 @@ class CancelToken:
                           Default is 5 minutes. Set to 0 for infinite wait (not recommended).
         """
         self._cancelled: bool = False
+        self._suspended: bool = False
         self._is_paused: bool = False
         self._lock: threading.Lock = threading.Lock()
         self._pause_timeout: float = pause_timeout
@@ -28,6 +29,12 @@ class CancelToken:
         with self._lock:
             self._cancelled = True
 
+    def suspend(self) -> None:
+        """Cancel for a later resume: partial files are kept, not cleaned up."""
+        with self._lock:
+            self._cancelled = True
+            self._suspended = True
+
     def pause(self) -> None:
         """Set the pause flag in a thread-safe manner."""
         with self._lock:
@@ -44,6 +51,12 @@ class CancelToken:
         with self._lock:
             return self._cancelled
 
+    @property
+    def suspended(self) -> bool:
+        """Thread-safe read of whether the cancellation is a suspension."""
+        with self._lock:
+            return self._suspended
+
     @property
     def is_paused(self) -> bool:
         """Thread-safe read of pause status."""
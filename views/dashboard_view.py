@@ -12,6 +12,7 @@ from collections.abc import Callable
 
 import flet as ft
 
+from downloader.metadata_cache import get_metadata_cache
 from history_manager import HistoryManager
 from localization_manager import LocalizationManager as LM
 from theme import Theme
@@ -567,7 +568,10 @@ class DashboardView(BaseView):
             )
             ffmpeg_status = state.ffmpeg_available
             concurrency = str(state.config.get("max_concurrent_downloads", 3))
-            cache_size = str(state.config.get("metadata_cache_size", 50))
+            cache_stats = get_metadata_cache().stats()
+            cache_size = (
+                f"{cache_stats['entries']} · {int(cache_stats['hit_rate'] * 100)}%"
+            )
 
             self.health_chips_row.controls = [
                 self._build_health_chip(
@@ -18,15 +18,25 @@ from views.base_view import BaseView
 
 logger = logging.getLogger(__name__)
 
+# Items rendered per page of the latest-items tab
+ITEMS_PAGE_SIZE = 50
+
 
 class RSSView(BaseView):
     """View for managing and viewing RSS feeds."""
 
-    def __init__(self, config, on_add_to_queue=None):
+    def __init__(
+        self, config, on_add_to_queue=None, rss_manager=None, feed_poller=None
+    ):
         super().__init__(LM.get("rss"), ft.icons.RSS_FEED_ROUNDED)
         self.config = config
         self.on_add_to_queue = on_add_to_queue
-        self.rss_manager = RSSManager(config)
+        self.rss_manager = rss_manager or RSSManager(config)
+        # The background poller refreshes the item store; re-render after it
+        self.feed_poller = feed_poller
+        if feed_poller:
+            feed_poller.add_listener(self._fetch_feeds_task)
+        self.items_limit = ITEMS_PAGE_SIZE
         self.feed_list = ft.ListView(expand=True, spacing=10, padding=10)
         self.items_list = ft.ListView(expand=True, spacing=10, padding=10)
 
@@ -186,11 +196,22 @@ class RSSView(BaseView):
         self.items_list.controls.clear()
         self.items_list.controls.append(ft.ProgressBar(color=Theme.Primary.MAIN))
         self.update()
-        threading.Thread(target=self._fetch_feeds_task, daemon=True).start()
+        if self.feed_poller:
+            self.feed_poller.poll_now()
+        else:
+            threading.Thread(target=self._refresh_task, daemon=True).start()
+
+    def _refresh_task(self):
+        """Fetch every feed, then render the items."""
+        self.rss_manager.get_aggregated_items()
+        self._fetch_feeds_task()
 
     def _fetch_feeds_task(self):
-        """Task to fetch feeds."""
-        items = self.rss_manager.get_all_items()
+        """Render the latest items of all feeds from the item store."""
+        # One extra item tells whether there is another page
+        items = self.rss_manager.get_all_items(limit=self.items_limit + 1)
+        has_more = len(items) > self.items_limit
+        items = items[: self.items_limit]
 
         def apply_updates():
             self.items_list.controls.clear()
@@ -266,6 +287,16 @@ class RSSView(BaseView):
                             **card_style,
                         )
                     )
+                if has_more:
+                    self.items_list.controls.append(
+                        ft.Container(
+                            content=ft.ElevatedButton(
+                                LM.get("load_more", "Load More"),
+                                on_click=self._load_more,
+                            ),
+                            alignment=ft.alignment.center,
+                        )
+                    )
             self.update()
             # Also refresh list names in case they updated
             self.load_feeds_list()
@@ -275,9 +306,17 @@ class RSSView(BaseView):
         else:
             apply_updates()
 
+    # pylint: disable=unused-argument
+    def _load_more(self, e):
+        self.items_limit += ITEMS_PAGE_SIZE
+        self._fetch_feeds_task()
+
     def on_tab_change(self, e):
         """Handle tab change."""
         if self.tabs.selected_index == 1:
-            # Auto refresh if empty?
             if not self.items_list.controls:
-                self.refresh_feeds(None)
+                # Show what the poller already fetched before going online
+                if self.rss_manager.get_all_items(limit=1):
+                    self._fetch_feeds_task()
+                else:
+                    self.refresh_feeds(None)